@@ -0,0 +1,94 @@
+"""Crypto cost per agent tool call: agent-side signing plus API-side verification.
+
+"uncached" is what every tool call used to pay: decode the PEM keys from the
+environment, RS256-sign a fresh token and RS256-verify it. "cached" uses the
+agent's `AgentTokenSigner` and the API's `require_agent_auth` with its
+verified-token cache. Uses a throwaway RSA key pair.
+
+    python .dev/scripts/bench_agent_jwt.py [--iterations 2000]
+
+Needs the API requirements installed.
+"""
+
+from __future__ import annotations
+
+import argparse
+import base64
+import importlib
+import importlib.machinery
+import importlib.util
+import os
+import sys
+import time
+from typing import Callable
+
+import jwt
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+
+ROOT = os.path.join(os.path.dirname(__file__), "..", "..", "services")
+sys.path.insert(0, os.path.join(ROOT, "api"))
+
+
+def _set_keys() -> None:
+    private = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    private_pem = private.private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+    )
+    public_pem = private.public_key().public_bytes(
+        serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo
+    )
+    os.environ["AGENT_PRIVATE_KEY_B64"] = base64.b64encode(private_pem).decode("ascii")
+    os.environ["AGENT_PUBLIC_KEY_B64"] = base64.b64encode(public_pem).decode("ascii")
+
+
+def _load_agent_signer():
+    # Both services are packages named `app`; import the agent's under another
+    # name (as embedded mode does) so its relative imports resolve.
+    spec = importlib.machinery.ModuleSpec("trainer2_agent", None, is_package=True)
+    spec.submodule_search_locations = [os.path.join(ROOT, "agent", "app")]
+    sys.modules["trainer2_agent"] = importlib.util.module_from_spec(spec)
+    return importlib.import_module("trainer2_agent.capabilities_sync")
+
+
+def _per_call_us(fn: Callable[[], object], iterations: int) -> float:
+    fn()
+    started = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - started) / iterations * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    _set_keys()
+    agent = _load_agent_signer()
+    from app.agent_auth import require_agent_auth
+
+    def uncached() -> None:
+        now = int(time.time())
+        private_pem = base64.b64decode(os.environ["AGENT_PRIVATE_KEY_B64"]).decode("utf-8")
+        token = jwt.encode(
+            {"iss": "trainer2-agent", "aud": "trainer2-api", "iat": now, "exp": now + 60},
+            private_pem,
+            algorithm="RS256",
+        )
+        public_pem = base64.b64decode(os.environ["AGENT_PUBLIC_KEY_B64"]).decode("utf-8")
+        jwt.decode(token, public_pem, algorithms=["RS256"], audience="trainer2-api", issuer="trainer2-agent")
+
+    def cached() -> None:
+        require_agent_auth(f"Bearer {agent._sign_agent_jwt()}")
+
+    sign_only = _per_call_us(lambda: agent._sign_agent_jwt(), args.iterations)
+    before = _per_call_us(uncached, max(1, args.iterations // 10))
+    after = _per_call_us(cached, args.iterations)
+    print(f"uncached sign + verify: {before:9.1f} us/call")
+    print(f"cached sign + verify:   {after:9.1f} us/call  ({before / after:.0f}x)")
+    print(f"  of which signing:     {sign_only:9.1f} us/call")
+
+
+if __name__ == "__main__":
+    main()
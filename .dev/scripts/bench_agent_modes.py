@@ -0,0 +1,192 @@
+"""Per-message overhead of the HTTP agent vs the embedded (in-process) agent.
+
+Starts the API (in this process) and the agent service (a subprocess) with
+uvicorn on local ports, with a throwaway agent key pair. The agent's model loop is replaced by a stub that
+makes `--tools` real tool calls (profile_get) and streams `--chunks` text
+chunks, so the numbers are transport overhead only: NDJSON streaming plus
+HTTP + JWT per tool call in HTTP mode, direct calls in embedded mode.
+
+    DATABASE_URL=postgresql://postgres@localhost:5432/trainer \\
+        python .dev/scripts/bench_agent_modes.py [--messages 200] [--tools 2] [--chunks 20]
+
+Needs the API and agent requirements and a migrated database. Creates and
+removes a throwaway user.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import base64
+import os
+import subprocess
+import sys
+import time
+import uuid
+from typing import Any, AsyncIterator, Dict, Optional
+
+ROOT = os.path.join(os.path.dirname(__file__), "..", "..", "services")
+
+API_PORT = 18000
+AGENT_PORT = 19000
+
+
+def _set_keys() -> None:
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric import rsa
+
+    private = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    private_pem = private.private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+    )
+    public_pem = private.public_key().public_bytes(
+        serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo
+    )
+    os.environ["AGENT_PRIVATE_KEY_B64"] = base64.b64encode(private_pem).decode("ascii")
+    os.environ["AGENT_PUBLIC_KEY_B64"] = base64.b64encode(public_pem).decode("ascii")
+    os.environ["API_BASE_URL"] = f"http://127.0.0.1:{API_PORT}"
+    os.environ["AGENT_MODE"] = "http"
+
+
+def _install_stub(runner: Any, agent_main: Optional[Any], *, tools: int, chunks: int) -> None:
+    from agents.run_context import RunContextWrapper
+
+    async def run_stream(
+        *,
+        user_id: str,
+        session_id: str,
+        run_id: Optional[str],
+        message: str,
+        context: Optional[Dict[str, Any]],
+        max_turns: int = 10,
+        tool_backend: Any = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        ctx = RunContextWrapper(
+            context=runner.RunCtx(
+                api_base_url=runner._api_base_url(),
+                user_id=user_id,
+                session_id=session_id,
+                run_id=(run_id or "").strip(),
+                tools=tool_backend,
+            )
+        )
+        for _ in range(tools):
+            await runner._api_tool_execute(ctx=ctx, name="profile_get", args={})
+            yield {"type": "TOOL_CALL_RESULT", "toolName": "profile_get"}
+        for i in range(chunks):
+            yield {"type": "TEXT_MESSAGE_CHUNK", "messageId": "m1", "delta": f"word{i} "}
+
+    runner.run_stream = run_stream
+    if agent_main is not None:
+        agent_main.run_stream = run_stream
+
+
+def _serve_agent(*, tools: int, chunks: int) -> None:
+    # Subprocess: the agent service as deployed, with the stubbed model loop.
+    import uvicorn
+
+    sys.path.insert(0, os.path.join(ROOT, "agent"))
+    import app.main as agent_main
+    import app.runner as runner
+
+    _install_stub(runner, agent_main, tools=tools, chunks=chunks)
+
+    async def skip_update() -> Dict[str, Any]:
+        # Leave the checked-in generated files alone.
+        return {"ok": True}
+
+    agent_main.update_capabilities = skip_update
+    uvicorn.run(agent_main.app, host="127.0.0.1", port=AGENT_PORT, log_level="warning")
+
+
+async def _serve(app: Any, port: int) -> Any:
+    import uvicorn
+
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    server.install_signal_handlers = lambda: None
+    task = asyncio.create_task(server.serve())
+    while not server.started:
+        if task.done():
+            task.result()
+        await asyncio.sleep(0.05)
+    return server, task
+
+
+async def _per_message_ms(client: Any, user_id: uuid.UUID, messages: int) -> float:
+    async def one() -> None:
+        async for _evt in client.run_stream(user_id=str(user_id), session_id="bench", message="hi", context={}):
+            pass
+
+    await one()
+    started = time.perf_counter()
+    for _ in range(messages):
+        await one()
+    return (time.perf_counter() - started) / messages * 1000
+
+
+async def _bench(args: argparse.Namespace) -> None:
+    _set_keys()
+    sys.path.insert(0, os.path.join(ROOT, "api"))
+    import httpx
+    from sqlalchemy import text
+
+    from app.clients.agent_client import get_agent_client
+    from app.clients.embedded_agent import EmbeddedAgentClient, load_agent_runner
+    from app.db import create_engine
+    from app.main import app as api_app
+
+    _install_stub(load_agent_runner(), None, tools=args.tools, chunks=args.chunks)
+
+    engine = create_engine()
+    user_id = uuid.uuid4()
+    async with engine.begin() as conn:
+        await conn.execute(
+            text("INSERT INTO users (id, provider, provider_subject) VALUES (:id, 'local', :sub)"),
+            {"id": user_id, "sub": f"agent-bench-{user_id}"},
+        )
+
+    os.environ["AGENT_BASE_URL"] = f"http://127.0.0.1:{AGENT_PORT}"
+    api_server, api_task = await _serve(api_app, API_PORT)
+    agent_proc = subprocess.Popen(
+        [sys.executable, __file__, "--serve-agent", "--tools", str(args.tools), "--chunks", str(args.chunks)]
+    )
+    try:
+        async with httpx.AsyncClient() as http:
+            for _ in range(100):
+                try:
+                    await http.get(f"http://127.0.0.1:{AGENT_PORT}/health")
+                    break
+                except httpx.TransportError:
+                    await asyncio.sleep(0.1)
+        http_ms = await _per_message_ms(get_agent_client(api_app), user_id, args.messages)
+        embedded_ms = await _per_message_ms(EmbeddedAgentClient.from_app(api_app), user_id, args.messages)
+    finally:
+        agent_proc.terminate()
+        agent_proc.wait()
+        api_server.should_exit = True
+        await api_task
+        async with engine.begin() as conn:
+            await conn.execute(text("DELETE FROM users WHERE id = :id"), {"id": user_id})
+        await engine.dispose()
+
+    print(f"{args.tools} tool calls + {args.chunks} chunks per message, {args.messages} messages")
+    print(f"http:     {http_ms:8.2f} ms/message")
+    print(f"embedded: {embedded_ms:8.2f} ms/message  ({http_ms / embedded_ms:.1f}x)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--messages", type=int, default=200)
+    parser.add_argument("--tools", type=int, default=2)
+    parser.add_argument("--chunks", type=int, default=20)
+    parser.add_argument("--serve-agent", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve_agent:
+        _serve_agent(tools=args.tools, chunks=args.chunks)
+    else:
+        asyncio.run(_bench(args))
+
+
+if __name__ == "__main__":
+    main()
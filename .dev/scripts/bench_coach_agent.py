@@ -0,0 +1,57 @@
+"""Per-run cost of getting the coach Agent, uncached vs cached.
+
+"uncached" is what every run used to pay: compile the instructions (coach.md,
+every generated tool schema and table card) and build a new Agent. "cached"
+is `runner._coach_agent()`: a stat check of the source files and a reuse of
+the agent built for the same content hash.
+
+    python .dev/scripts/bench_coach_agent.py [--iterations 2000]
+
+Needs the agent requirements installed.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+from typing import Callable
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "services", "agent"))
+
+from agents import Agent  # noqa: E402
+
+from app.instructions_loader import compile_coach_instructions  # noqa: E402
+from app.runner import _coach_agent, profile_delete, profile_get, profile_save  # noqa: E402
+
+
+def _uncached() -> Agent:
+    return Agent(
+        name="coach",
+        instructions=compile_coach_instructions().strip(),
+        tools=[profile_get, profile_save, profile_delete],
+    )
+
+
+def _per_call_us(fn: Callable[[], object], iterations: int) -> float:
+    fn()
+    started = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - started) / iterations * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    uncached = _per_call_us(_uncached, args.iterations)
+    cached = _per_call_us(_coach_agent, args.iterations)
+    print(f"uncached: {uncached:9.1f} us/run")
+    print(f"cached:   {cached:9.1f} us/run  ({uncached / cached:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
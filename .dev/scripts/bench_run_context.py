@@ -0,0 +1,77 @@
+"""Run context size and prompt-prefix reuse, old JSON dump vs the context builder.
+
+Simulates a workout: one set logged between consecutive runs. "old" is the
+previous `Context (JSON):` dump of the whole payload; "builder" is
+`context_builder.build_run_input`. For each run it reports the context tokens
+and how much of the prompt (after the instructions) is identical to the
+previous run's, which is what a provider prompt cache can reuse.
+
+    python .dev/scripts/bench_run_context.py [--sets 300] [--max-tokens 2000]
+
+Needs the agent requirements installed (tiktoken optional).
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+from typing import Any, Dict, List
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "services", "agent"))
+
+from app.context_builder import build_run_input, count_tokens  # noqa: E402
+
+
+def _old(context: Dict[str, Any], message: str) -> str:
+    return "Context (JSON):\n" + json.dumps(context, ensure_ascii=False) + "\n\n" + message
+
+
+def _context(sets: List[Dict[str, Any]]) -> Dict[str, Any]:
+    return {
+        "ui": {"page": "workout", "selected": len(sets) % 3},
+        "state": {
+            "workout": {"active": {"id": "w1", "startedAt": "2026-10-17T08:00:00Z"}, "sets": list(sets)},
+            "plan": {"days": [{"day": d, "exercises": ["squat", "bench", "row", "press"]} for d in range(4)]},
+            "profile": {"first_name": "Ann", "goals": "strength", "experience": "intermediate", "days": 4},
+            "chat": {"messages": []},
+        },
+    }
+
+
+def _shared_tokens(a: str, b: str) -> int:
+    return count_tokens(os.path.commonprefix([a, b]))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sets", type=int, default=300)
+    parser.add_argument("--max-tokens", type=int, default=2000)
+    args = parser.parse_args()
+
+    exercises = ["squat", "bench", "row", "press"]
+    sets: List[Dict[str, Any]] = []
+    totals = {"old": [0, 0], "builder": [0, 0]}  # [context tokens, shared prefix tokens]
+    previous = {"old": "", "builder": ""}
+    for i in range(args.sets):
+        sets.append({"exercise": exercises[i % 4], "reps": 5, "weight": 60 + i % 40, "rpe": 8})
+        context = _context(sets)
+        texts = {
+            "old": _old(context, "next set?"),
+            "builder": build_run_input(context, "next set?", max_tokens=args.max_tokens).text,
+        }
+        for name, text in texts.items():
+            totals[name][0] += count_tokens(text)
+            totals[name][1] += _shared_tokens(previous[name], text)
+            previous[name] = text
+
+    for name, (tokens, shared) in totals.items():
+        print(
+            f"{name:8} {tokens / args.sets:8.0f} tokens/run  "
+            f"{shared / args.sets:8.0f} shared with the previous run ({shared / tokens:.0%})"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""Compare JSON and MessagePack framing for /realtime.
+
+Reports encoded size and encode/decode CPU per frame for a few representative
+frames: a streamed text chunk, a tool result and a staged run with a full
+context snapshot.
+
+    python .dev/scripts/bench_ws_codec.py [--iterations 20000]
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+from typing import Any, Callable, Dict
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "services", "api"))
+
+from app.ws_codec import JSON_CODEC, decode_frame, negotiate_codec  # noqa: E402
+
+
+def _snapshot() -> Dict[str, Any]:
+    sessions = [
+        {
+            "id": f"session-{i}",
+            "date": f"2026-01-{(i % 28) + 1:02d}",
+            "exercises": [
+                {
+                    "name": name,
+                    "sets": [{"reps": 8 + s, "weight": 60.0 + 2.5 * s, "rpe": 7.5} for s in range(4)],
+                }
+                for name in ("squat", "bench press", "deadlift", "row")
+            ],
+        }
+        for i in range(12)
+    ]
+    return {
+        "profile": {"name": "Athlete", "goals": ["strength", "hypertrophy"], "experience": "intermediate"},
+        "sessions": sessions,
+        "notes": ["Left knee feels better this week."] * 5,
+    }
+
+
+FRAMES: Dict[str, Dict[str, Any]] = {
+    "text_chunk": {
+        "type": "TEXT_MESSAGE_CHUNK",
+        "threadId": "thread-1",
+        "runId": "run-1",
+        "messageId": "msg_0123456789",
+        "role": "assistant",
+        "delta": "Let's keep the volume ",
+    },
+    "tool_result": {
+        "type": "TOOL_CALL_RESULT",
+        "threadId": "thread-1",
+        "runId": "run-1",
+        "toolCallId": "call_0123456789",
+        "result": {"ok": True, "rows": [{"id": i, "value": i * 1.5} for i in range(20)]},
+    },
+    "run_staged": {
+        "type": "RUN_STAGED",
+        "threadId": "thread-1",
+        "runId": "run-1",
+        "payload": {"message": "Plan next week", "context": {"snapshot": _snapshot()}},
+    },
+}
+
+
+def _per_call_us(fn: Callable[[], Any], iterations: int) -> float:
+    started = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - started) / iterations * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--iterations", type=int, default=20000)
+    args = parser.parse_args()
+
+    msgpack_codec = negotiate_codec("msgpack")
+    if msgpack_codec is JSON_CODEC:
+        raise SystemExit("msgpack is not installed")
+
+    print(f"{'frame':<12} {'codec':<8} {'bytes':>8} {'encode us':>10} {'decode us':>10}")
+    for name, payload in FRAMES.items():
+        for codec in (JSON_CODEC, msgpack_codec):
+            data = codec.encode(payload)
+            size = len(data) if isinstance(data, bytes) else len(data.encode("utf-8"))
+            enc = _per_call_us(lambda: codec.encode(payload), args.iterations)
+            dec = _per_call_us(lambda: decode_frame(data), args.iterations)
+            print(f"{name:<12} {codec.name:<8} {size:>8} {enc:>10.2f} {dec:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
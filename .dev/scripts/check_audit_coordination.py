@@ -0,0 +1,134 @@
+"""Two-worker check of the Postgres audit coordinator against a local database.
+
+Runs two `PostgresAuditCoordinator`s, each with its own engine and LISTEN
+connection (standing in for two uvicorn workers). Worker A owns an audit run
+(it holds the websocket); worker B serves the agent's tool approval request
+and receives the stage decision. A third coordinator with a short session TTL
+checks that sweeping a run releases the tool approvals waiting on it.
+
+    DATABASE_URL=postgresql://postgres@localhost:5432/trainer \\
+        python .dev/scripts/check_audit_coordination.py
+
+Needs the API requirements and a migrated database. Creates and removes a
+throwaway user.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import sys
+import uuid
+from typing import Any, Dict, List, Optional
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "services", "api"))
+
+from sqlalchemy import text  # noqa: E402
+
+from app.audit.coordinator import AuditLimits, AuditPolicy, StageDecision, ToolDecision  # noqa: E402
+from app.audit.pg_coordinator import PostgresAuditCoordinator  # noqa: E402
+from app.db import create_engine, create_sessionmaker, listen_database_url  # noqa: E402
+
+
+async def _worker(limits: Optional[AuditLimits] = None) -> PostgresAuditCoordinator:
+    coordinator = PostgresAuditCoordinator(
+        sessionmaker=create_sessionmaker(create_engine()),
+        dsn=listen_database_url(),
+        limits=limits,
+    )
+    await coordinator.start()
+    return coordinator
+
+
+async def main() -> None:
+    engine = create_engine()
+    user_id = uuid.uuid4()
+    async with engine.begin() as conn:
+        await conn.execute(
+            text("INSERT INTO users (id, provider, provider_subject) VALUES (:id, 'local', :sub)"),
+            {"id": user_id, "sub": f"audit-check-{user_id}"},
+        )
+
+    worker_a = await _worker()
+    worker_b = await _worker()
+    worker_c = await _worker(AuditLimits(session_ttl_seconds=0.5))
+    thread_id, run_id = "audit-check", str(uuid.uuid4())
+    client_frames: List[Dict[str, Any]] = []
+
+    async def client_send(frame: Dict[str, Any]) -> None:
+        client_frames.append(frame)
+
+    try:
+        session = await worker_a.start_run(
+            user_id=user_id,
+            thread_id=thread_id,
+            run_id=run_id,
+            send_json=client_send,
+            policy=AuditPolicy(),
+        )
+
+        # The stage decision arrives on worker B (e.g. the client reconnected there).
+        assert await worker_b.resolve_stage(
+            user_id=user_id, thread_id=thread_id, run_id=run_id, decision=StageDecision(approved=True)
+        )
+        stage = await asyncio.wait_for(session.stage_future, timeout=5)
+        assert stage.approved
+        print("stage decision: worker B -> worker A ok")
+
+        # The agent's tool approval request lands on worker B.
+        remote = await worker_b.get_run(user_id=user_id, thread_id=thread_id, run_id=run_id)
+        assert remote is not None
+        await remote.send_json({"type": "TOOL_CALL_PROPOSED", "runId": run_id, "toolCallId": "call-1"})
+        waiting = asyncio.create_task(
+            worker_b.await_tool_decision(user_id=user_id, thread_id=thread_id, run_id=run_id, tool_call_id="call-1")
+        )
+        for _ in range(50):
+            if client_frames:
+                break
+            await asyncio.sleep(0.1)
+        assert client_frames and client_frames[0]["type"] == "TOOL_CALL_PROPOSED", client_frames
+        print("frame relay: worker B -> worker A's websocket ok")
+
+        # The client approves on worker A's websocket.
+        assert await worker_a.resolve_tool(
+            user_id=user_id,
+            thread_id=thread_id,
+            run_id=run_id,
+            tool_call_id="call-1",
+            decision=ToolDecision(approved=True, args_override={"x": 1}),
+        )
+        decision = await asyncio.wait_for(waiting, timeout=5)
+        assert decision is not None and decision.approved and decision.args_override == {"x": 1}
+        print("tool decision: worker A -> worker B ok")
+
+        await worker_a.end_run(user_id=user_id, thread_id=thread_id, run_id=run_id)
+        assert await worker_b.get_run(user_id=user_id, thread_id=thread_id, run_id=run_id) is None
+        print("end_run cleanup ok")
+
+        # A swept run must not leave the agent's tool approval request hanging.
+        evicted_run = str(uuid.uuid4())
+        await worker_c.start_run(
+            user_id=user_id, thread_id=thread_id, run_id=evicted_run, send_json=client_send, policy=AuditPolicy()
+        )
+        waiting = asyncio.create_task(
+            worker_c.await_tool_decision(
+                user_id=user_id, thread_id=thread_id, run_id=evicted_run, tool_call_id="call-2"
+            )
+        )
+        await asyncio.sleep(0.6)
+        assert await worker_c.sweep() == 1
+        decision = await asyncio.wait_for(waiting, timeout=5)
+        assert decision is not None and not decision.approved, decision
+        assert not worker_c._tool_waiters
+        print("eviction releases pending tool approvals ok")
+    finally:
+        await worker_a.aclose()
+        await worker_b.aclose()
+        await worker_c.aclose()
+        async with engine.begin() as conn:
+            await conn.execute(text("DELETE FROM users WHERE id = :id"), {"id": user_id})
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,133 @@
+"""Projections stay complete while a partition is being archived.
+
+Creates a throwaway `events_p200101` partition with events for a throwaway
+user, then runs the archive command on it (with a slowed-down dump) while
+another task keeps loading the user's projection from scratch, writing a
+checkpoint each time. Every load (before, during and after the detach) must
+see each event exactly once, and so must the checkpoint left behind.
+
+    DATABASE_URL=postgresql://postgres@localhost:5432/trainer \\
+        python .dev/scripts/check_event_archival.py
+
+Needs the API requirements and a migrated database with no rows for 2001-01 in
+`events_default`. Cleans up after itself.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import sys
+import tempfile
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import List
+
+_ARCHIVE_DIR = tempfile.mkdtemp(prefix="trainer2-archive-check-")
+os.environ["EVENTS_ARCHIVE_DIR"] = _ARCHIVE_DIR
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "services", "api"))
+
+from sqlalchemy import text  # noqa: E402
+
+from app.commands import archive_events  # noqa: E402
+from app.db import create_engine, create_sessionmaker  # noqa: E402
+from app.repositories.checkpoints_repo import CheckpointsRepository  # noqa: E402
+from app.repositories.events_repo import EventsRepository  # noqa: E402
+from app.services.projections_service import ProjectionsService  # noqa: E402
+
+_PARTITION = "events_p200101"
+_EVENTS = 50
+
+
+async def main() -> None:
+    engine = create_engine()
+    sessionmaker = create_sessionmaker(engine)
+    user_id = uuid.uuid4()
+    start = datetime(2001, 1, 1, tzinfo=timezone.utc)
+
+    async with engine.begin() as conn:
+        await conn.execute(
+            text(
+                f"CREATE TABLE {_PARTITION} PARTITION OF events "
+                "FOR VALUES FROM ('2001-01-01 00:00+00') TO ('2001-02-01 00:00+00')"
+            )
+        )
+        await conn.execute(
+            text("INSERT INTO users (id, provider, provider_subject) VALUES (:id, 'local', :sub)"),
+            {"id": user_id, "sub": f"archive-check-{user_id}"},
+        )
+        for i in range(_EVENTS):
+            await conn.execute(
+                text(
+                    "INSERT INTO events (id, ts, type, user_id, session_id, payload) "
+                    "VALUES (:id, :ts, 'SetLogged', :uid, NULL, CAST(:payload AS jsonb))"
+                ),
+                {"id": uuid.uuid4(), "ts": start + timedelta(hours=i), "uid": user_id, "payload": f'{{"n": {i}}}'},
+            )
+
+    projections = ProjectionsService(
+        events_repo=EventsRepository(),
+        checkpoints_repo=CheckpointsRepository(),
+        checkpoint_every=1,
+        settle_seconds=0,
+    )
+    seen: List[int] = []
+
+    async def load_once(*, from_scratch: bool) -> None:
+        async with sessionmaker() as session:
+            if from_scratch:
+                await session.execute(
+                    text("DELETE FROM projection_checkpoints WHERE user_id = :id"), {"id": user_id}
+                )
+                await session.commit()
+            projection = await projections.load(session, user_id=user_id, session_id=None)
+            await session.commit()
+        sets = [s["n"] for s in projection.state["workout"]["sets"]]
+        assert sets == list(range(_EVENTS)), f"projection saw {len(sets)} events: {sets[:5]}..."
+        assert projection.events_count == _EVENTS, projection.events_count
+        seen.append(len(sets))
+
+    # Stand-in for a large partition: keep the dump running long enough for
+    # loads to land in the middle of it.
+    dump = archive_events._dump
+
+    async def slow_dump(*args, **kwargs):
+        count = await dump(*args, **kwargs)
+        await asyncio.sleep(1.0)
+        return count
+
+    archive_events._dump = slow_dump
+
+    # Only partitions that ended before February 2001 qualify.
+    now = datetime.now(timezone.utc)
+    older_than = (now.year * 12 + now.month - 1) - (2001 * 12 + 1)
+    archiving = None
+    try:
+        archiving = asyncio.create_task(archive_events._run(older_than, False, 1.0))
+        while not archiving.done():
+            await load_once(from_scratch=True)
+        assert await archiving == 1
+        # Resumes from the checkpoint written by the last load above.
+        await load_once(from_scratch=False)
+
+        async with sessionmaker() as session:
+            remaining = await session.execute(text("SELECT to_regclass(:name)"), {"name": _PARTITION})
+            assert remaining.scalar() is None, "partition was not dropped"
+        print(f"{len(seen)} loads during archival, each saw all {_EVENTS} events once: ok")
+    finally:
+        if archiving is not None and not archiving.done():
+            archiving.cancel()
+            await asyncio.gather(archiving, return_exceptions=True)
+        async with engine.begin() as conn:
+            await conn.execute(text(f"DROP TABLE IF EXISTS {_PARTITION}"))
+            await conn.execute(text("DELETE FROM event_archives WHERE partition_name = :p"), {"p": _PARTITION})
+            await conn.execute(text("DELETE FROM projection_checkpoints WHERE user_id = :id"), {"id": user_id})
+            await conn.execute(text("DELETE FROM users WHERE id = :id"), {"id": user_id})
+        await engine.dispose()
+        for name in os.listdir(_ARCHIVE_DIR):
+            os.remove(os.path.join(_ARCHIVE_DIR, name))
+        os.rmdir(_ARCHIVE_DIR)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
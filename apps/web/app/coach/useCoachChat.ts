@@ -35,6 +35,8 @@ export function useCoachChat({ idToken, wsUrl }: UseCoachChatArgs) {
 
   const runHasToolCallsRef = useRef<boolean>(false);
   const runHasAssistantTextRef = useRef<boolean>(false);
+  // Chunks sharing a messageId are token deltas of one assistant message.
+  const streamingMessageIdRef = useRef<string>("");
 
   useEffect(() => {
     if (!idToken) return;
@@ -65,10 +67,21 @@ export function useCoachChat({ idToken, wsUrl }: UseCoachChatArgs) {
       const evt = parseServerEvent(raw);
       if (!evt) return;
 
+      if (evt.type === "PING") {
+          ws.send(JSON.stringify({ type: "PONG" }));
+          return;
+      }
+
+      if (evt.type === "RUN_QUEUED") {
+          setSubstatus("Queued…");
+          return;
+      }
+
       if (evt.type === "RUN_STARTED") {
           setIsSending(true);
           runHasToolCallsRef.current = false;
           runHasAssistantTextRef.current = false;
+          streamingMessageIdRef.current = "";
           setSubstatus("");
           return;
       }
@@ -77,11 +90,12 @@ export function useCoachChat({ idToken, wsUrl }: UseCoachChatArgs) {
           setIsSending(false);
           runHasToolCallsRef.current = false;
           runHasAssistantTextRef.current = false;
+          streamingMessageIdRef.current = "";
           setSubstatus("");
           return;
       }
 
-      if (evt.type === "RUN_ERROR") {
+      if (evt.type === "RUN_ERROR" || evt.type === "OVERLOADED") {
           setIsSending(false);
           setSubstatus("");
           const msg = typeof evt.message === "string" ? evt.message : "Run failed";
@@ -121,7 +135,16 @@ export function useCoachChat({ idToken, wsUrl }: UseCoachChatArgs) {
           }
 
           runHasAssistantTextRef.current = true;
-          setMessages((prev: ChatMessage[]) => [...prev, { role: "assistant", text: delta }]);
+          const messageId = evt.messageId ?? "";
+          const continues = messageId !== "" && messageId === streamingMessageIdRef.current;
+          streamingMessageIdRef.current = messageId;
+          setMessages((prev: ChatMessage[]) => {
+            const last = prev[prev.length - 1];
+            if (continues && last?.role === "assistant") {
+              return [...prev.slice(0, -1), { ...last, text: last.text + delta }];
+            }
+            return [...prev, { role: "assistant", text: delta }];
+          });
           return;
       }
     };
@@ -43,6 +43,23 @@ export type ServerEvent =
       threadId?: string;
       runId?: string;
     }
+  | {
+      type: "RUN_QUEUED";
+      threadId?: string;
+      runId?: string;
+      position?: number;
+    }
+  | {
+      type: "OVERLOADED";
+      scope?: string;
+      message?: string;
+      threadId?: string;
+      runId?: string;
+    }
+  | {
+      type: "PING";
+      ts?: number;
+    }
   | {
       type: "TOOL_CALL_PROPOSED";
       threadId?: string;
@@ -83,6 +100,7 @@ export type ServerEvent =
   | {
       type: "TEXT_MESSAGE_CHUNK";
       delta: string;
+      messageId?: string;
     }
   | {
       type: "ASSISTANT_DRAFT_PROPOSED";
@@ -122,7 +140,8 @@ export function parseServerEvent(raw: string): ServerEvent | null {
     if (type === "TEXT_MESSAGE_CHUNK") {
       const delta = record.delta;
       if (typeof delta !== "string") return null;
-      return { type, delta };
+      const messageId = typeof record.messageId === "string" ? record.messageId : undefined;
+      return { type, delta, messageId };
     }
 
     if (
@@ -132,6 +151,9 @@ export function parseServerEvent(raw: string): ServerEvent | null {
       type === "RUN_STAGE_DENIED" ||
       type === "RUN_FINISHED" ||
       type === "RUN_ERROR" ||
+      type === "RUN_QUEUED" ||
+      type === "OVERLOADED" ||
+      type === "PING" ||
       type === "TOOL_CALL_PROPOSED" ||
       type === "TOOL_CALL_APPROVED" ||
       type === "TOOL_CALL_DENIED" ||
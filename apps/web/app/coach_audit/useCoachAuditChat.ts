@@ -184,8 +184,18 @@ export function useCoachAuditChat({ idToken, wsUrl }: UseCoachAuditChatArgs) {
       const evt = parseServerEvent(raw);
       if (!evt) return;
 
+      if (evt.type === "PING") {
+        ws.send(JSON.stringify({ type: "PONG" }));
+        return;
+      }
+
       addTimeline(evt.type, summarize(evt));
 
+      if (evt.type === "RUN_QUEUED") {
+        setSubstatus("Queued…");
+        return;
+      }
+
       if (evt.type === "RUN_STARTED") {
         setIsSending(true);
         setSubstatus("");
@@ -204,7 +214,7 @@ export function useCoachAuditChat({ idToken, wsUrl }: UseCoachAuditChatArgs) {
         return;
       }
 
-      if (evt.type === "RUN_ERROR") {
+      if (evt.type === "RUN_ERROR" || evt.type === "OVERLOADED") {
         setIsSending(false);
         setSubstatus("");
         const msg = typeof evt.message === "string" ? evt.message : "Run failed";
@@ -450,7 +460,7 @@ export function useCoachAuditChat({ idToken, wsUrl }: UseCoachAuditChatArgs) {
 }
 
 function summarize(evt: ServerEvent): string {
-  if (evt.type === "RUN_ERROR") return typeof evt.message === "string" ? evt.message : "";
+  if (evt.type === "RUN_ERROR" || evt.type === "OVERLOADED") return typeof evt.message === "string" ? evt.message : "";
   if (evt.type === "TOOL_CALL_PROPOSED") {
     const name = typeof evt.toolName === "string" ? evt.toolName : "";
     return name ? `(${name})` : "";
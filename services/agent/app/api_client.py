@@ -0,0 +1,206 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+import httpx
+
+from .metrics import api_http_retries_total, tool_call_phase_seconds
+
+logger = logging.getLogger("trainer2.agent.api_client")
+
+# Gateway errors: the API did not handle the request (or we cannot tell).
+_RETRY_STATUSES = frozenset({502, 503, 504})
+_RETRY_BACKOFF_SECONDS = 0.1
+
+
+def _env_int(name: str, default: int) -> int:
+    return int(os.getenv(name, str(default)) or default)
+
+
+def api_http_limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=_env_int("API_HTTP_MAX_CONNECTIONS", 100),
+        max_keepalive_connections=_env_int("API_HTTP_MAX_KEEPALIVE_CONNECTIONS", 20),
+        keepalive_expiry=float(os.getenv("API_HTTP_KEEPALIVE_EXPIRY_SECONDS", "30") or 30),
+    )
+
+
+def http2_enabled() -> bool:
+    if os.getenv("API_HTTP2", "0").strip().lower() not in ("1", "true", "yes"):
+        return False
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        logger.warning("API_HTTP2 is set but the h2 package is missing; using HTTP/1.1")
+        return False
+    return True
+
+
+@dataclass
+class ToolCallTimings:
+    """Per tool call: time spent opening connections (TCP + TLS), summed over its requests."""
+
+    tool: str
+    connect_seconds: float = 0.0
+
+    def observe(self, phase: str, seconds: float) -> None:
+        tool_call_phase_seconds.labels(tool=self.tool, phase=phase).observe(seconds)
+
+    def observe_server_timing(self, header: str) -> None:
+        """Record the phases the API reports as `Server-Timing: preflight;dur=12.3, execute;dur=4.5` (ms)."""
+
+        for metric in header.split(","):
+            name, _, params = metric.strip().partition(";")
+            for param in params.split(";"):
+                key, _, value = param.strip().partition("=")
+                if key == "dur" and name in ("preflight", "execute"):
+                    try:
+                        self.observe(name, float(value) / 1000.0)
+                    except ValueError:
+                        pass
+
+
+class ApiClient:
+    """Client for the API's internal endpoints, used by tool calls and the
+    capabilities sync.
+
+    Share one instance per process (see `init_api_client`): the underlying
+    `httpx.AsyncClient` keeps keep-alive connections to the API, so a tool
+    call's single `/internal/tools/invoke` request (approval check and
+    execution together) does not pay connection setup.
+
+    Retries are idempotency-aware. A request that never reached the API
+    (connect or pool errors) is retried whatever it is; one that may have
+    been handled (read errors, 502/503/504) only when `idempotent`.
+    """
+
+    def __init__(self, *, http: httpx.AsyncClient, retries: int = 2):
+        self._http = http
+        self._retries = max(0, retries)
+
+    async def post(
+        self,
+        url: str,
+        *,
+        payload: Dict[str, Any],
+        headers: Dict[str, str],
+        timeout: httpx.Timeout,
+        idempotent: bool,
+        timings: Optional[ToolCallTimings] = None,
+        endpoint: str = "",
+    ) -> httpx.Response:
+        """POST with retries (see the class docstring); raises for non-2xx answers."""
+
+        resp = await self._request(
+            "POST",
+            url,
+            payload=payload,
+            headers=headers,
+            timeout=timeout,
+            idempotent=idempotent,
+            timings=timings,
+            endpoint=endpoint,
+        )
+        resp.raise_for_status()
+        return resp
+
+    async def get(
+        self,
+        url: str,
+        *,
+        headers: Dict[str, str],
+        timeout: httpx.Timeout,
+        endpoint: str = "",
+    ) -> httpx.Response:
+        """GET (always retried); raises for 4xx/5xx, so 304 comes back as a response."""
+
+        resp = await self._request("GET", url, headers=headers, timeout=timeout, idempotent=True, endpoint=endpoint)
+        if resp.is_error:
+            resp.raise_for_status()
+        return resp
+
+    async def _request(
+        self,
+        method: str,
+        url: str,
+        *,
+        headers: Dict[str, str],
+        timeout: httpx.Timeout,
+        idempotent: bool,
+        payload: Optional[Dict[str, Any]] = None,
+        timings: Optional[ToolCallTimings] = None,
+        endpoint: str = "",
+    ) -> httpx.Response:
+        connect_started: Dict[str, float] = {}
+
+        async def trace(name: str, info: Dict[str, Any]) -> None:
+            if timings is None or not name.startswith(("connection.connect_tcp.", "connection.start_tls.")):
+                return
+            step = name.rsplit(".", 1)[0]
+            if name.endswith(".started"):
+                connect_started[step] = time.perf_counter()
+            elif step in connect_started:
+                timings.connect_seconds += time.perf_counter() - connect_started.pop(step)
+
+        attempt = 0
+        while True:
+            try:
+                resp = await self._http.request(
+                    method,
+                    url,
+                    json=payload,
+                    headers=headers,
+                    timeout=timeout,
+                    extensions={"trace": trace},
+                )
+                if not (idempotent and resp.status_code in _RETRY_STATUSES and attempt < self._retries):
+                    return resp
+            except (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout):
+                if attempt >= self._retries:
+                    raise
+            except httpx.TransportError:
+                if not idempotent or attempt >= self._retries:
+                    raise
+            attempt += 1
+            api_http_retries_total.labels(endpoint=endpoint or url).inc()
+            await asyncio.sleep(_RETRY_BACKOFF_SECONDS * 2 ** (attempt - 1))
+
+    async def aclose(self) -> None:
+        await self._http.aclose()
+
+
+def _new_api_client() -> ApiClient:
+    limits = api_http_limits()
+    http2 = http2_enabled()
+    http = httpx.AsyncClient(limits=limits, http2=http2)
+    logger.info("api client initialized", extra={"maxConnections": limits.max_connections, "http2": http2})
+    return ApiClient(http=http, retries=_env_int("API_HTTP_RETRIES", 2))
+
+
+_client: Optional[ApiClient] = None
+
+
+async def init_api_client() -> None:
+    global _client
+    if _client is None:
+        _client = _new_api_client()
+
+
+async def close_api_client() -> None:
+    global _client
+    client, _client = _client, None
+    if client is not None:
+        await client.aclose()
+
+
+def get_api_client() -> ApiClient:
+    # Created on first use when the app lifecycle did not (e.g. scripts).
+    global _client
+    if _client is None:
+        _client = _new_api_client()
+    return _client
@@ -1,16 +1,29 @@
 from __future__ import annotations
 
+import asyncio
 import base64
 import json
+import logging
 import os
 import shutil
 import tempfile
+import threading
 import time
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional, Tuple
 
 import httpx
 import jwt
+from cryptography.hazmat.primitives.serialization import load_pem_private_key
+
+from .api_client import get_api_client
+from .metrics import capabilities_refresh_total
+
+logger = logging.getLogger("trainer2.agent.capabilities")
+
+# Agent tokens live 60s and are reused until this close to expiry.
+_TOKEN_LIFETIME_SECONDS = 60
+_TOKEN_REFRESH_MARGIN_SECONDS = 15
 
 
 def _agent_private_key() -> str:
@@ -36,20 +49,65 @@ def _capabilities_dir() -> Path:
     return Path(__file__).parent / "generated"
 
 
+class AgentTokenSigner:
+    """Signs agent JWTs, reusing one until shortly before it expires.
+
+    The private key is decoded and parsed once per configured value (the env
+    vars are re-read so a rotated key takes effect on the next token).
+    """
+
+    def __init__(
+        self,
+        *,
+        lifetime_seconds: int = _TOKEN_LIFETIME_SECONDS,
+        refresh_margin_seconds: int = _TOKEN_REFRESH_MARGIN_SECONDS,
+    ) -> None:
+        self._lifetime_seconds = lifetime_seconds
+        self._refresh_margin_seconds = min(refresh_margin_seconds, lifetime_seconds - 1)
+        self._lock = threading.Lock()
+        # (raw env values, parsed key)
+        self._key: Optional[Tuple[Tuple[str, str], Any]] = None
+        # (token, exp, raw env values it was signed with)
+        self._token: Optional[Tuple[str, int, Tuple[str, str]]] = None
+
+    def _private_key(self, raw: Tuple[str, str]) -> Any:
+        if self._key is None or self._key[0] != raw:
+            pem = _agent_private_key()
+            self._key = (raw, load_pem_private_key(pem.encode("utf-8"), password=None))
+        return self._key[1]
+
+    def token(self) -> str:
+        raw = (os.getenv("AGENT_PRIVATE_KEY_B64", ""), os.getenv("AGENT_PRIVATE_KEY", ""))
+        now = int(time.time())
+        cached = self._token
+        if cached is not None and cached[2] == raw and now < cached[1] - self._refresh_margin_seconds:
+            return cached[0]
+
+        with self._lock:
+            cached = self._token
+            if cached is not None and cached[2] == raw and now < cached[1] - self._refresh_margin_seconds:
+                return cached[0]
+            exp = now + self._lifetime_seconds
+            token = jwt.encode(
+                {
+                    "iss": "trainer2-agent",
+                    "aud": "trainer2-api",
+                    "iat": now,
+                    "exp": exp,
+                },
+                self._private_key(raw),
+                algorithm="RS256",
+            )
+            # pyjwt returns str for RS256
+            self._token = (token, exp, raw)
+            return token
+
+
+_signer = AgentTokenSigner()
+
+
 def _sign_agent_jwt() -> str:
-    now = int(time.time())
-    token = jwt.encode(
-        {
-            "iss": "trainer2-agent",
-            "aud": "trainer2-api",
-            "iat": now,
-            "exp": now + 60,
-        },
-        _agent_private_key(),
-        algorithm="RS256",
-    )
-    # pyjwt returns str for RS256
-    return token
+    return _signer.token()
 
 
 def _atomic_replace_dir(target: Path, source: Path) -> None:
@@ -89,7 +147,18 @@ def _write_text(path: Path, text: str) -> None:
     path.write_text(text, encoding="utf-8")
 
 
-async def update_capabilities() -> Dict[str, Any]:
+def _generated_sha256() -> Optional[str]:
+    """Content hash of the capabilities currently on disk (from generated/index.json)."""
+
+    try:
+        index = json.loads((_capabilities_dir() / "index.json").read_text(encoding="utf-8"))
+    except Exception:
+        return None
+    sha256 = index.get("sha256") if isinstance(index, dict) else None
+    return sha256 if isinstance(sha256, str) and sha256 else None
+
+
+async def update_capabilities(*, force: bool = False) -> Dict[str, Any]:
     """Fetch /capabilities from the API and materialize it into auditable files.
 
     Output layout:
@@ -98,18 +167,36 @@ async def update_capabilities() -> Dict[str, Any]:
         tools/<name>.json
         table_cards/<id>.md
         raw/capabilities.json
+
+    The request carries the on-disk content hash as `If-None-Match`; when the
+    API's document is the same (304, or an equal `sha256`) nothing is written
+    and the compiled instructions stay cached. `force` rewrites regardless.
     """
 
     api = _api_base_url()
     token = _sign_agent_jwt()
+    current = None if force else _generated_sha256()
+
+    headers = {"Authorization": f"Bearer {token}"}
+    if current:
+        headers["If-None-Match"] = f'"{current}"'
+    # The pooled, retrying client the tool calls use: the refresh loop reuses
+    # its keep-alive connections instead of opening new ones every interval.
+    resp = await get_api_client().get(
+        f"{api}/capabilities",
+        headers=headers,
+        timeout=httpx.Timeout(10.0),
+        endpoint="/capabilities",
+    )
+    if resp.status_code == 304 and current:
+        capabilities_refresh_total.labels(result="unchanged").inc()
+        return {"ok": True, "sha256": current, "changed": False}
+    resp.raise_for_status()
+    caps: Dict[str, Any] = resp.json()
 
-    async with httpx.AsyncClient(timeout=10.0) as http:
-        resp = await http.get(
-            f"{api}/capabilities",
-            headers={"Authorization": f"Bearer {token}"},
-        )
-        resp.raise_for_status()
-        caps: Dict[str, Any] = resp.json()
+    if current and caps.get("sha256") == current:
+        capabilities_refresh_total.labels(result="unchanged").inc()
+        return {"ok": True, "sha256": current, "changed": False}
 
     tmp_root = Path(tempfile.mkdtemp(prefix="trainer2-capabilities-"))
     try:
@@ -168,7 +255,55 @@ async def update_capabilities() -> Dict[str, Any]:
         if tmp_root.exists():
             shutil.rmtree(tmp_root, ignore_errors=True)
 
-    return {"ok": True, "sha256": caps.get("sha256")}
+    # Imported here: instructions_loader imports this module.
+    from .instructions_loader import invalidate_coach_instructions
+
+    invalidate_coach_instructions()
+
+    capabilities_refresh_total.labels(result="changed").inc()
+    logger.info("capabilities updated", extra={"sha256": caps.get("sha256")})
+    return {"ok": True, "sha256": caps.get("sha256"), "changed": True}
+
+
+_refresh_task: Optional["asyncio.Task[None]"] = None
+
+
+def _refresh_interval_seconds() -> float:
+    return float(os.getenv("AGENT_CAPABILITIES_REFRESH_SECONDS", "60") or 0)
+
+
+async def _refresh_loop(interval_seconds: float) -> None:
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            await update_capabilities()
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            capabilities_refresh_total.labels(result="error").inc()
+            logger.warning("capabilities refresh failed", exc_info=True)
+
+
+def start_capabilities_refresh() -> None:
+    """Re-sync capabilities every AGENT_CAPABILITIES_REFRESH_SECONDS (default 60; 0 disables)."""
+
+    global _refresh_task
+    interval = _refresh_interval_seconds()
+    if interval <= 0 or _refresh_task is not None:
+        return
+    _refresh_task = asyncio.create_task(_refresh_loop(interval), name="capabilities-refresh")
+
+
+async def stop_capabilities_refresh() -> None:
+    global _refresh_task
+    task, _refresh_task = _refresh_task, None
+    if task is None:
+        return
+    task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
 
 
 def load_tools_from_generated() -> List[Dict[str, Any]]:
@@ -0,0 +1,158 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+try:
+    import tiktoken
+except ImportError:  # optional: token counts fall back to a character estimate
+    tiktoken = None
+
+logger = logging.getLogger("trainer2.agent.context")
+
+# Sections in prompt order: rarely changing ones first so consecutive runs share
+# a cacheable prompt prefix (the coach instructions precede all of them).
+_STABLE_SECTIONS = ("profile", "plan")
+# Lists trimmed oldest-first when over budget, in the order they give way.
+_TRIMMABLE_LISTS: Tuple[Tuple[str, str], ...] = (("chat", "messages"), ("workout", "sets"))
+
+_encoder: Any = None
+_encoder_failed = False
+
+
+def _count_tokens_estimate(text: str) -> int:
+    return (len(text) + 3) // 4
+
+
+def count_tokens(text: str) -> int:
+    """Prompt tokens of `text` (tiktoken's o200k_base when available, else about 4 chars/token)."""
+
+    global _encoder, _encoder_failed
+    if _encoder is None and not _encoder_failed and tiktoken is not None:
+        try:
+            _encoder = tiktoken.get_encoding(os.getenv("AGENT_CONTEXT_TOKEN_ENCODING", "o200k_base"))
+        except Exception:
+            _encoder_failed = True
+            logger.warning("tiktoken encoding unavailable; estimating context tokens", exc_info=True)
+    if _encoder is None:
+        return _count_tokens_estimate(text)
+    return len(_encoder.encode(text, disallowed_special=()))
+
+
+def _canonical(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False, sort_keys=True, separators=(",", ":"), default=str)
+
+
+def _max_tokens() -> int:
+    return int(os.getenv("AGENT_CONTEXT_MAX_TOKENS", "2000") or 2000)
+
+
+@dataclass(frozen=True)
+class RunInput:
+    text: str
+    # Tokens of the context part of `text` (the user message excluded).
+    context_tokens: int
+    trimmed: bool
+
+
+def _sections(context: Dict[str, Any]) -> List[Tuple[str, Any]]:
+    """(name, value) pairs in prompt order, empty ones left out."""
+
+    state = context.get("state") if isinstance(context.get("state"), dict) else {}
+    ordered: List[Tuple[str, Any]] = [(name, state.get(name)) for name in _STABLE_SECTIONS]
+    ordered += [(name, state[name]) for name in sorted(state) if name not in _STABLE_SECTIONS]
+    # The UI context changes with every page; it goes last. Other top-level keys
+    # (e.g. an edited audit payload) go before it.
+    ordered += [(name, context[name]) for name in sorted(context) if name not in ("state", "ui")]
+    ordered.append(("ui", context.get("ui")))
+    return [(name, value) for name, value in ordered if value not in (None, {}, [], "")]
+
+
+def _render(sections: List[Tuple[str, Any]]) -> str:
+    if not sections:
+        return ""
+    body = "".join(f"{name}: {_canonical(value)}\n" for name, value in sections)
+    return "Context (JSON per section, stable first):\n" + body + "\n"
+
+
+def _trim_lists(
+    sections: List[Tuple[str, Any]], *, budget: int, counter: Callable[[str], int]
+) -> List[Tuple[str, Any]]:
+    """Keep the newest items of the trimmable lists that fit in `budget`.
+
+    Dropped items are replaced by a count next to the list (`<list>Omitted`).
+    """
+
+    by_name = dict(sections)
+    lists = [
+        (section, key)
+        for section, key in _TRIMMABLE_LISTS
+        if isinstance(by_name.get(section), dict) and isinstance(by_name[section].get(key), list)
+    ]
+    if not lists:
+        return sections
+
+    # Tokens of everything except the list items, counting the omission notes.
+    trimmed = {section: dict(by_name[section]) for section, _ in lists}
+    for section, key in lists:
+        trimmed[section][key] = []
+        trimmed[section][f"{key}Omitted"] = len(by_name[section][key])
+    skeleton = [(name, trimmed.get(name, value)) for name, value in sections]
+    available = budget - counter(_render(skeleton))
+
+    # Newest first, taking from the lists that give way last.
+    for section, key in reversed(lists):
+        items = by_name[section][key]
+        kept = 0
+        for item in reversed(items):
+            cost = counter(_canonical(item)) + 1
+            if cost > available:
+                break
+            available -= cost
+            kept += 1
+        trimmed[section][key] = items[len(items) - kept :] if kept else []
+        omitted = len(items) - kept
+        if omitted:
+            trimmed[section][f"{key}Omitted"] = omitted
+        else:
+            del trimmed[section][f"{key}Omitted"]
+    return [(name, trimmed.get(name, value)) for name, value in sections]
+
+
+def build_run_input(
+    context: Optional[Dict[str, Any]],
+    message: str,
+    *,
+    max_tokens: Optional[int] = None,
+    counter: Callable[[str], int] = count_tokens,
+) -> RunInput:
+    """The model input for a run: the context, then the user message.
+
+    Sections are canonical JSON (sorted keys, no whitespace) in a fixed order,
+    stable ones first. Over `max_tokens` (AGENT_CONTEXT_MAX_TOKENS), the oldest
+    chat messages and logged sets are dropped first, then volatile sections
+    from the end; the profile and plan are always kept.
+    """
+
+    message = message.strip()
+    if not context or not isinstance(context, dict):
+        return RunInput(text=message, context_tokens=0, trimmed=False)
+
+    budget = _max_tokens() if max_tokens is None else max_tokens
+    sections = _sections(context)
+    text = _render(sections)
+    tokens = counter(text)
+    if budget <= 0 or tokens <= budget:
+        return RunInput(text=text + message, context_tokens=tokens, trimmed=False)
+
+    sections = _trim_lists(sections, budget=budget, counter=counter)
+    text = _render(sections)
+    tokens = counter(text)
+    while tokens > budget and len(sections) > 0 and sections[-1][0] not in _STABLE_SECTIONS:
+        sections = sections[:-1]
+        text = _render(sections)
+        tokens = counter(text)
+    return RunInput(text=text + message, context_tokens=tokens, trimmed=True)
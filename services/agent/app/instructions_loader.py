@@ -1,10 +1,18 @@
 from __future__ import annotations
 
+import asyncio
+import hashlib
 import json
+import os
+import threading
+import time
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional, Tuple
 
-from app.capabilities_sync import load_tools_from_generated
+from .capabilities_sync import _capabilities_dir, load_tools_from_generated
+
+_Signature = Tuple[Tuple[str, int, int], ...]
 
 
 def _instructions_root() -> Path:
@@ -61,3 +69,108 @@ def compile_coach_instructions() -> str:
         + _table_cards_block()
         + "\n"
     )
+
+
+@dataclass(frozen=True)
+class CompiledInstructions:
+    text: str
+    # Content hash of the instruction and generated files the text was built from.
+    sha256: str
+
+
+def _check_interval_seconds() -> float:
+    return float(os.getenv("AGENT_INSTRUCTIONS_CHECK_SECONDS", "2") or 2)
+
+
+_cache_lock = threading.Lock()
+_cached: Optional[Tuple[_Signature, CompiledInstructions]] = None
+_checked_at = 0.0
+
+
+def _stat_signature() -> _Signature:
+    """(path, mtime_ns, size) of every instruction and generated file."""
+
+    signature: List[Tuple[str, int, int]] = []
+    pending = [str(_instructions_root()), str(_capabilities_dir())]
+    while pending:
+        try:
+            entries = list(os.scandir(pending.pop()))
+        except FileNotFoundError:
+            continue
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    pending.append(entry.path)
+                elif entry.is_file():
+                    st = entry.stat()
+                    signature.append((entry.path, st.st_mtime_ns, st.st_size))
+            except FileNotFoundError:
+                continue
+    return tuple(sorted(signature))
+
+
+def _content_sha256(signature: _Signature) -> str:
+    digest = hashlib.sha256()
+    for path, _mtime, _size in signature:
+        try:
+            data = Path(path).read_bytes()
+        except FileNotFoundError:
+            continue
+        digest.update(path.encode("utf-8") + b"\0")
+        digest.update(hashlib.sha256(data).digest())
+    return digest.hexdigest()
+
+
+def coach_instructions() -> CompiledInstructions:
+    """Compiled coach instructions, rebuilt only when their sources change.
+
+    Source files are stat'ed at most every AGENT_INSTRUCTIONS_CHECK_SECONDS;
+    the content hash is recomputed only when a file's mtime or size moved, and
+    the text is recompiled only when that hash differs from the cached one.
+    `update_capabilities()` drops the cache right away.
+    """
+
+    global _cached, _checked_at
+    now = time.monotonic()
+    fresh = _fresh_cached(now)
+    if fresh is not None:
+        return fresh
+
+    with _cache_lock:
+        signature = _stat_signature()
+        cached = _cached
+        if cached is None or cached[0] != signature:
+            sha256 = _content_sha256(signature)
+            if cached is not None and cached[1].sha256 == sha256:
+                compiled = cached[1]
+            else:
+                compiled = CompiledInstructions(text=compile_coach_instructions(), sha256=sha256)
+            cached = (signature, compiled)
+            _cached = cached
+        _checked_at = now
+        return cached[1]
+
+
+async def acoach_instructions() -> CompiledInstructions:
+    """`coach_instructions` for the event loop: a fresh cached value is returned
+    directly; when a check is due, the stat calls, reads and compile run in a
+    worker thread.
+    """
+
+    fresh = _fresh_cached(time.monotonic())
+    if fresh is not None:
+        return fresh
+    return await asyncio.to_thread(coach_instructions)
+
+
+def _fresh_cached(now: float) -> Optional[CompiledInstructions]:
+    cached = _cached
+    if cached is not None and now - _checked_at < _check_interval_seconds():
+        return cached[1]
+    return None
+
+
+def invalidate_coach_instructions() -> None:
+    global _cached
+    with _cache_lock:
+        _cached = None
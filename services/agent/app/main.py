@@ -8,10 +8,11 @@ from prometheus_client import CONTENT_TYPE_LATEST, Counter, Histogram, generate_
 from starlette.responses import Response
 from starlette.responses import StreamingResponse
 
-from app.capabilities_sync import update_capabilities
-from app.observability import setup_observability
-from app.runner import run_stream
-from app.schemas import RunRequest
+from .api_client import close_api_client, init_api_client
+from .capabilities_sync import start_capabilities_refresh, stop_capabilities_refresh, update_capabilities
+from .observability import setup_observability
+from .runner import run_stream
+from .schemas import RunRequest
 
 import agents.tracing as agents_tracing
 
@@ -21,15 +22,31 @@ setup_observability(app, os.getenv("OTEL_SERVICE_NAME", "trainer2-agent"))
 
 logger = logging.getLogger("trainer2.agent")
 
+# Defined here rather than in app.metrics: the API registers the same names and
+# imports the agent's modules (but not this one) in embedded mode.
+http_requests_total = Counter(
+    "http_requests_total",
+    "Total HTTP requests",
+    labelnames=["method", "path", "status"],
+)
+http_request_duration_seconds = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request duration (seconds)",
+    labelnames=["method", "path"],
+)
+
 
 @app.on_event("startup")
 async def _startup() -> None:
+    await init_api_client()
+
     # Best-effort: materialize API tool surface into auditable files.
     if os.getenv("AGENT_PRIVATE_KEY", "").strip() or os.getenv("AGENT_PRIVATE_KEY_B64", "").strip():
         try:
             await update_capabilities()
         except Exception:
             logger.exception("capabilities_update_failed")
+        start_capabilities_refresh()
 
     # OpenAI Agents SDK tracing -> OpenAI dashboard.
     if os.getenv("OPENAI_AGENTS_DISABLE_TRACING", "0").strip() not in ("1", "true", "True"):
@@ -40,17 +57,11 @@ async def _startup() -> None:
             except Exception:
                 logger.exception("agents_tracing_setup_failed")
 
-http_requests_total = Counter(
-    "http_requests_total",
-    "Total HTTP requests",
-    labelnames=["method", "path", "status"],
-)
-http_request_duration_seconds = Histogram(
-    "http_request_duration_seconds",
-    "HTTP request duration (seconds)",
-    labelnames=["method", "path"],
-)
 
+@app.on_event("shutdown")
+async def _shutdown() -> None:
+    await stop_capabilities_refresh()
+    await close_api_client()
 
 
 @app.get("/health")
@@ -59,9 +70,9 @@ def health() -> dict:
 
 
 @app.post("/update")
-async def update() -> dict:
+async def update(force: bool = False) -> dict:
     # Developer ergonomics: fetch API surface and materialize to files.
-    return await update_capabilities()
+    return await update_capabilities(force=force)
 
 
 @app.get("/metrics")
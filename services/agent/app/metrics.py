@@ -0,0 +1,52 @@
+from prometheus_client import Counter, Histogram
+
+# Agent run metrics. The HTTP server metrics stay in main.py: the API registers
+# the same names and imports this module in embedded mode.
+
+run_time_to_first_token_seconds = Histogram(
+    "agent_run_time_to_first_token_seconds",
+    "Time from /run start to the first model text delta (seconds)",
+    buckets=(0.1, 0.25, 0.5, 0.75, 1.0, 1.5, 2.0, 3.0, 5.0, 8.0, 13.0, 20.0, 30.0),
+)
+
+coach_agent_prepare_seconds = Histogram(
+    "agent_coach_prepare_seconds",
+    "Time to get the coach Agent for a run (seconds); cache=miss when it was rebuilt",
+    labelnames=["cache"],
+    buckets=(0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25),
+)
+
+tool_call_phase_seconds = Histogram(
+    "agent_tool_call_phase_seconds",
+    "Tool call latency by phase (seconds): invoke (round trip), connect (new API connections), "
+    "preflight (audit approval) and execute (as reported by the API)",
+    labelnames=["tool", "phase"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 120.0, 330.0),
+)
+api_http_retries_total = Counter(
+    "agent_api_http_retries_total",
+    "Retried agent -> API requests",
+    labelnames=["endpoint"],
+)
+
+tool_cache_requests_total = Counter(
+    "agent_tool_cache_requests_total",
+    "Run-scoped tool result cache lookups by tool and result (hit, miss)",
+    labelnames=["tool", "result"],
+)
+
+run_context_tokens = Histogram(
+    "agent_run_context_tokens",
+    "Prompt tokens of the run context sent with the user message",
+    buckets=(50, 100, 250, 500, 750, 1000, 1500, 2000, 3000, 4000, 6000, 8000, 16000),
+)
+run_context_trimmed_total = Counter(
+    "agent_run_context_trimmed_total",
+    "Runs whose context was trimmed to AGENT_CONTEXT_MAX_TOKENS",
+)
+
+capabilities_refresh_total = Counter(
+    "agent_capabilities_refresh_total",
+    "Capabilities syncs by result: changed (files rewritten), unchanged or error",
+    labelnames=["result"],
+)
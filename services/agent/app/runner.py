@@ -4,29 +4,67 @@ import asyncio
 import json
 import logging
 import os
+import time
 import uuid
-from dataclasses import dataclass
-from typing import Any, AsyncIterator, Dict, Optional
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Dict, Optional, Protocol, Tuple
 
 import httpx
 from agents import Agent, RunConfig, Runner, function_tool
 from agents.run_context import RunContextWrapper
-from agents.stream_events import RunItemStreamEvent
+from agents.stream_events import RawResponsesStreamEvent, RunItemStreamEvent
 from agents.items import ToolCallItem, ToolCallOutputItem
 
-from app.capabilities_sync import _api_base_url, _sign_agent_jwt
-from app.instructions_loader import compile_coach_instructions
+from .api_client import ToolCallTimings, get_api_client
+from .capabilities_sync import _api_base_url, _sign_agent_jwt
+from .context_builder import build_run_input
+from .instructions_loader import CompiledInstructions, acoach_instructions, coach_instructions
+from .metrics import (
+    coach_agent_prepare_seconds,
+    run_context_tokens,
+    run_context_trimmed_total,
+    run_time_to_first_token_seconds,
+)
+from .tool_cache import RunToolCache, tool_semantics
 
 logger = logging.getLogger("trainer2.agent.runner")
 
 
+class ToolBackend(Protocol):
+    """Executes tool calls in-process (embedded mode) instead of over HTTP.
+
+    Same contract as the API's `/internal/tools/invoke`: approval for audit
+    runs, then execution; a denial returns {"ok": False, "error": ...}.
+    """
+
+    async def invoke(
+        self,
+        *,
+        user_id: str,
+        session_id: str,
+        name: str,
+        args: Dict[str, Any],
+        run_id: str,
+        tool_call_id: str,
+    ) -> Dict[str, Any]: ...
+
+
 @dataclass
 class RunCtx:
     api_base_url: str
-    agent_jwt: str
     user_id: str
     session_id: str
     run_id: str
+    tools: Optional[ToolBackend] = None
+    tool_cache: RunToolCache = field(default_factory=RunToolCache)
+    # Content hash of the instructions (and tool surface) the run's agent was built from.
+    instructions_sha256: str = ""
+
+
+def _audit_await_read_timeout() -> float:
+    # The API answers with its default decision at AUDIT_TOOL_TIMEOUT_SECONDS (300 by
+    # default); wait a little longer than that so its answer, not ours, decides.
+    return float(os.getenv("AUDIT_TOOL_AWAIT_TIMEOUT_SECONDS", "330") or 330)
 
 
 def _extract_tool_call_id(ctx: RunContextWrapper[RunCtx]) -> str:
@@ -44,57 +82,91 @@ def _extract_tool_call_id(ctx: RunContextWrapper[RunCtx]) -> str:
     return ""
 
 
+def _is_read_tool(name: str, sha256: str) -> bool:
+    tool = tool_semantics(sha256).get(name)
+    return tool is not None and tool.effect == "read"
+
+
 async def _api_tool_execute(*, ctx: RunContextWrapper[RunCtx], name: str, args: Dict[str, Any]) -> Dict[str, Any]:
-    timeout = httpx.Timeout(connect=10.0, read=30.0, write=10.0, pool=10.0)
-    headers: Dict[str, str] = {}
     run_ctx = ctx.context
-    if run_ctx.agent_jwt:
-        headers["Authorization"] = f"Bearer {run_ctx.agent_jwt}"
-
-    # Audit preflight: block (server-side) until tool approval arrives.
+    # Audit runs send every call to the reviewer, so they are not cached.
     if run_ctx.run_id:
-        tool_call_id = _extract_tool_call_id(ctx)
-        async with httpx.AsyncClient(timeout=timeout) as http:
-            resp = await http.post(
-                f"{run_ctx.api_base_url}/internal/audit/tool/await",
-                headers=headers,
-                json={
-                    "userId": run_ctx.user_id,
-                    "sessionId": run_ctx.session_id,
-                    "runId": run_ctx.run_id,
-                    "toolCallId": tool_call_id or None,
-                    "toolName": name,
-                    "args": args,
-                },
+        return await _invoke_tool(ctx=ctx, name=name, args=args)
+
+    semantics = tool_semantics(run_ctx.instructions_sha256)
+    tool = semantics.get(name)
+    if tool is not None and tool.effect == "read":
+        cached = run_ctx.tool_cache.get(name, args)
+        if cached is not None:
+            return cached
+
+    result = await _invoke_tool(ctx=ctx, name=name, args=args)
+    run_ctx.tool_cache.record(name, args, result, semantics)
+    return result
+
+
+async def _invoke_tool(*, ctx: RunContextWrapper[RunCtx], name: str, args: Dict[str, Any]) -> Dict[str, Any]:
+    run_ctx = ctx.context
+    if run_ctx.tools is not None:
+        started = time.perf_counter()
+        try:
+            return await run_ctx.tools.invoke(
+                user_id=run_ctx.user_id,
+                session_id=run_ctx.session_id,
+                name=name,
+                args=args,
+                run_id=run_ctx.run_id,
+                tool_call_id=_extract_tool_call_id(ctx),
             )
-            resp.raise_for_status()
-            preflight: Any = resp.json()
-
-        if isinstance(preflight, dict):
-            approved = preflight.get("approved")
-            if approved is False:
-                reason = preflight.get("reason")
-                return {"ok": False, "error": reason or "tool denied"}
-            approved_args = preflight.get("args")
-            if isinstance(approved_args, dict):
-                args = approved_args
-
-    async with httpx.AsyncClient(timeout=timeout) as http:
-        resp = await http.post(
-            f"{run_ctx.api_base_url}/internal/tools/execute",
+        finally:
+            ToolCallTimings(tool=name).observe("invoke", time.perf_counter() - started)
+
+    # Signed per request (cached by the signer), so calls late in a long run or
+    # after an approval wait never carry a token that expired mid-run.
+    headers: Dict[str, str] = {}
+    try:
+        headers["Authorization"] = f"Bearer {_sign_agent_jwt()}"
+    except Exception:
+        logger.warning("agent_jwt_sign_failed", exc_info=True)
+
+    payload: Dict[str, Any] = {
+        "userId": run_ctx.user_id,
+        "sessionId": run_ctx.session_id,
+        "name": name,
+        "args": args,
+    }
+    if run_ctx.run_id:
+        # Audit run: the API holds the request (server-side) until tool approval arrives.
+        payload["runId"] = run_ctx.run_id
+        payload["toolCallId"] = _extract_tool_call_id(ctx) or None
+        timeout = httpx.Timeout(connect=10.0, read=_audit_await_read_timeout(), write=10.0, pool=10.0)
+    else:
+        timeout = httpx.Timeout(connect=10.0, read=30.0, write=10.0, pool=10.0)
+
+    api = get_api_client()
+    timings = ToolCallTimings(tool=name)
+    started = time.perf_counter()
+    try:
+        # Approval check, argument overrides and execution in one round trip.
+        resp = await api.post(
+            f"{run_ctx.api_base_url}/internal/tools/invoke",
             headers=headers,
-            json={
-                "userId": run_ctx.user_id,
-                "sessionId": run_ctx.session_id,
-                "name": name,
-                "args": args,
-            },
+            payload=payload,
+            timeout=timeout,
+            # Reads are safe to re-send after an ambiguous failure; a re-sent
+            # audited call would be proposed to the client again.
+            idempotent=_is_read_tool(name, run_ctx.instructions_sha256) and not run_ctx.run_id,
+            timings=timings,
+            endpoint="/internal/tools/invoke",
         )
-        resp.raise_for_status()
+        timings.observe("invoke", time.perf_counter() - started)
+        timings.observe_server_timing(resp.headers.get("server-timing", ""))
         data: Any = resp.json()
         if not isinstance(data, dict):
             raise RuntimeError("tool backend returned invalid response")
         return data
+    finally:
+        timings.observe("connect", timings.connect_seconds)
 
 
 def _tool_labels() -> dict[str, str]:
@@ -137,22 +209,31 @@ async def ui_action(action: Dict[str, Any]) -> Dict[str, Any]:
     return {"ok": True}
 
 
-def _coach_agent() -> Agent[RunCtx]:
-    instructions = (compile_coach_instructions() or "").strip()
+# (instructions sha256, agent). Agents hold no per-run state, so runs share one.
+_coach_agent_cache: Optional[Tuple[str, Agent[RunCtx]]] = None
+
+
+def _coach_agent(compiled: Optional[CompiledInstructions] = None) -> Agent[RunCtx]:
+    global _coach_agent_cache
+    started = time.perf_counter()
+    compiled = compiled or coach_instructions()
+    cached = _coach_agent_cache
+    if cached is not None and cached[0] == compiled.sha256:
+        coach_agent_prepare_seconds.labels(cache="hit").observe(time.perf_counter() - started)
+        return cached[1]
+
+    instructions = (compiled.text or "").strip()
     if not instructions:
         raise RuntimeError("missing compiled instructions")
 
-    return Agent(
+    agent: Agent[RunCtx] = Agent(
         name="coach",
         instructions=instructions,
         tools=[profile_get, profile_save, profile_delete],
     )
-
-
-def _context_prefix(context: Optional[Dict[str, Any]]) -> str:
-    if not context or not isinstance(context, dict):
-        return ""
-    return "Context (JSON):\n" + json.dumps(context, ensure_ascii=False) + "\n\n"
+    _coach_agent_cache = (compiled.sha256, agent)
+    coach_agent_prepare_seconds.labels(cache="miss").observe(time.perf_counter() - started)
+    return agent
 
 
 async def run_stream(
@@ -163,25 +244,32 @@ async def run_stream(
     message: str,
     context: Optional[Dict[str, Any]],
     max_turns: int = 10,
+    tool_backend: Optional[ToolBackend] = None,
 ) -> AsyncIterator[Dict[str, Any]]:
-    """Run the coach agent and yield API-facing events (NDJSON-friendly dicts)."""
+    """Run the coach agent and yield API-facing events (NDJSON-friendly dicts).
+
+    `tool_backend` is set when the API runs the agent in-process; tool calls
+    then skip HTTP (and the agent JWT).
+    """
 
     if not message or not message.strip():
         yield {"type": "RUN_ERROR", "message": "missing message"}
         return
 
+    started = time.perf_counter()
+
     api_base_url = _api_base_url()
-    try:
-        agent_jwt = _sign_agent_jwt()
-    except Exception:
-        agent_jwt = ""
+
+    # Source checks, when due, run off the event loop.
+    compiled = await acoach_instructions()
 
     run_ctx = RunCtx(
         api_base_url=api_base_url,
-        agent_jwt=agent_jwt,
         user_id=user_id,
         session_id=session_id,
         run_id=(run_id or "").strip(),
+        tools=tool_backend,
+        instructions_sha256=compiled.sha256,
     )
 
     model = os.getenv("OPENAI_MODEL", "").strip() or None
@@ -192,21 +280,46 @@ async def run_stream(
         trace_metadata={"sessionId": session_id, "userId": user_id},
     )
 
-    agent = _coach_agent()
+    agent = _coach_agent(compiled)
+
+    run_input = build_run_input(context, message)
+    run_context_tokens.observe(run_input.context_tokens)
+    if run_input.trimmed:
+        run_context_trimmed_total.inc()
 
     tool_labels = _tool_labels()
     call_id_to_name: dict[str, str] = {}
+    streamed_text = False
 
     try:
         streamed = Runner.run_streamed(
             agent,
-            _context_prefix(context) + message.strip(),
+            run_input.text,
             context=run_ctx,
             max_turns=max_turns,
             run_config=run_config,
         )
 
         async for evt in streamed.stream_events():
+            # Forward model text as it is generated; one messageId per output message.
+            if isinstance(evt, RawResponsesStreamEvent):
+                data = evt.data
+                if getattr(data, "type", None) != "response.output_text.delta":
+                    continue
+                delta = getattr(data, "delta", None)
+                if not isinstance(delta, str) or not delta:
+                    continue
+                if not streamed_text:
+                    streamed_text = True
+                    run_time_to_first_token_seconds.observe(time.perf_counter() - started)
+                yield {
+                    "type": "TEXT_MESSAGE_CHUNK",
+                    "messageId": getattr(data, "item_id", None) or run_ctx.run_id or session_id,
+                    "role": "assistant",
+                    "delta": delta,
+                }
+                continue
+
             if not isinstance(evt, RunItemStreamEvent):
                 continue
 
@@ -251,19 +364,22 @@ async def run_stream(
                     "result": evt.item.output,
                 }
 
-        final_text = ""
-        try:
-            final_text = streamed.final_output_as(str) or ""
-        except Exception:
+        if not streamed_text:
+            # The model produced no text deltas (e.g. a provider without streaming);
+            # send the final output as a single chunk.
             final_text = ""
-
-        message_id = str(uuid.uuid4())
-        yield {
-            "type": "TEXT_MESSAGE_CHUNK",
-            "messageId": message_id,
-            "role": "assistant",
-            "delta": final_text.strip() or "OK.",
-        }
+            try:
+                final_text = streamed.final_output_as(str) or ""
+            except Exception:
+                final_text = ""
+
+            message_id = str(uuid.uuid4())
+            yield {
+                "type": "TEXT_MESSAGE_CHUNK",
+                "messageId": message_id,
+                "role": "assistant",
+                "delta": final_text.strip() or "OK.",
+            }
         yield {"type": "RUN_FINISHED"}
     except asyncio.CancelledError:
         raise
@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import copy
+import json
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional, Tuple
+
+from .capabilities_sync import load_tools_from_generated
+from .instructions_loader import coach_instructions
+from .metrics import tool_cache_requests_total
+
+
+@dataclass(frozen=True)
+class ToolSemantics:
+    """How a tool's results may be reused within a run (from the API's capabilities)."""
+
+    effect: str  # "read", "write" or "none"
+    resource: str = ""
+    # Write tools that return the new state of a read: (read tool, result key).
+    seeds: Optional[Tuple[str, str]] = None
+
+
+def _parse_semantics(tool: Dict[str, Any]) -> Optional[ToolSemantics]:
+    raw = tool.get("semantics")
+    if not isinstance(raw, dict) or raw.get("effect") not in ("read", "write", "none"):
+        return None
+    seeds = raw.get("seeds")
+    seed: Optional[Tuple[str, str]] = None
+    if isinstance(seeds, dict) and isinstance(seeds.get("tool"), str) and isinstance(seeds.get("key"), str):
+        seed = (seeds["tool"], seeds["key"])
+    resource = raw.get("resource") if isinstance(raw.get("resource"), str) else ""
+    return ToolSemantics(effect=raw["effect"], resource=resource, seeds=seed)
+
+
+# (instructions sha256, semantics by tool name): re-read when the generated files change.
+_semantics_cache: Optional[Tuple[str, Dict[str, ToolSemantics]]] = None
+
+
+def tool_semantics(sha256: Optional[str] = None) -> Dict[str, ToolSemantics]:
+    """Declared semantics per tool. Tools without any are never cached.
+
+    `sha256` names the compiled instructions the caller runs with (see
+    `RunCtx.instructions_sha256`); without it the current ones are checked.
+    """
+
+    global _semantics_cache
+    sha256 = sha256 or coach_instructions().sha256
+    cached = _semantics_cache
+    if cached is not None and cached[0] == sha256:
+        return cached[1]
+
+    semantics: Dict[str, ToolSemantics] = {}
+    for tool in load_tools_from_generated():
+        fn = tool.get("function") if isinstance(tool.get("function"), dict) else None
+        name = fn.get("name") if isinstance(fn, dict) else None
+        parsed = _parse_semantics(tool)
+        if isinstance(name, str) and parsed is not None:
+            semantics[name] = parsed
+    _semantics_cache = (sha256, semantics)
+    return semantics
+
+
+def _args_key(args: Dict[str, Any]) -> str:
+    return json.dumps(args, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+@dataclass
+class RunToolCache:
+    """Results of read-only tool calls within one run.
+
+    Reads are keyed by (tool, args). A successful write drops every cached
+    read of its resource and, when it returns the new state, seeds the read
+    it declares (e.g. profile_save -> profile_get), so a verify-after-save
+    read does not go back to the API.
+    """
+
+    _entries: Dict[Tuple[str, str], Dict[str, Any]] = field(default_factory=dict)
+
+    def get(self, name: str, args: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get((name, _args_key(args)))
+        tool_cache_requests_total.labels(tool=name, result="miss" if entry is None else "hit").inc()
+        return copy.deepcopy(entry) if entry is not None else None
+
+    def record(
+        self,
+        name: str,
+        args: Dict[str, Any],
+        result: Dict[str, Any],
+        semantics: Dict[str, ToolSemantics],
+    ) -> None:
+        """Store a read's result or apply a write; failed calls change nothing."""
+
+        tool = semantics.get(name)
+        if tool is None or result.get("ok") is False:
+            return
+        if tool.effect == "read":
+            self._entries[(name, _args_key(args))] = copy.deepcopy(result)
+            return
+        if tool.effect != "write":
+            return
+
+        for key in [k for k in self._entries if semantics.get(k[0], tool).resource == tool.resource]:
+            del self._entries[key]
+        if tool.seeds is not None:
+            read_tool, result_key = tool.seeds
+            if result_key in result:
+                self._entries[(read_tool, _args_key({}))] = {result_key: copy.deepcopy(result[result_key])}
@@ -0,0 +1,48 @@
+"""create projection_checkpoints table
+
+Revision ID: 0005_projection_checkpoints
+Revises: 0004_add_password_hash_to_users
+Create Date: 2026-10-17
+
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = "0005_projection_checkpoints"
+down_revision = "0004_add_password_hash_to_users"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "projection_checkpoints",
+        sa.Column(
+            "user_id",
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey("users.id", ondelete="CASCADE"),
+            nullable=False,
+        ),
+        sa.Column("session_key", sa.Text(), nullable=False),
+        sa.Column("version", sa.Integer(), nullable=False),
+        sa.Column("last_event_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("last_event_ts", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("events_count", sa.Integer(), nullable=False),
+        sa.Column("state", postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            nullable=False,
+            server_default=sa.text("now()"),
+        ),
+        sa.PrimaryKeyConstraint("user_id", "session_key", name="projection_checkpoints_pkey"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("projection_checkpoints")
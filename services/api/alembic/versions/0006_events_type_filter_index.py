@@ -0,0 +1,56 @@
+"""index events by (user_id, session_id, type, ts); filtered projection views
+
+Revision ID: 0006_events_type_filter_index
+Revises: 0005_projection_checkpoints
+Create Date: 2026-10-17
+
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "0006_events_type_filter_index"
+down_revision = "0005_projection_checkpoints"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Supports type include/exclude filters on per-thread reads (e.g. the realtime
+    # context load skipping ChatMessageSent). Its (user_id, session_id) prefix
+    # makes the old two-column index redundant.
+    op.create_index(
+        "events_user_session_type_ts_idx",
+        "events",
+        ["user_id", "session_id", "type", "ts"],
+        unique=False,
+    )
+    op.drop_index("events_user_session_idx", table_name="events")
+
+    op.add_column(
+        "projection_checkpoints",
+        sa.Column("view", sa.Text(), nullable=False, server_default=""),
+    )
+    op.drop_constraint("projection_checkpoints_pkey", "projection_checkpoints", type_="primary")
+    op.create_primary_key(
+        "projection_checkpoints_pkey",
+        "projection_checkpoints",
+        ["user_id", "session_key", "view"],
+    )
+
+
+def downgrade() -> None:
+    op.execute("""DELETE FROM projection_checkpoints WHERE "view" <> ''""")
+    op.drop_constraint("projection_checkpoints_pkey", "projection_checkpoints", type_="primary")
+    op.create_primary_key(
+        "projection_checkpoints_pkey",
+        "projection_checkpoints",
+        ["user_id", "session_key"],
+    )
+    op.drop_column("projection_checkpoints", "view")
+
+    op.create_index("events_user_session_idx", "events", ["user_id", "session_id"], unique=False)
+    op.drop_index("events_user_session_type_ts_idx", table_name="events")
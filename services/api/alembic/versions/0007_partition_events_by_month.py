@@ -0,0 +1,148 @@
+"""partition events by month (range on ts) + event_archives
+
+Revision ID: 0007_partition_events_by_month
+Revises: 0006_events_type_filter_index
+Create Date: 2026-10-17
+
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = "0007_partition_events_by_month"
+down_revision = "0006_events_type_filter_index"
+branch_labels = None
+depends_on = None
+
+
+_EVENT_INDEXES = (
+    ("events_ts_idx", ["ts"]),
+    ("events_type_idx", ["type"]),
+    ("events_user_id_idx", ["user_id"]),
+    ("events_user_session_type_ts_idx", ["user_id", "session_id", "type", "ts"]),
+)
+
+# Creates monthly partitions `events_pYYYYMM` (UTC month boundaries) from
+# `start_month` up to `months_ahead` months past the current month. Months that
+# were already archived (see event_archives) are not re-created. Called by this
+# migration and periodically by the API (app.services.event_partitions).
+_ENSURE_PARTITIONS_FN = """
+CREATE OR REPLACE FUNCTION events_ensure_partitions(start_month date, months_ahead integer)
+RETURNS integer
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    m date := date_trunc('month', start_month)::date;
+    stop date := (date_trunc('month', now() AT TIME ZONE 'UTC') + make_interval(months => months_ahead + 1))::date;
+    part text;
+    created integer := 0;
+BEGIN
+    WHILE m < stop LOOP
+        part := 'events_p' || to_char(m, 'YYYYMM');
+        IF to_regclass(part) IS NULL
+           AND NOT EXISTS (SELECT 1 FROM event_archives a WHERE a.partition_name = part) THEN
+            EXECUTE format(
+                'CREATE TABLE %I PARTITION OF events FOR VALUES FROM (%L) TO (%L)',
+                part,
+                m::timestamp AT TIME ZONE 'UTC',
+                (m + interval '1 month')::timestamp AT TIME ZONE 'UTC'
+            );
+            created := created + 1;
+        END IF;
+        m := (m + interval '1 month')::date;
+    END LOOP;
+    RETURN created;
+END
+$$;
+"""
+
+
+def upgrade() -> None:
+    op.create_table(
+        "event_archives",
+        sa.Column("partition_name", sa.Text(), primary_key=True, nullable=False),
+        sa.Column("range_start", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("range_end", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("path", sa.Text(), nullable=False),
+        sa.Column("row_count", sa.BigInteger(), nullable=False),
+        sa.Column(
+            "archived_at",
+            sa.DateTime(timezone=True),
+            nullable=False,
+            server_default=sa.text("now()"),
+        ),
+    )
+
+    # Move the heap aside; its index names are reused by the partitioned table.
+    op.rename_table("events", "events_legacy")
+    op.execute("ALTER TABLE events_legacy RENAME CONSTRAINT events_pkey TO events_legacy_pkey")
+    for name, _ in _EVENT_INDEXES:
+        op.drop_index(name, table_name="events_legacy")
+
+    op.execute(
+        """
+        CREATE TABLE events (
+            id uuid NOT NULL,
+            ts timestamptz NOT NULL,
+            type text NOT NULL,
+            session_id text NULL,
+            payload jsonb NOT NULL,
+            user_id uuid NULL,
+            CONSTRAINT events_pkey PRIMARY KEY (id, ts)
+        ) PARTITION BY RANGE (ts)
+        """
+    )
+    for name, cols in _EVENT_INDEXES:
+        op.create_index(name, "events", cols, unique=False)
+
+    # Safety net for rows outside every monthly partition (e.g. clock skew).
+    op.execute("CREATE TABLE events_default PARTITION OF events DEFAULT")
+
+    op.execute(_ENSURE_PARTITIONS_FN)
+    op.execute(
+        """
+        SELECT events_ensure_partitions(
+            COALESCE((SELECT min(ts) FROM events_legacy), now())::date,
+            3
+        )
+        """
+    )
+
+    op.execute(
+        """
+        INSERT INTO events (id, ts, type, session_id, payload, user_id)
+        SELECT id, ts, type, session_id, payload, user_id FROM events_legacy
+        """
+    )
+    op.drop_table("events_legacy")
+
+
+def downgrade() -> None:
+    op.create_table(
+        "events_unpartitioned",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True, nullable=False),
+        sa.Column("ts", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("type", sa.Text(), nullable=False),
+        sa.Column("session_id", sa.Text(), nullable=True),
+        sa.Column("payload", postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+        sa.Column("user_id", postgresql.UUID(as_uuid=True), nullable=True),
+    )
+    # Archived partitions are not restored; their files stay where they are.
+    op.execute(
+        """
+        INSERT INTO events_unpartitioned (id, ts, type, session_id, payload, user_id)
+        SELECT id, ts, type, session_id, payload, user_id FROM events
+        """
+    )
+    op.execute("DROP FUNCTION IF EXISTS events_ensure_partitions(date, integer)")
+    op.drop_table("events")  # drops every partition too
+    op.rename_table("events_unpartitioned", "events")
+    op.execute("ALTER TABLE events RENAME CONSTRAINT events_unpartitioned_pkey TO events_pkey")
+    for name, cols in _EVENT_INDEXES:
+        op.create_index(name, "events", cols, unique=False)
+
+    op.drop_table("event_archives")
@@ -0,0 +1,29 @@
+"""index events by (user_id, ts, id) for latest-event lookups
+
+Revision ID: 0008_events_user_ts_index
+Revises: 0007_partition_events_by_month
+Create Date: 2026-10-17
+
+"""
+
+from __future__ import annotations
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "0008_events_user_ts_index"
+down_revision = "0007_partition_events_by_month"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # `GET /state` answers 304s from the user's newest event, read with a
+    # backward scan of this index. Its (user_id) prefix replaces events_user_id_idx.
+    op.create_index("events_user_ts_idx", "events", ["user_id", "ts", "id"], unique=False)
+    op.drop_index("events_user_id_idx", table_name="events")
+
+
+def downgrade() -> None:
+    op.create_index("events_user_id_idx", "events", ["user_id"], unique=False)
+    op.drop_index("events_user_ts_idx", table_name="events")
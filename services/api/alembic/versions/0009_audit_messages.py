@@ -0,0 +1,58 @@
+"""create audit_messages table for cross-worker audit coordination
+
+Revision ID: 0009_audit_messages
+Revises: 0008_events_user_ts_index
+Create Date: 2026-10-17
+
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = "0009_audit_messages"
+down_revision = "0008_events_user_ts_index"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "audit_messages",
+        sa.Column("id", sa.BigInteger(), sa.Identity(), primary_key=True),
+        sa.Column(
+            "user_id",
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey("users.id", ondelete="CASCADE"),
+            nullable=False,
+        ),
+        sa.Column("thread_id", sa.Text(), nullable=False),
+        sa.Column("run_id", sa.Text(), nullable=False),
+        sa.Column("kind", sa.Text(), nullable=False),
+        sa.Column("tool_call_id", sa.Text(), nullable=False, server_default=""),
+        sa.Column("body", postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            nullable=False,
+            server_default=sa.text("now()"),
+        ),
+    )
+    # One run registration and one decision per (run, kind, tool call): the first writer wins.
+    op.create_index(
+        "audit_messages_decision_ux",
+        "audit_messages",
+        ["user_id", "thread_id", "run_id", "kind", "tool_call_id"],
+        unique=True,
+        postgresql_where=sa.text("kind <> 'frame'"),
+    )
+    op.create_index("audit_messages_created_at_idx", "audit_messages", ["created_at"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index("audit_messages_created_at_idx", table_name="audit_messages")
+    op.drop_index("audit_messages_decision_ux", table_name="audit_messages")
+    op.drop_table("audit_messages")
@@ -1,32 +1,94 @@
 from __future__ import annotations
 
 import base64
+import hashlib
 import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional, Tuple
 
 import jwt
+from cryptography.hazmat.primitives.serialization import load_pem_public_key
 from fastapi import HTTPException
 
+from app.metrics import agent_token_verifications_total
+
 
 def agent_auth_configured() -> bool:
     return bool(os.getenv("AGENT_PUBLIC_KEY", "").strip() or os.getenv("AGENT_PUBLIC_KEY_B64", "").strip())
 
 
-def require_agent_auth(authorization: str | None) -> None:
-    """Verify an agent-signed JWT (RS256) using AGENT_PUBLIC_KEY.
+class _VerifiedTokens:
+    """Bounded LRU of verified agent tokens: sha256(token) -> exp.
 
-    If no agent public key is configured, this becomes a no-op (dev ergonomics).
+    The agent reuses each token for most of its lifetime, so nearly every
+    internal call after the first skips the RS256 verify. Entries are dropped
+    at `exp`, and all of them when the configured public key changes.
     """
 
-    pub_b64 = os.getenv("AGENT_PUBLIC_KEY_B64", "").strip()
-    if pub_b64:
+    def __init__(self, *, max_entries: int = 256):
+        self._max_entries = max(1, max_entries)
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[bytes, int]" = OrderedDict()
+        # (raw env values, parsed key or None when auth is off)
+        self._key: Optional[Tuple[Tuple[str, str], Any]] = None
+
+    def public_key(self) -> Any:
+        raw = (os.getenv("AGENT_PUBLIC_KEY_B64", ""), os.getenv("AGENT_PUBLIC_KEY", ""))
+        cached = self._key
+        if cached is not None and cached[0] == raw:
+            return cached[1]
+
+        pub_b64 = raw[0].strip()
+        if pub_b64:
+            try:
+                pub = base64.b64decode(pub_b64.encode("utf-8")).decode("utf-8").strip()
+            except Exception as exc:
+                raise HTTPException(status_code=500, detail=f"AGENT_PUBLIC_KEY_B64 invalid: {exc}")
+        else:
+            pub = raw[1].strip()
         try:
-            pub = base64.b64decode(pub_b64.encode("utf-8")).decode("utf-8").strip()
+            key = load_pem_public_key(pub.encode("utf-8")) if pub else None
         except Exception as exc:
-            raise HTTPException(status_code=500, detail=f"AGENT_PUBLIC_KEY_B64 invalid: {exc}")
-    else:
-        pub = os.getenv("AGENT_PUBLIC_KEY", "").strip()
+            raise HTTPException(status_code=500, detail=f"agent public key invalid: {exc}") from exc
+
+        with self._lock:
+            self._key = (raw, key)
+            self._entries.clear()
+        return key
+
+    def hit(self, digest: bytes) -> bool:
+        with self._lock:
+            exp = self._entries.get(digest)
+            if exp is None:
+                return False
+            if exp <= time.time():
+                del self._entries[digest]
+                return False
+            self._entries.move_to_end(digest)
+            return True
+
+    def put(self, digest: bytes, exp: int) -> None:
+        with self._lock:
+            self._entries[digest] = exp
+            self._entries.move_to_end(digest)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+
+_verified = _VerifiedTokens(max_entries=int(os.getenv("AGENT_TOKEN_CACHE_SIZE", "256") or 256))
 
-    if not pub:
+
+def require_agent_auth(authorization: str | None) -> None:
+    """Verify an agent-signed JWT (RS256) using AGENT_PUBLIC_KEY.
+
+    If no agent public key is configured, this becomes a no-op (dev ergonomics).
+    Tokens that already verified are accepted from a small cache until `exp`.
+    """
+
+    pub = _verified.public_key()
+    if pub is None:
         # Dev mode: allow internal calls without JWT.
         return
 
@@ -37,13 +99,23 @@ def require_agent_auth(authorization: str | None) -> None:
     if not token:
         raise HTTPException(status_code=401, detail="missing bearer token")
 
+    digest = hashlib.sha256(token.encode("utf-8")).digest()
+    if _verified.hit(digest):
+        agent_token_verifications_total.labels(result="cached").inc()
+        return
+
     try:
-        jwt.decode(
+        claims = jwt.decode(
             token,
             pub,
             algorithms=["RS256"],
             audience="trainer2-api",
             issuer="trainer2-agent",
+            options={"require": ["exp"]},
         )
     except Exception as exc:
+        agent_token_verifications_total.labels(result="rejected").inc()
         raise HTTPException(status_code=401, detail=f"invalid agent token: {exc}")
+
+    agent_token_verifications_total.labels(result="verified").inc()
+    _verified.put(digest, int(claims["exp"]))
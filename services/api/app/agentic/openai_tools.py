@@ -8,11 +8,17 @@ def openai_tools() -> List[Dict[str, Any]]:
 
     These names are what the LLM will call.
     The API is responsible for executing any side-effect tools.
+
+    `semantics` (not part of the OpenAI schema) tells the agent how results may
+    be reused within a run: "read" tools of a resource are cached, "write"
+    tools drop the cached reads of their resource, and `seeds` names the read
+    whose result a write returns (under `key`).
     """
 
     return [
         {
             "type": "function",
+            "semantics": {"effect": "read", "resource": "profile"},
             "function": {
                 "name": "profile_get",
                 "description": "Fetch the current user's onboarding profile.",
@@ -25,6 +31,11 @@ def openai_tools() -> List[Dict[str, Any]]:
         },
         {
             "type": "function",
+            "semantics": {
+                "effect": "write",
+                "resource": "profile",
+                "seeds": {"tool": "profile_get", "key": "profile"},
+            },
             "function": {
                 "name": "profile_save",
                 "description": "Save the user's onboarding profile (upsert).",
@@ -43,6 +54,7 @@ def openai_tools() -> List[Dict[str, Any]]:
         },
         {
             "type": "function",
+            "semantics": {"effect": "write", "resource": "profile"},
             "function": {
                 "name": "profile_delete",
                 "description": "Delete/clear the user's onboarding profile.",
@@ -55,6 +67,7 @@ def openai_tools() -> List[Dict[str, Any]]:
         },
         {
             "type": "function",
+            "semantics": {"effect": "none"},
             "function": {
                 "name": "ui_action",
                 "description": "Dispatch a UI action for the client UI (onboarding drawer, toast, etc). Always include action.type.",
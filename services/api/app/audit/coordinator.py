@@ -1,11 +1,29 @@
 from __future__ import annotations
 
 import asyncio
+import logging
+import os
 import time
 import uuid
 from dataclasses import dataclass, field
-from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple, TypeVar
 
+from fastapi import FastAPI
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.metrics import (
+    audit_approval_timeouts_total,
+    audit_approval_wait_seconds,
+    audit_pending_approvals,
+    audit_sessions_active,
+    audit_sessions_evicted_total,
+)
+
+logger = logging.getLogger("trainer2.api.audit")
+
+_D = TypeVar("_D")
+
+TIMEOUT_DECISIONS = ("deny", "approve")
 
 SendJsonFn = Callable[[Dict[str, Any]], Awaitable[None]]
 
@@ -47,6 +65,45 @@ class AuditPolicy:
         return AuditPolicy(auto_approve_tool_calls=bool(auto_tools))
 
 
+def _env_float(name: str, default: float) -> float:
+    raw = os.getenv(name, "").strip()
+    return float(raw) if raw else default
+
+
+@dataclass(frozen=True)
+class AuditLimits:
+    """Deadlines and bounds for pending approvals (seconds; <= 0 waits forever).
+
+    A decision that misses its deadline gets `timeout_decision` ("deny" or
+    "approve"). Sessions older than `session_ttl_seconds` are treated as
+    abandoned and evicted by the sweeper; at most `max_sessions` are held.
+    """
+
+    stage_timeout_seconds: float = 900.0
+    tool_timeout_seconds: float = 300.0
+    assistant_timeout_seconds: float = 900.0
+    timeout_decision: str = "deny"
+    session_ttl_seconds: float = 3600.0
+    max_sessions: int = 1000
+    sweep_interval_seconds: float = 30.0
+
+    @classmethod
+    def from_env(cls) -> "AuditLimits":
+        timeout_decision = os.getenv("AUDIT_TIMEOUT_DECISION", "deny").strip().lower() or "deny"
+        if timeout_decision not in TIMEOUT_DECISIONS:
+            logger.warning("unknown AUDIT_TIMEOUT_DECISION %r; using deny", timeout_decision)
+            timeout_decision = "deny"
+        return cls(
+            stage_timeout_seconds=_env_float("AUDIT_STAGE_TIMEOUT_SECONDS", 900.0),
+            tool_timeout_seconds=_env_float("AUDIT_TOOL_TIMEOUT_SECONDS", 300.0),
+            assistant_timeout_seconds=_env_float("AUDIT_ASSISTANT_TIMEOUT_SECONDS", 900.0),
+            timeout_decision=timeout_decision,
+            session_ttl_seconds=_env_float("AUDIT_SESSION_TTL_SECONDS", 3600.0),
+            max_sessions=int(os.getenv("AUDIT_MAX_SESSIONS", "1000") or 1000),
+            sweep_interval_seconds=_env_float("AUDIT_SWEEP_INTERVAL_SECONDS", 30.0),
+        )
+
+
 @dataclass
 class AuditRunSession:
     user_id: uuid.UUID
@@ -66,12 +123,31 @@ class AuditCoordinator:
 
     Notes:
     - This is a single-process, in-memory coordinator (good for dev / MVP).
-    - If you run multiple API workers, approvals won't coordinate across processes.
+    - If you run multiple API workers, approvals won't coordinate across processes;
+      use `AUDIT_COORDINATOR_BACKEND=postgres` (see `PostgresAuditCoordinator`).
+    - Every wait has a deadline (`AuditLimits`), and a sweeper evicts sessions
+      whose run never called `end_run`, so an absent reviewer cannot hold agent
+      requests or memory indefinitely.
     """
 
-    def __init__(self) -> None:
+    def __init__(self, *, limits: Optional[AuditLimits] = None) -> None:
         self._lock = asyncio.Lock()
         self._runs: Dict[Tuple[uuid.UUID, str, str], AuditRunSession] = {}
+        self._limits = limits or AuditLimits()
+        self._sweeper: Optional[asyncio.Task[None]] = None
+
+    def start_sweeper(self) -> None:
+        if self._sweeper is None and self._limits.sweep_interval_seconds > 0:
+            self._sweeper = asyncio.create_task(self._sweep_loop(), name="audit-sweeper")
+
+    async def aclose(self) -> None:
+        if self._sweeper is not None:
+            self._sweeper.cancel()
+            try:
+                await self._sweeper
+            except asyncio.CancelledError:
+                pass
+            self._sweeper = None
 
     async def start_run(
         self,
@@ -91,8 +167,15 @@ class AuditCoordinator:
                 send_json=send_json,
                 policy=policy,
             )
+            self._runs.pop(key, None)
             self._runs[key] = session
-            return session
+            audit_sessions_active.set(len(self._runs))
+            # Insertion order is oldest first: make room by evicting the longest-held sessions.
+            excess = len(self._runs) - max(1, self._limits.max_sessions)
+            overflow = list(self._runs)[: max(0, excess)]
+        for old_key in overflow:
+            await self._evict(old_key, reason="capacity")
+        return session
 
     async def get_run(self, *, user_id: uuid.UUID, thread_id: str, run_id: str) -> Optional[AuditRunSession]:
         key = (user_id, thread_id, run_id)
@@ -103,6 +186,17 @@ class AuditCoordinator:
         key = (user_id, thread_id, run_id)
         async with self._lock:
             self._runs.pop(key, None)
+            audit_sessions_active.set(len(self._runs))
+
+    async def await_stage_decision(self, session: AuditRunSession) -> StageDecision:
+        return await self._await_decision(
+            session.stage_future, kind="stage", timeout=self._limits.stage_timeout_seconds
+        )
+
+    async def await_assistant_decision(self, session: AuditRunSession) -> AssistantDecision:
+        return await self._await_decision(
+            session.assistant_future, kind="assistant", timeout=self._limits.assistant_timeout_seconds
+        )
 
     async def resolve_stage(
         self,
@@ -169,7 +263,119 @@ class AuditCoordinator:
         if not fut:
             fut = asyncio.Future()
             session.tool_futures[tool_call_id] = fut
-        return await fut
+        try:
+            return await self._await_decision(fut, kind="tool", timeout=self._limits.tool_timeout_seconds)
+        finally:
+            session.tool_futures.pop(tool_call_id, None)
+
+    def timeout_decision(self, kind: str, *, reason: str = "approval timed out") -> Any:
+        """The decision a wait of `kind` ("stage" / "tool" / "assistant") gets at its deadline."""
+
+        approved = self._limits.timeout_decision == "approve"
+        reason = "" if approved else reason
+        if kind == "stage":
+            return StageDecision(approved=approved, reason=reason)
+        if kind == "assistant":
+            return AssistantDecision(approved=approved, reason=reason)
+        return ToolDecision(approved=approved, reason=reason)
+
+    async def _await_decision(self, fut: "asyncio.Future[_D]", *, kind: str, timeout: float) -> _D:
+        started = time.monotonic()
+        outcome = "decided"
+        audit_pending_approvals.labels(kind=kind).inc()
+        try:
+            if fut.done() or timeout <= 0:
+                return await fut
+            try:
+                # shield: a deadline resolves the future itself, so late client
+                # decisions are rejected like any second decision.
+                return await asyncio.wait_for(asyncio.shield(fut), timeout=timeout)
+            except asyncio.TimeoutError:
+                if fut.done():
+                    return fut.result()
+                outcome = "timeout"
+                audit_approval_timeouts_total.labels(kind=kind).inc()
+                logger.warning("audit decision timed out", extra={"kind": kind, "timeoutSeconds": timeout})
+                fut.set_result(self.timeout_decision(kind))
+                return fut.result()
+        finally:
+            audit_pending_approvals.labels(kind=kind).dec()
+            audit_approval_wait_seconds.labels(kind=kind, outcome=outcome).observe(time.monotonic() - started)
+
+    async def _evict(self, key: Tuple[uuid.UUID, str, str], *, reason: str) -> None:
+        """Resolve whatever the session still waits on with the timeout decision, then drop it."""
+
+        session = self._runs.get(key)
+        if session is None:
+            return
+        why = f"audit session evicted ({reason})"
+        for kind, fut in (("stage", session.stage_future), ("assistant", session.assistant_future)):
+            if not fut.done():
+                fut.set_result(self.timeout_decision(kind, reason=why))
+        for fut in session.tool_futures.values():
+            if not fut.done():
+                fut.set_result(self.timeout_decision("tool", reason=why))
+        audit_sessions_evicted_total.labels(reason=reason).inc()
+        logger.warning("evicting audit session", extra={"runId": key[2], "reason": reason})
+        await self.end_run(user_id=key[0], thread_id=key[1], run_id=key[2])
+
+    async def sweep(self) -> int:
+        """Evict sessions older than the TTL. Returns how many were evicted."""
+
+        ttl = self._limits.session_ttl_seconds
+        if ttl <= 0:
+            return 0
+        cutoff = time.time() - ttl
+        expired = [key for key, session in list(self._runs.items()) if session.created_at < cutoff]
+        for key in expired:
+            await self._evict(key, reason="expired")
+        return len(expired)
+
+    async def _sweep_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self._limits.sweep_interval_seconds)
+            try:
+                await self.sweep()
+            except Exception:
+                logger.exception("audit sweep failed")
+
+
+AUDIT_COORDINATOR_BACKENDS = ("memory", "postgres")
+
+
+async def init_audit_coordinator(app: FastAPI, sessionmaker: async_sessionmaker[AsyncSession]) -> None:
+    limits = AuditLimits.from_env()
+    backend = os.getenv("AUDIT_COORDINATOR_BACKEND", "memory").strip().lower() or "memory"
+    if backend not in AUDIT_COORDINATOR_BACKENDS:
+        logger.warning("unknown AUDIT_COORDINATOR_BACKEND %r; using memory", backend)
+        backend = "memory"
+
+    if backend == "postgres":
+        from app.audit.pg_coordinator import PostgresAuditCoordinator
+        from app.db import listen_database_url
+
+        coordinator = PostgresAuditCoordinator(
+            sessionmaker=sessionmaker,
+            dsn=listen_database_url(),
+            limits=limits,
+        )
+        await coordinator.start()
+    else:
+        coordinator = AuditCoordinator(limits=limits)
+    coordinator.start_sweeper()
+    app.state.audit_coordinator = coordinator
+    logger.info("audit coordinator initialized", extra={"backend": backend})
+
+
+async def close_audit_coordinator(app: FastAPI) -> None:
+    coordinator: Optional[AuditCoordinator] = getattr(app.state, "audit_coordinator", None)
+    if coordinator is not None:
+        await coordinator.aclose()
+    app.state.audit_coordinator = None
 
 
-audit_coordinator = AuditCoordinator()
+def get_audit_coordinator(app: FastAPI) -> AuditCoordinator:
+    coordinator = getattr(app.state, "audit_coordinator", None)
+    if coordinator is None:
+        raise RuntimeError("audit coordinator is not initialized")
+    return coordinator
@@ -0,0 +1,368 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import uuid
+from dataclasses import asdict
+from datetime import timedelta
+from typing import Any, Dict, Optional, Set, Tuple
+
+import asyncpg
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.audit.coordinator import (
+    AssistantDecision,
+    AuditCoordinator,
+    AuditLimits,
+    AuditPolicy,
+    AuditRunSession,
+    SendJsonFn,
+    StageDecision,
+    ToolDecision,
+)
+from app.events import now_utc
+from app.repositories.audit_repo import AUDIT_CHANNEL, AuditMessagesRepository
+
+logger = logging.getLogger("trainer2.api.audit")
+
+_RunKey = Tuple[uuid.UUID, str, str]
+
+# Leftovers of runs whose worker died before `end_run`.
+_RETENTION = timedelta(days=1)
+_RECONNECT_DELAY_SECONDS = 1.0
+
+
+class PostgresAuditCoordinator(AuditCoordinator):
+    """Audit coordinator shared by several API workers through Postgres.
+
+    The worker holding a run's websocket owns the run (its session and the
+    stage / assistant futures live in `_runs`, as in the in-memory coordinator)
+    and registers it in `audit_messages`. Any worker can then:
+
+    - find the run and its policy (`get_run`),
+    - send frames to the run's client: rows of kind "frame", relayed by the owner,
+    - resolve decisions: rows of kind "stage" / "assistant" / "tool", picked up by
+      the worker waiting on them.
+
+    Each insert NOTIFYs a small pointer (row id + run key) on `AUDIT_CHANNEL`;
+    workers only read rows they have a local waiter for. Decisions that find
+    their waiter on the same worker skip the database.
+    """
+
+    def __init__(
+        self,
+        *,
+        sessionmaker: async_sessionmaker[AsyncSession],
+        dsn: str,
+        repo: Optional[AuditMessagesRepository] = None,
+        limits: Optional[AuditLimits] = None,
+    ) -> None:
+        super().__init__(limits=limits)
+        self._sessionmaker = sessionmaker
+        self._dsn = dsn
+        self._repo = repo or AuditMessagesRepository()
+        self._tool_waiters: Dict[Tuple[_RunKey, str], "asyncio.Future[ToolDecision]"] = {}
+        self._listening = asyncio.Event()
+        self._listener_task: Optional[asyncio.Task[None]] = None
+        self._handlers: Set[asyncio.Task[None]] = set()
+        # Frames are drained one run batch at a time so they reach the client in order.
+        self._frames_lock = asyncio.Lock()
+
+    async def start(self, *, timeout: float = 10.0) -> None:
+        async with self._sessionmaker() as session:
+            removed = await self._repo.delete_older_than(session, cutoff=now_utc() - _RETENTION)
+            await session.commit()
+        if removed:
+            logger.info("removed stale audit messages", extra={"count": removed})
+
+        self._listener_task = asyncio.create_task(self._listen(), name="audit-listener")
+        await asyncio.wait_for(self._listening.wait(), timeout=timeout)
+
+    async def aclose(self) -> None:
+        await super().aclose()
+        if self._listener_task is not None:
+            self._listener_task.cancel()
+            try:
+                await self._listener_task
+            except asyncio.CancelledError:
+                pass
+            self._listener_task = None
+        for task in list(self._handlers):
+            task.cancel()
+
+    async def start_run(
+        self,
+        *,
+        user_id: uuid.UUID,
+        thread_id: str,
+        run_id: str,
+        send_json: SendJsonFn,
+        policy: AuditPolicy,
+    ) -> AuditRunSession:
+        session = await super().start_run(
+            user_id=user_id,
+            thread_id=thread_id,
+            run_id=run_id,
+            send_json=send_json,
+            policy=policy,
+        )
+        async with self._sessionmaker() as db:
+            await self._repo.insert(
+                db,
+                user_id=user_id,
+                thread_id=thread_id,
+                run_id=run_id,
+                kind="run",
+                body={"autoApproveToolCalls": policy.auto_approve_tool_calls},
+                upsert=True,
+            )
+            await db.commit()
+        return session
+
+    async def get_run(self, *, user_id: uuid.UUID, thread_id: str, run_id: str) -> Optional[AuditRunSession]:
+        local = await super().get_run(user_id=user_id, thread_id=thread_id, run_id=run_id)
+        if local is not None:
+            return local
+
+        async with self._sessionmaker() as db:
+            row = await self._repo.find(db, user_id=user_id, thread_id=thread_id, run_id=run_id, kind="run")
+        if row is None:
+            return None
+
+        key = (user_id, thread_id, run_id)
+        return AuditRunSession(
+            user_id=user_id,
+            thread_id=thread_id,
+            run_id=run_id,
+            send_json=lambda frame: self._relay_frame(key, frame),
+            policy=AuditPolicy(auto_approve_tool_calls=bool(row.body.get("autoApproveToolCalls"))),
+        )
+
+    async def end_run(self, *, user_id: uuid.UUID, thread_id: str, run_id: str) -> None:
+        await super().end_run(user_id=user_id, thread_id=thread_id, run_id=run_id)
+        async with self._sessionmaker() as db:
+            await self._repo.delete_run(db, user_id=user_id, thread_id=thread_id, run_id=run_id)
+            await db.commit()
+
+    async def resolve_stage(
+        self,
+        *,
+        user_id: uuid.UUID,
+        thread_id: str,
+        run_id: str,
+        decision: StageDecision,
+    ) -> bool:
+        session = await super().get_run(user_id=user_id, thread_id=thread_id, run_id=run_id)
+        if session is not None:
+            return await super().resolve_stage(user_id=user_id, thread_id=thread_id, run_id=run_id, decision=decision)
+        return await self._publish_decision((user_id, thread_id, run_id), "stage", "", asdict(decision))
+
+    async def resolve_assistant(
+        self,
+        *,
+        user_id: uuid.UUID,
+        thread_id: str,
+        run_id: str,
+        decision: AssistantDecision,
+    ) -> bool:
+        session = await super().get_run(user_id=user_id, thread_id=thread_id, run_id=run_id)
+        if session is not None:
+            return await super().resolve_assistant(
+                user_id=user_id, thread_id=thread_id, run_id=run_id, decision=decision
+            )
+        return await self._publish_decision((user_id, thread_id, run_id), "assistant", "", asdict(decision))
+
+    async def resolve_tool(
+        self,
+        *,
+        user_id: uuid.UUID,
+        thread_id: str,
+        run_id: str,
+        tool_call_id: str,
+        decision: ToolDecision,
+    ) -> bool:
+        waiter = self._tool_waiters.get(((user_id, thread_id, run_id), tool_call_id))
+        if waiter is not None:
+            if waiter.done():
+                return False
+            waiter.set_result(decision)
+            return True
+        # The agent's await may be on another worker, or not have arrived yet: the
+        # stored decision is picked up either way.
+        return await self._publish_decision((user_id, thread_id, run_id), "tool", tool_call_id, asdict(decision))
+
+    async def await_tool_decision(
+        self,
+        *,
+        user_id: uuid.UUID,
+        thread_id: str,
+        run_id: str,
+        tool_call_id: str,
+    ) -> Optional[ToolDecision]:
+        session = await self.get_run(user_id=user_id, thread_id=thread_id, run_id=run_id)
+        if not session:
+            return None
+
+        waiter_key = ((user_id, thread_id, run_id), tool_call_id)
+        fut: "asyncio.Future[ToolDecision]" = asyncio.get_running_loop().create_future()
+        self._tool_waiters[waiter_key] = fut
+        try:
+            # A decision may already be stored (before this wait, or while the listener was down).
+            await self._load_decision(waiter_key[0], "tool", tool_call_id)
+            return await self._await_decision(fut, kind="tool", timeout=self._limits.tool_timeout_seconds)
+        finally:
+            self._tool_waiters.pop(waiter_key, None)
+
+    async def _evict(self, key: _RunKey, *, reason: str) -> None:
+        """Also release this worker's tool waits for the run: they live in
+        `_tool_waiters`, not in the session's `tool_futures`.
+        """
+
+        if key in self._runs:
+            why = f"audit session evicted ({reason})"
+            for waiter_key in [k for k in self._tool_waiters if k[0] == key]:
+                fut = self._tool_waiters.pop(waiter_key)
+                if not fut.done():
+                    fut.set_result(self.timeout_decision("tool", reason=why))
+        await super()._evict(key, reason=reason)
+
+    async def _publish_decision(self, key: _RunKey, kind: str, tool_call_id: str, body: Dict[str, Any]) -> bool:
+        """Store a decision for a run owned by another worker.
+
+        Returns False (storing nothing) when no worker has the run registered,
+        like `get_run` returning None.
+        """
+
+        user_id, thread_id, run_id = key
+        async with self._sessionmaker() as db:
+            run = await self._repo.find(db, user_id=user_id, thread_id=thread_id, run_id=run_id, kind="run")
+            if run is None:
+                return False
+            row_id = await self._repo.insert(
+                db,
+                user_id=user_id,
+                thread_id=thread_id,
+                run_id=run_id,
+                kind=kind,
+                tool_call_id=tool_call_id,
+                body=body,
+            )
+            await db.commit()
+        return row_id is not None
+
+    async def _relay_frame(self, key: _RunKey, frame: Dict[str, Any]) -> None:
+        user_id, thread_id, run_id = key
+        async with self._sessionmaker() as db:
+            await self._repo.insert(db, user_id=user_id, thread_id=thread_id, run_id=run_id, kind="frame", body=frame)
+            await db.commit()
+
+    async def _listen(self) -> None:
+        while True:
+            conn: Optional[asyncpg.Connection] = None
+            try:
+                conn = await asyncpg.connect(self._dsn)
+                lost = asyncio.Event()
+                conn.add_termination_listener(lambda _conn, lost=lost: lost.set())
+                await conn.add_listener(AUDIT_CHANNEL, self._on_notify)
+                self._listening.set()
+                # Notifications sent while we were not listening are gone; re-read
+                # whatever the local waiters are still missing.
+                await self._recheck_pending()
+                await lost.wait()
+                logger.warning("audit listener connection lost; reconnecting")
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.warning("audit listener failed; reconnecting", exc_info=True)
+            finally:
+                self._listening.clear()
+                if conn is not None and not conn.is_closed():
+                    conn.terminate()
+            await asyncio.sleep(_RECONNECT_DELAY_SECONDS)
+
+    def _on_notify(self, _conn: Any, _pid: int, _channel: str, payload: str) -> None:
+        try:
+            pointer = json.loads(payload)
+            key = (uuid.UUID(pointer["u"]), pointer["t"], pointer["r"])
+            kind = pointer["k"]
+            tool_call_id = pointer.get("c") or ""
+        except Exception:
+            logger.warning("ignoring malformed audit notification", extra={"payload": payload[:200]})
+            return
+
+        if not self._wants(key, kind, tool_call_id):
+            return
+        task = asyncio.create_task(self._handle(key, kind, tool_call_id))
+        self._handlers.add(task)
+        task.add_done_callback(self._handlers.discard)
+
+    def _wants(self, key: _RunKey, kind: str, tool_call_id: str) -> bool:
+        if kind == "tool":
+            waiter = self._tool_waiters.get((key, tool_call_id))
+            return waiter is not None and not waiter.done()
+        session = self._runs.get(key)
+        if session is None:
+            return False
+        if kind == "stage":
+            return not session.stage_future.done()
+        if kind == "assistant":
+            return not session.assistant_future.done()
+        return kind == "frame"
+
+    async def _handle(self, key: _RunKey, kind: str, tool_call_id: str) -> None:
+        try:
+            if kind == "frame":
+                await self._deliver_frames(key)
+            else:
+                await self._load_decision(key, kind, tool_call_id)
+        except Exception:
+            logger.exception("failed to handle audit notification", extra={"kind": kind, "runId": key[2]})
+
+    async def _deliver_frames(self, key: _RunKey) -> None:
+        """Send (and delete) every stored frame of a locally owned run, oldest first."""
+
+        session = self._runs.get(key)
+        if session is None:
+            return
+        user_id, thread_id, run_id = key
+        async with self._frames_lock:
+            async with self._sessionmaker() as db:
+                frames = await self._repo.take_frames(db, user_id=user_id, thread_id=thread_id, run_id=run_id)
+                await db.commit()
+            for frame in frames:
+                await session.send_json(frame)
+
+    async def _load_decision(self, key: _RunKey, kind: str, tool_call_id: str) -> None:
+        """Resolve the local waiter for a stored decision, if both exist."""
+
+        if not self._wants(key, kind, tool_call_id):
+            return
+        user_id, thread_id, run_id = key
+        async with self._sessionmaker() as db:
+            row = await self._repo.find(
+                db,
+                user_id=user_id,
+                thread_id=thread_id,
+                run_id=run_id,
+                kind=kind,
+                tool_call_id=tool_call_id,
+            )
+        if row is None or not self._wants(key, kind, tool_call_id):
+            return
+
+        if kind == "tool":
+            self._tool_waiters[(key, tool_call_id)].set_result(ToolDecision(**row.body))
+        elif kind == "stage":
+            self._runs[key].stage_future.set_result(StageDecision(**row.body))
+        elif kind == "assistant":
+            self._runs[key].assistant_future.set_result(AssistantDecision(**row.body))
+
+    async def _recheck_pending(self) -> None:
+        for key, session in list(self._runs.items()):
+            await self._deliver_frames(key)
+            for kind, fut in (("stage", session.stage_future), ("assistant", session.assistant_future)):
+                if not fut.done():
+                    await self._load_decision(key, kind, "")
+        for key, tool_call_id in list(self._tool_waiters):
+            await self._load_decision(key, "tool", tool_call_id)
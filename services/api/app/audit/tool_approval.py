@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import uuid
+from typing import Any, Dict, Optional
+
+from app.audit.coordinator import AuditCoordinator
+
+# Tools an audit run may approve.
+AUDITED_TOOLS = frozenset({"profile_get", "profile_save", "profile_delete"})
+
+
+async def preflight_tool_call(
+    coordinator: AuditCoordinator,
+    *,
+    user_id: uuid.UUID,
+    thread_id: str,
+    run_id: str,
+    tool_name: str,
+    args: Dict[str, Any],
+    tool_call_id: Optional[str],
+) -> Dict[str, Any]:
+    """Approve or deny a tool call of an audit run.
+
+    Answers right away when the run is not audited (any more) or auto-approves
+    tool calls; otherwise proposes the call to the run's client and waits for
+    its decision. Returns {"approved", "toolCallId", "args"} or
+    {"approved": False, "toolCallId", "reason"}.
+    """
+
+    tool_call_id = (tool_call_id or "").strip() or str(uuid.uuid4())
+
+    session = await coordinator.get_run(user_id=user_id, thread_id=thread_id, run_id=run_id)
+    if not session:
+        return {"approved": True, "toolCallId": tool_call_id, "args": args}
+
+    if tool_name not in AUDITED_TOOLS:
+        return {
+            "approved": False,
+            "toolCallId": tool_call_id,
+            "reason": f"unknown tool: {tool_name}",
+        }
+
+    if session.policy.auto_approve_tool_calls:
+        return {"approved": True, "toolCallId": tool_call_id, "args": args}
+
+    await session.send_json(
+        {
+            "type": "TOOL_CALL_PROPOSED",
+            "threadId": thread_id,
+            "runId": run_id,
+            "toolCallId": tool_call_id,
+            "toolName": tool_name,
+            "args": args,
+            "label": "",
+        }
+    )
+
+    decision = await coordinator.await_tool_decision(
+        user_id=user_id,
+        thread_id=thread_id,
+        run_id=run_id,
+        tool_call_id=tool_call_id,
+    )
+
+    if decision is None:
+        return {"approved": True, "toolCallId": tool_call_id, "args": args}
+
+    if not decision.approved:
+        await session.send_json(
+            {
+                "type": "TOOL_CALL_DENIED",
+                "threadId": thread_id,
+                "runId": run_id,
+                "toolCallId": tool_call_id,
+                "reason": decision.reason or "denied",
+            }
+        )
+        return {
+            "approved": False,
+            "toolCallId": tool_call_id,
+            "reason": decision.reason or "denied",
+        }
+
+    args_override = decision.args_override if isinstance(decision.args_override, dict) else None
+    await session.send_json(
+        {
+            "type": "TOOL_CALL_APPROVED",
+            "threadId": thread_id,
+            "runId": run_id,
+            "toolCallId": tool_call_id,
+            "argsOverride": args_override,
+        }
+    )
+    return {"approved": True, "toolCallId": tool_call_id, "args": args_override or args}
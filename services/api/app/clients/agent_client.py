@@ -1,12 +1,77 @@
 from __future__ import annotations
 
 import json
-from typing import Any, AsyncIterator, Dict, Optional
+import logging
+import os
+import time
+from typing import Any, AsyncIterator, Dict, Optional, Union
 
 import httpx
+from fastapi import FastAPI
+
+from app.clients.embedded_agent import EmbeddedAgentClient
+from app.metrics import (
+    agent_http_pool_connections,
+    agent_http_pool_max_connections,
+    agent_http_pool_wait_seconds,
+    agent_http_requests_in_flight,
+)
+
+logger = logging.getLogger("trainer2.api.agent_client")
+
+
+def _env_int(name: str, default: int) -> int:
+    return int(os.getenv(name, str(default)) or default)
+
+
+def agent_mode() -> str:
+    """"http" (default): call the agent service. "embedded": run the agent in this process."""
+
+    return os.getenv("AGENT_MODE", "http").strip().lower() or "http"
+
+
+def agent_base_url() -> str:
+    return os.getenv("AGENT_BASE_URL", "http://agent:9000")
+
+
+def agent_http_limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=_env_int("AGENT_HTTP_MAX_CONNECTIONS", 100),
+        max_keepalive_connections=_env_int("AGENT_HTTP_MAX_KEEPALIVE_CONNECTIONS", 20),
+        keepalive_expiry=float(os.getenv("AGENT_HTTP_KEEPALIVE_EXPIRY_SECONDS", "30") or 30),
+    )
+
+
+def http2_enabled() -> bool:
+    if os.getenv("AGENT_HTTP2", "0").strip().lower() not in ("1", "true", "yes"):
+        return False
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        logger.warning("AGENT_HTTP2 is set but the h2 package is missing; using HTTP/1.1")
+        return False
+    return True
+
+
+def _sample_pool(http: httpx.AsyncClient) -> None:
+    # httpx does not expose pool stats; read the httpcore pool behind the default transport.
+    pool = getattr(getattr(http, "_transport", None), "_pool", None)
+    connections = getattr(pool, "connections", None)
+    if connections is None:
+        return
+    idle = sum(1 for c in connections if c.is_idle())
+    agent_http_pool_connections.labels(state="idle").set(idle)
+    agent_http_pool_connections.labels(state="active").set(len(connections) - idle)
 
 
 class AgentClient:
+    """Client for the agent service.
+
+    Share one instance per process (see `init_agent_client`): the underlying
+    `httpx.AsyncClient` keeps a bounded pool of keep-alive connections that every
+    websocket reuses, and multiplexes concurrent `/run` streams when HTTP/2 is on.
+    """
+
     def __init__(self, *, base_url: str, http: httpx.AsyncClient):
         self._base_url = base_url.rstrip("/")
         self._http = http
@@ -32,14 +97,77 @@ class AgentClient:
         if context is not None:
             payload["context"] = context
 
-        async with self._http.stream("POST", f"{self._base_url}/run", json=payload) as resp:
-            resp.raise_for_status()
-            async for line in resp.aiter_lines():
-                if not line or not line.strip():
-                    continue
-                try:
-                    data: Any = json.loads(line)
-                except Exception:
-                    continue
-                if isinstance(data, dict):
-                    yield data
+        # Pool wait: from dispatch until request headers go out on a connection
+        # (includes connect time when no idle connection was available).
+        dispatched = time.perf_counter()
+        waited = False
+
+        async def trace(name: str, info: Dict[str, Any]) -> None:
+            nonlocal waited
+            if not waited and name.endswith(".send_request_headers.started"):
+                waited = True
+                agent_http_pool_wait_seconds.observe(time.perf_counter() - dispatched)
+
+        agent_http_requests_in_flight.inc()
+        try:
+            async with self._http.stream(
+                "POST",
+                f"{self._base_url}/run",
+                json=payload,
+                extensions={"trace": trace},
+            ) as resp:
+                _sample_pool(self._http)
+                resp.raise_for_status()
+                async for line in resp.aiter_lines():
+                    if not line or not line.strip():
+                        continue
+                    try:
+                        data: Any = json.loads(line)
+                    except Exception:
+                        continue
+                    if isinstance(data, dict):
+                        yield data
+        finally:
+            agent_http_requests_in_flight.dec()
+            _sample_pool(self._http)
+
+    async def aclose(self) -> None:
+        await self._http.aclose()
+
+
+AnyAgentClient = Union[AgentClient, EmbeddedAgentClient]
+
+
+async def init_agent_client(app: FastAPI) -> None:
+    mode = agent_mode()
+    if mode == "embedded":
+        app.state.agent_client = EmbeddedAgentClient.from_app(app)
+        logger.info("agent client initialized", extra={"mode": mode})
+        return
+    if mode != "http":
+        raise RuntimeError(f"unknown AGENT_MODE: {mode}")
+
+    limits = agent_http_limits()
+    http2 = http2_enabled()
+    http = httpx.AsyncClient(
+        timeout=httpx.Timeout(connect=10.0, read=None, write=10.0, pool=10.0),
+        limits=limits,
+        http2=http2,
+    )
+    agent_http_pool_max_connections.set(limits.max_connections or 0)
+    app.state.agent_client = AgentClient(base_url=agent_base_url(), http=http)
+    logger.info("agent client initialized", extra={"maxConnections": limits.max_connections, "http2": http2})
+
+
+async def close_agent_client(app: FastAPI) -> None:
+    client: Optional[AnyAgentClient] = getattr(app.state, "agent_client", None)
+    if client is not None:
+        await client.aclose()
+        app.state.agent_client = None
+
+
+def get_agent_client(app: FastAPI) -> AnyAgentClient:
+    client = getattr(app.state, "agent_client", None)
+    if client is None:
+        raise RuntimeError("agent client is not initialized")
+    return client
@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import importlib
+import importlib.machinery
+import importlib.util
+import os
+import sys
+import uuid
+from pathlib import Path
+from types import ModuleType
+from typing import Any, AsyncIterator, Dict, Optional
+
+from fastapi import FastAPI
+
+from app.services.tool_invoker import ToolInvoker
+
+# Both services are `app` packages; the agent's modules are imported under this name.
+_AGENT_PACKAGE = "trainer2_agent"
+
+
+def agent_source_dir() -> Path:
+    configured = os.getenv("AGENT_EMBEDDED_PATH", "").strip()
+    if configured:
+        return Path(configured)
+    # services/api/app/clients/ -> services/agent/app
+    return Path(__file__).resolve().parents[3] / "agent" / "app"
+
+
+def load_agent_runner() -> ModuleType:
+    """Import the agent service's `runner` module into this process.
+
+    Needs the agent's requirements (openai-agents) installed next to the API's.
+    """
+
+    if _AGENT_PACKAGE not in sys.modules:
+        source = agent_source_dir()
+        if not (source / "runner.py").is_file():
+            raise RuntimeError(f"agent sources not found in {source}; set AGENT_EMBEDDED_PATH")
+        spec = importlib.machinery.ModuleSpec(_AGENT_PACKAGE, None, is_package=True)
+        spec.submodule_search_locations = [str(source)]
+        sys.modules[_AGENT_PACKAGE] = importlib.util.module_from_spec(spec)
+    return importlib.import_module(f"{_AGENT_PACKAGE}.runner")
+
+
+class LocalToolBackend:
+    """The agent's ToolBackend in embedded mode: tool calls go straight to ToolInvoker."""
+
+    def __init__(self, app: FastAPI):
+        self._app = app
+
+    async def invoke(
+        self,
+        *,
+        user_id: str,
+        session_id: str,
+        name: str,
+        args: Dict[str, Any],
+        run_id: str,
+        tool_call_id: str,
+    ) -> Dict[str, Any]:
+        invocation = await ToolInvoker.from_app(self._app).invoke(
+            user_id=uuid.UUID(user_id),
+            session_id=session_id,
+            name=name,
+            args=args,
+            run_id=run_id,
+            tool_call_id=tool_call_id,
+        )
+        return invocation.result
+
+
+class EmbeddedAgentClient:
+    """Runs the coach agent inside the API process (AGENT_MODE=embedded).
+
+    Same interface as AgentClient, without the NDJSON hop to the agent service
+    or the HTTP + JWT hop back for every tool call. For single-host
+    deployments; scaled deployments keep the HTTP agent.
+    """
+
+    def __init__(self, *, runner: ModuleType, tools: LocalToolBackend):
+        self._runner = runner
+        self._tools = tools
+
+    @classmethod
+    def from_app(cls, app: FastAPI) -> "EmbeddedAgentClient":
+        return cls(runner=load_agent_runner(), tools=LocalToolBackend(app))
+
+    async def run_stream(
+        self,
+        *,
+        user_id: str,
+        session_id: str,
+        run_id: str | None = None,
+        message: str,
+        context: Optional[Dict[str, Any]] = None,
+        max_turns: int = 10,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        async for evt in self._runner.run_stream(
+            user_id=user_id,
+            session_id=session_id,
+            run_id=run_id,
+            message=message,
+            context=context,
+            max_turns=max_turns,
+            tool_backend=self._tools,
+        ):
+            yield evt
+
+    async def aclose(self) -> None:
+        return None
@@ -0,0 +1,139 @@
+"""Archive old monthly `events` partitions to compressed files.
+
+Usage (inside the api container):
+    python -m app.commands.archive_events --older-than-months 12
+    python -m app.commands.archive_events --older-than-months 12 --dry-run
+
+For every monthly partition that ended more than N months ago:
+  1. Dump its rows, ordered by (ts, id), to EVENTS_ARCHIVE_DIR/<partition>.jsonl.gz,
+     while it is still attached.
+  2. Record the file in `event_archives` (commit). From then on readers take the
+     range from the archive and skip it in `events`.
+  3. Wait until no API process can still hold an archive list without it
+     (`--detach-delay-seconds`), then DETACH and DROP the partition (one transaction).
+
+The events stay readable throughout, through `EventsRepository.stream_history`:
+a projection can never miss them and checkpoint a state without them. A crash
+before step 3 leaves an attached, already archived partition; the next run
+dumps it again. Partitions left detached by older versions of this command are
+archived and dropped the same way.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+from datetime import datetime, timezone
+from typing import List, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db import create_engine, create_sessionmaker
+from app.event_archive import ArchiveWriter, archive_dir
+from app.repositories.archives_repo import ARCHIVES_CACHE_TTL_SECONDS, ArchivesRepository
+from app.repositories.events_repo import STREAM_BATCH_SIZE, event_from_row
+from app.services.event_partitions import list_partitions, partition_range
+
+logger = logging.getLogger("trainer2.api.commands.archive_events")
+
+
+def _cutoff(older_than_months: int) -> datetime:
+    now = datetime.now(timezone.utc)
+    months = now.year * 12 + (now.month - 1) - older_than_months
+    return datetime(months // 12, months % 12 + 1, 1, tzinfo=timezone.utc)
+
+
+async def _dump(session: AsyncSession, name: str, writer: ArchiveWriter) -> int:
+    # `name` comes from pg_class and is validated by partition_range().
+    stmt = text(f'SELECT id, ts, type, user_id, session_id, payload FROM "{name}" ORDER BY ts, id')
+    result = await session.stream(stmt.execution_options(yield_per=STREAM_BATCH_SIZE))
+    try:
+        async for rows in result.partitions(STREAM_BATCH_SIZE):
+            await asyncio.to_thread(writer.write_many, [event_from_row(r) for r in rows])
+    finally:
+        await result.close()
+    return await asyncio.to_thread(writer.commit)
+
+
+async def _run(older_than_months: int, dry_run: bool, detach_delay_seconds: float) -> int:
+    cutoff = _cutoff(older_than_months)
+    engine = create_engine()
+    archives = ArchivesRepository()
+    archived: List[Tuple[str, bool]] = []
+    try:
+        sessionmaker = create_sessionmaker(engine)
+        async with sessionmaker() as session:
+            partitions = await list_partitions(session)
+            await session.commit()
+
+            for name, attached in partitions:
+                bounds = partition_range(name)
+                if bounds is None or bounds[1] > cutoff:
+                    continue
+                if dry_run:
+                    logger.info("would archive %s (%s .. %s)", name, bounds[0], bounds[1])
+                    continue
+
+                path = archive_dir() / f"{name}.jsonl.gz"
+                writer = await asyncio.to_thread(ArchiveWriter, path)
+                try:
+                    count = await _dump(session, name, writer)
+                except BaseException:
+                    await asyncio.to_thread(writer.abort)
+                    raise
+                await archives.record(
+                    session,
+                    partition_name=name,
+                    range_start=bounds[0],
+                    range_end=bounds[1],
+                    path=str(path),
+                    row_count=count,
+                )
+                await session.commit()
+                archived.append((name, attached))
+                logger.info("archived %s: %s rows -> %s", name, count, path)
+
+            if any(attached for _, attached in archived) and detach_delay_seconds > 0:
+                logger.info("waiting %ss before detaching archived partitions", detach_delay_seconds)
+                await asyncio.sleep(detach_delay_seconds)
+
+            for name, attached in archived:
+                if attached:
+                    await session.execute(text(f'ALTER TABLE events DETACH PARTITION "{name}"'))
+                await session.execute(text(f'DROP TABLE "{name}"'))
+                await session.commit()
+                logger.info("dropped partition %s", name)
+    finally:
+        await engine.dispose()
+    return len(archived)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Detach and archive old monthly events partitions.")
+    parser.add_argument(
+        "--older-than-months",
+        type=int,
+        default=12,
+        help="Archive partitions that ended at least this many months ago (default: 12).",
+    )
+    parser.add_argument(
+        "--detach-delay-seconds",
+        type=float,
+        default=2 * ARCHIVES_CACHE_TTL_SECONDS,
+        help="Wait between recording the archives and dropping the partitions, so API processes "
+        "refresh their cached archive list (default: %(default)s).",
+    )
+    parser.add_argument("--dry-run", action="store_true", help="List partitions that would be archived.")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    archived = asyncio.run(
+        _run(max(1, args.older_than_months), args.dry_run, max(0.0, args.detach_delay_seconds))
+    )
+    logger.info("archived %s partitions", archived)
+
+
+if __name__ == "__main__":
+    main()
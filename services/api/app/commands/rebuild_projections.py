@@ -0,0 +1,49 @@
+"""Rebuild persisted projection checkpoints.
+
+Usage (inside the api container):
+    python -m app.commands.rebuild_projections            # all users
+    python -m app.commands.rebuild_projections --user-id <uuid>
+
+Run this after changing reducers in `app.events` (bump PROJECTION_VERSION too, so
+running workers stop trusting old checkpoints before the rebuild finishes).
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import uuid
+from typing import Optional
+
+from app.db import create_engine, create_sessionmaker
+from app.repositories.checkpoints_repo import CheckpointsRepository
+from app.repositories.events_repo import EventsRepository
+from app.services.projections_service import ProjectionsService
+
+logger = logging.getLogger("trainer2.api.commands.rebuild_projections")
+
+
+async def _run(user_id: Optional[uuid.UUID]) -> int:
+    engine = create_engine()
+    try:
+        sessionmaker = create_sessionmaker(engine)
+        service = ProjectionsService(events_repo=EventsRepository(), checkpoints_repo=CheckpointsRepository())
+        async with sessionmaker() as session:
+            return await service.rebuild(session, user_id=user_id)
+    finally:
+        await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Rebuild projection checkpoints from the event log.")
+    parser.add_argument("--user-id", type=uuid.UUID, default=None, help="Only rebuild this user.")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    written = asyncio.run(_run(args.user_id))
+    logger.info("rebuilt %s projection checkpoints", written)
+
+
+if __name__ == "__main__":
+    main()
@@ -21,20 +21,34 @@ def _async_database_url() -> str:
     return url
 
 
-async def init_db(app: FastAPI) -> None:
-    engine: AsyncEngine = create_async_engine(
+def listen_database_url() -> str:
+    """DATABASE_URL as a plain libpq DSN, for dedicated asyncpg connections (LISTEN)."""
+
+    return _async_database_url().replace("postgresql+asyncpg://", "postgresql://", 1)
+
+
+def create_engine() -> AsyncEngine:
+    return create_async_engine(
         _async_database_url(),
         pool_size=5,
         max_overflow=0,
         pool_pre_ping=True,
     )
-    app.state.db_engine = engine
-    app.state.db_sessionmaker = async_sessionmaker(
+
+
+def create_sessionmaker(engine: AsyncEngine) -> async_sessionmaker[AsyncSession]:
+    return async_sessionmaker(
         engine,
         expire_on_commit=False,
         class_=AsyncSession,
     )
 
+
+async def init_db(app: FastAPI) -> None:
+    engine = create_engine()
+    app.state.db_engine = engine
+    app.state.db_sessionmaker = create_sessionmaker(engine)
+
     logger.info("db initialized")
 
 
@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import asyncio
+import gzip
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, Iterable
+
+from app.events import Event
+
+# Archive files are gzip-compressed JSON lines, one event per line, ordered by
+# (ts, id). They are written by `app.commands.archive_events` and read back by
+# `EventsRepository.stream_history`.
+
+_READ_CHUNK_BYTES = 1 << 20
+
+
+def archive_dir() -> Path:
+    return Path(os.getenv("EVENTS_ARCHIVE_DIR", "/app/archive").strip() or "/app/archive")
+
+
+def _encode(ev: Event) -> str:
+    return json.dumps(
+        {
+            "id": ev.id,
+            "ts": ev.ts.isoformat(),
+            "type": ev.type,
+            "userId": ev.userId,
+            "sessionId": ev.sessionId,
+            "payload": ev.payload,
+        },
+        ensure_ascii=False,
+        separators=(",", ":"),
+    )
+
+
+def _decode(line: str) -> Event:
+    d: Dict[str, Any] = json.loads(line)
+    return Event(
+        id=d["id"],
+        ts=datetime.fromisoformat(d["ts"]),
+        type=d["type"],
+        userId=d.get("userId"),
+        sessionId=d.get("sessionId"),
+        payload=d.get("payload") or {},
+    )
+
+
+class ArchiveWriter:
+    """Incremental, atomic archive writer (tmp file + fsync + rename on `commit`).
+
+    Methods are blocking; call them via `asyncio.to_thread` from async code.
+    """
+
+    def __init__(self, path: Path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self._tmp = path.with_suffix(path.suffix + ".tmp")
+        self._raw = open(self._tmp, "wb")
+        self._gz = gzip.open(self._raw, "wt", encoding="utf-8", compresslevel=6)
+        self.count = 0
+
+    def write_many(self, events: Iterable[Event]) -> None:
+        for ev in events:
+            self._gz.write(_encode(ev))
+            self._gz.write("\n")
+            self.count += 1
+
+    def commit(self) -> int:
+        self._gz.close()
+        self._raw.flush()
+        os.fsync(self._raw.fileno())
+        self._raw.close()
+        os.replace(self._tmp, self.path)
+        return self.count
+
+    def abort(self) -> None:
+        try:
+            self._gz.close()
+            self._raw.close()
+        finally:
+            self._tmp.unlink(missing_ok=True)
+
+
+async def iter_archive(path: str) -> AsyncIterator[Event]:
+    """Stream events from an archive file without blocking the event loop."""
+
+    f = await asyncio.to_thread(gzip.open, path, "rt", encoding="utf-8")
+    try:
+        while True:
+            lines = await asyncio.to_thread(f.readlines, _READ_CHUNK_BYTES)
+            if not lines:
+                break
+            for line in lines:
+                if line.strip():
+                    yield _decode(line)
+    finally:
+        await asyncio.to_thread(f.close)
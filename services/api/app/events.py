@@ -2,7 +2,11 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 from datetime import datetime, timezone
-from typing import Any, Dict, List, Optional
+from typing import Any, AsyncIterable, Dict, Optional
+
+# Bump whenever `apply_event` changes meaning. Persisted projection checkpoints
+# written by an older reducer are ignored (and rebuilt) automatically.
+PROJECTION_VERSION = 1
 
 
 @dataclass(frozen=True)
@@ -15,43 +19,56 @@ class Event:
     sessionId: Optional[str] = None
 
 
-def project_state(events: List[Event]) -> Dict[str, Any]:
-    """Reduce events into a materialized state snapshot.
-
-    This is intentionally minimal for Phase 1 foundation. It can evolve as new
-    event types are introduced.
-    """
-
-    state: Dict[str, Any] = {
+def empty_state() -> Dict[str, Any]:
+    return {
         "profile": None,
         "plan": None,
         "workout": {"active": None, "sets": []},
         "chat": {"messages": []},
     }
 
-    for ev in events:
-        t = ev.type
-        p = ev.payload
-
-        # Profile lifecycle
-        # - Canonical event name: ProfileSaved
-        # - Backward-compat: UserOnboarded (older DB volumes / event history)
-        if t in ("ProfileSaved", "UserOnboarded"):
-            state["profile"] = p
-        elif t == "ProfileDeleted":
-            state["profile"] = None
-        elif t == "PlanGenerated":
-            state["plan"] = p
-        elif t == "WorkoutStarted":
-            state["workout"]["active"] = p
-        elif t == "SetLogged":
-            state["workout"]["sets"].append(p)
-        elif t == "WorkoutCompleted":
-            state["workout"]["active"] = None
-        elif t == "ChatMessageSent":
-            # payload: { role: "user"|"assistant", text: string, ... }
-            state["chat"]["messages"].append(p)
 
+def apply_event(state: Dict[str, Any], ev: Event) -> Dict[str, Any]:
+    """Fold a single event into `state` (in place) and return it."""
+
+    t = ev.type
+    p = ev.payload
+
+    # Profile lifecycle
+    # - Canonical event name: ProfileSaved
+    # - Backward-compat: UserOnboarded (older DB volumes / event history)
+    if t in ("ProfileSaved", "UserOnboarded"):
+        state["profile"] = p
+    elif t == "ProfileDeleted":
+        state["profile"] = None
+    elif t == "PlanGenerated":
+        state["plan"] = p
+    elif t == "WorkoutStarted":
+        state["workout"]["active"] = p
+    elif t == "SetLogged":
+        state["workout"]["sets"].append(p)
+    elif t == "WorkoutCompleted":
+        state["workout"]["active"] = None
+    elif t == "ChatMessageSent":
+        # payload: { role: "user"|"assistant", text: string, ... }
+        state["chat"]["messages"].append(p)
+
+    return state
+
+
+async def project_state(
+    events: AsyncIterable[Event], initial: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """Reduce an event stream (e.g. `EventsRepository.stream_history`) into a
+    materialized state snapshot, one event at a time.
+
+    `initial` lets callers resume from a persisted checkpoint instead of
+    replaying the full history; it is updated in place.
+    """
+
+    state = initial if initial is not None else empty_state()
+    async for ev in events:
+        apply_event(state, ev)
     return state
 
 
@@ -8,7 +8,9 @@ from fastapi.middleware.cors import CORSMiddleware
 from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 from starlette.responses import Response
 
-from app.db import close_db, init_db
+from app.audit.coordinator import close_audit_coordinator, init_audit_coordinator
+from app.clients.agent_client import close_agent_client, init_agent_client
+from app.db import close_db, get_sessionmaker, init_db
 from app.metrics import http_request_duration_seconds, http_requests_total
 from app.observability import setup_observability
 from app.routes.capabilities import router as capabilities_router
@@ -17,6 +19,11 @@ from app.routes.auth_local import router as auth_router
 from app.routes.internal_audit import router as internal_audit_router
 from app.routes.internal_tools import router as internal_tools_router
 from app.routes.realtime import router as realtime_router
+from app.services.event_batcher import close_event_batcher, init_event_batcher
+from app.services.event_partitions import close_partition_maintenance, init_partition_maintenance
+from app.services.state_cache import init_state_cache
+from app.ws_admission import init_admission
+from app.ws_resume import init_run_streams
 
 
 def _parse_cors_origins(value: str) -> List[str]:
@@ -43,10 +50,21 @@ app.include_router(internal_audit_router)
 @app.on_event("startup")
 async def _startup() -> None:
     await init_db(app)
+    init_state_cache(app)
+    init_run_streams(app)
+    init_admission(app)
+    await init_audit_coordinator(app, get_sessionmaker(app))
+    await init_event_batcher(app, get_sessionmaker(app))
+    await init_partition_maintenance(app, get_sessionmaker(app))
+    await init_agent_client(app)
 
 
 @app.on_event("shutdown")
 async def _shutdown() -> None:
+    await close_agent_client(app)
+    await close_audit_coordinator(app)
+    await close_partition_maintenance(app)
+    await close_event_batcher(app)
     await close_db(app)
 
 cors_origins = _parse_cors_origins(os.getenv("CORS_ORIGINS", "http://localhost:3000"))
@@ -56,6 +74,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag"],
 )
 
 
@@ -1,4 +1,4 @@
-from prometheus_client import Counter, Histogram
+from prometheus_client import Counter, Gauge, Histogram
 
 http_requests_total = Counter(
     "http_requests_total",
@@ -16,6 +16,64 @@ ws_messages_total = Counter(
     "Total websocket messages received",
     labelnames=["type"],
 )
+ws_outbound_queue_depth = Gauge(
+    "ws_outbound_queue_depth",
+    "Frames queued for websocket clients, summed over connections",
+)
+ws_send_duration_seconds = Histogram(
+    "ws_send_duration_seconds",
+    "Time to write one frame to a websocket (seconds)",
+    buckets=(0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0),
+)
+ws_outbound_frames_total = Counter(
+    "ws_outbound_frames_total",
+    "Outbound websocket frames by outcome (sent, coalesced, dropped)",
+    labelnames=["outcome"],
+)
+ws_slow_consumer_disconnects_total = Counter(
+    "ws_slow_consumer_disconnects_total",
+    "Websockets closed because their outbound queue was full",
+)
+ws_connections_active = Gauge(
+    "ws_connections_active",
+    "Admitted /realtime websocket connections",
+)
+ws_idle_disconnects_total = Counter(
+    "ws_idle_disconnects_total",
+    "Websockets closed after missing heartbeats",
+)
+admission_rejections_total = Counter(
+    "admission_rejections_total",
+    "Connections and agent runs refused by admission control",
+    ["scope"],
+)
+agent_runs_inflight = Gauge(
+    "agent_runs_inflight",
+    "Agent runs holding an admission slot",
+)
+agent_run_queue_depth = Gauge(
+    "agent_run_queue_depth",
+    "Agent runs waiting for an admission slot",
+)
+agent_run_queue_wait_seconds = Histogram(
+    "agent_run_queue_wait_seconds",
+    "Time agent runs waited for an admission slot (seconds)",
+    buckets=(0.0, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0),
+)
+ws_run_streams = Gauge(
+    "ws_run_streams",
+    "Run streams held for websocket resume (running or within the grace period)",
+)
+ws_run_resumes_total = Counter(
+    "ws_run_resumes_total",
+    "Websocket run resume attempts",
+    ["result"],
+)
+ws_outbound_bytes_total = Counter(
+    "ws_outbound_bytes_total",
+    "Encoded websocket payload bytes written to clients",
+    ["encoding"],
+)
 agent_calls_total = Counter(
     "agent_calls_total",
     "Total agent calls",
@@ -25,3 +83,88 @@ agent_call_duration_seconds = Histogram(
     "agent_call_duration_seconds",
     "Agent call duration (seconds)",
 )
+
+state_cache_requests_total = Counter(
+    "state_cache_requests_total",
+    "State cache lookups by kind (snapshot, profile) and result (hit, miss, stale)",
+    labelnames=["kind", "result"],
+)
+run_context_stage_seconds = Histogram(
+    "run_context_stage_seconds",
+    "Pre-agent context assembly per stage (persist_message, projection, profile, total) (seconds)",
+    labelnames=["stage"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+chat_time_to_first_token_seconds = Histogram(
+    "chat_time_to_first_token_seconds",
+    "Time from run start (audit: from the agent call) to the first assistant text delta (seconds)",
+    labelnames=["mode"],
+    buckets=(0.1, 0.25, 0.5, 0.75, 1.0, 1.5, 2.0, 3.0, 5.0, 8.0, 13.0, 20.0, 30.0),
+)
+
+agent_http_pool_connections = Gauge(
+    "agent_http_pool_connections",
+    "Open connections in the shared agent HTTP pool",
+    labelnames=["state"],
+)
+agent_http_pool_max_connections = Gauge(
+    "agent_http_pool_max_connections",
+    "Configured connection limit of the shared agent HTTP pool",
+)
+agent_http_requests_in_flight = Gauge(
+    "agent_http_requests_in_flight",
+    "Agent /run streams currently open",
+)
+agent_http_pool_wait_seconds = Histogram(
+    "agent_http_pool_wait_seconds",
+    "Time to get a connection from the agent HTTP pool, including connect (seconds)",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+
+event_append_batch_size = Histogram(
+    "event_append_batch_size",
+    "Events written per group-commit batch",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256),
+)
+event_append_commit_duration_seconds = Histogram(
+    "event_append_commit_duration_seconds",
+    "Group-commit batch INSERT + COMMIT duration (seconds)",
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+)
+event_append_wait_seconds = Histogram(
+    "event_append_wait_seconds",
+    "Time from batched append call to durable commit (seconds)",
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+)
+
+audit_sessions_active = Gauge(
+    "audit_sessions_active",
+    "Audit run sessions held by this process",
+)
+audit_pending_approvals = Gauge(
+    "audit_pending_approvals",
+    "Audit decisions currently being awaited",
+    ["kind"],
+)
+audit_approval_wait_seconds = Histogram(
+    "audit_approval_wait_seconds",
+    "Time spent waiting for an audit decision (seconds)",
+    ["kind", "outcome"],
+    buckets=(0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800),
+)
+audit_approval_timeouts_total = Counter(
+    "audit_approval_timeouts_total",
+    "Audit decisions that hit their deadline and got the default decision",
+    ["kind"],
+)
+audit_sessions_evicted_total = Counter(
+    "audit_sessions_evicted_total",
+    "Audit run sessions evicted before end_run",
+    ["reason"],
+)
+
+agent_token_verifications_total = Counter(
+    "agent_token_verifications_total",
+    "Agent JWT checks on internal endpoints by result (verified, cached, rejected)",
+    labelnames=["result"],
+)
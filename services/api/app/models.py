@@ -26,13 +26,68 @@ class EventRow(Base):
     __tablename__ = "events"
 
     id: Mapped[UUID] = mapped_column(UUID(as_uuid=True), primary_key=True)
-    ts: Mapped[sa.DateTime] = mapped_column(sa.DateTime(timezone=True), nullable=False)
+    # Partition key (monthly RANGE partitions), hence part of the primary key.
+    ts: Mapped[sa.DateTime] = mapped_column(sa.DateTime(timezone=True), primary_key=True)
     type: Mapped[str] = mapped_column(sa.Text, nullable=False)
     user_id: Mapped[UUID | None] = mapped_column(UUID(as_uuid=True), nullable=True)
     session_id: Mapped[str | None] = mapped_column(sa.Text, nullable=True)
     payload: Mapped[dict] = mapped_column(JSONB, nullable=False)
 
 
+class EventArchiveRow(Base):
+    """A monthly `events` partition that was detached and written to a file."""
+
+    __tablename__ = "event_archives"
+
+    partition_name: Mapped[str] = mapped_column(sa.Text, primary_key=True)
+    range_start: Mapped[sa.DateTime] = mapped_column(sa.DateTime(timezone=True), nullable=False)
+    range_end: Mapped[sa.DateTime] = mapped_column(sa.DateTime(timezone=True), nullable=False)
+    path: Mapped[str] = mapped_column(sa.Text, nullable=False)
+    row_count: Mapped[int] = mapped_column(sa.BigInteger, nullable=False)
+    archived_at: Mapped[sa.DateTime] = mapped_column(sa.DateTime(timezone=True), nullable=False)
+
+
+class ProjectionCheckpointRow(Base):
+    """Persisted `project_state` snapshot for a user (optionally scoped to a session).
+
+    `session_key` is "" for the user-wide projection and the session id otherwise.
+    `view` is "" for the full projection, or names a filtered one (see
+    `ProjectionsService.load(exclude_types=...)`).
+    """
+
+    __tablename__ = "projection_checkpoints"
+
+    user_id: Mapped[UUID] = mapped_column(UUID(as_uuid=True), primary_key=True)
+    session_key: Mapped[str] = mapped_column(sa.Text, primary_key=True)
+    view: Mapped[str] = mapped_column(sa.Text, primary_key=True, server_default="")
+    version: Mapped[int] = mapped_column(sa.Integer, nullable=False)
+    last_event_id: Mapped[UUID] = mapped_column(UUID(as_uuid=True), nullable=False)
+    last_event_ts: Mapped[sa.DateTime] = mapped_column(sa.DateTime(timezone=True), nullable=False)
+    events_count: Mapped[int] = mapped_column(sa.Integer, nullable=False)
+    state: Mapped[dict] = mapped_column(JSONB, nullable=False)
+    updated_at: Mapped[sa.DateTime] = mapped_column(sa.DateTime(timezone=True), nullable=False)
+
+
+class AuditMessageRow(Base):
+    """Cross-worker audit coordination record (see `PostgresAuditCoordinator`).
+
+    `kind` is "run" (registration, body = policy), "stage" / "assistant" / "tool"
+    (a decision, body = the decision fields) or "frame" (a websocket frame for the
+    worker holding the run's socket).
+    """
+
+    __tablename__ = "audit_messages"
+
+    id: Mapped[int] = mapped_column(sa.BigInteger, sa.Identity(), primary_key=True)
+    user_id: Mapped[UUID] = mapped_column(UUID(as_uuid=True), nullable=False)
+    thread_id: Mapped[str] = mapped_column(sa.Text, nullable=False)
+    run_id: Mapped[str] = mapped_column(sa.Text, nullable=False)
+    kind: Mapped[str] = mapped_column(sa.Text, nullable=False)
+    tool_call_id: Mapped[str] = mapped_column(sa.Text, nullable=False, server_default="")
+    body: Mapped[dict] = mapped_column(JSONB, nullable=False)
+    created_at: Mapped[sa.DateTime] = mapped_column(sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now())
+
+
 class ProfileRow(Base):
     __tablename__ = "profiles"
 
@@ -61,9 +116,27 @@ class ProfileRow(Base):
 
 # Keep indexes defined here so Alembic autogenerate can detect them.
 sa.Index("users_provider_subject_ux", UserRow.provider, UserRow.provider_subject, unique=True)
-sa.Index("events_user_id_idx", EventRow.user_id)
-sa.Index("events_user_session_idx", EventRow.user_id, EventRow.session_id)
+sa.Index("events_user_ts_idx", EventRow.user_id, EventRow.ts, EventRow.id)
+sa.Index(
+    "events_user_session_type_ts_idx",
+    EventRow.user_id,
+    EventRow.session_id,
+    EventRow.type,
+    EventRow.ts,
+)
 sa.Index("events_ts_idx", EventRow.ts)
 sa.Index("events_type_idx", EventRow.type)
 
 sa.Index("profiles_user_id_ux", ProfileRow.user_id, unique=True)
+
+sa.Index(
+    "audit_messages_decision_ux",
+    AuditMessageRow.user_id,
+    AuditMessageRow.thread_id,
+    AuditMessageRow.run_id,
+    AuditMessageRow.kind,
+    AuditMessageRow.tool_call_id,
+    unique=True,
+    postgresql_where=sa.text("kind <> 'frame'"),
+)
+sa.Index("audit_messages_created_at_idx", AuditMessageRow.created_at)
@@ -1,8 +1,7 @@
 from __future__ import annotations
 
-import json
 from dataclasses import dataclass
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Optional, Union
 
 
 @dataclass(frozen=True)
@@ -19,22 +18,97 @@ class ClientRunAgentInput:
     forwarded_props: Optional[Dict[str, Any]]
 
 
-def parse_client_envelope(raw: str) -> ClientRunAgentInput:
-    """Parse/validate inbound websocket messages.
+@dataclass(frozen=True)
+class ClientControlMessage:
+    """Approval / cancellation message for an existing run.
+
+    Shape: {"type": "...", "threadId": "...", "runId": "...", ...type-specific fields}
+    """
+
+    type: str
+    thread_id: str
+    run_id: str
+    tool_call_id: Optional[str] = None
+    reason: str = ""
+    payload_edits: Optional[Dict[str, Any]] = None
+    args_override: Optional[Dict[str, Any]] = None
+    final_text: str = ""
+
+
+CONTROL_MESSAGE_TYPES = frozenset(
+    {
+        "RUN_CANCEL",
+        "RUN_STAGE_APPROVED",
+        "RUN_STAGE_DENIED",
+        "TOOL_CALL_APPROVED",
+        "TOOL_CALL_DENIED",
+        "ASSISTANT_FINAL_APPROVED",
+        "ASSISTANT_FINAL_DENIED",
+    }
+)
+
+
+@dataclass(frozen=True)
+class ClientHeartbeat:
+    """{"type": "PONG"}: the client's answer to a server PING."""
+
+
+ClientMessage = Union[ClientRunAgentInput, ClientControlMessage, ClientHeartbeat]
+
+
+def _optional_dict(value: Any) -> Optional[Dict[str, Any]]:
+    return value if isinstance(value, dict) else None
+
 
-    We accept an AG-UI-compatible RunAgentInput shape over WebSockets.
+def _str_or_empty(value: Any) -> str:
+    return value if isinstance(value, str) else ""
 
-    Expected minimal shape:
-    - {"threadId": "...", "runId": "...", "message": "...", "forwardedProps": {...}}
+
+def parse_client_message(payload: Any) -> Optional[ClientMessage]:
+    """Type an already-decoded inbound websocket message in one pass.
+
+    PONG (heartbeat reply) returns ClientHeartbeat. Control messages (see
+    CONTROL_MESSAGE_TYPES) without string threadId/runId, or tool decisions
+    without a toolCallId, return None and are ignored.
+    Anything else must be an AG-UI RunAgentInput:
+    {"threadId": "...", "runId": "...", "message": "...", "forwardedProps": {...}}
 
     Raises ValueError with a user-friendly error message.
     """
 
-    try:
-        payload = json.loads(raw)
-    except json.JSONDecodeError:
-        raise ValueError("invalid json")
+    if not isinstance(payload, dict):
+        raise ValueError("invalid payload")
+
+    msg_type = payload.get("type")
+    if msg_type == "PONG":
+        return ClientHeartbeat()
+    if msg_type not in CONTROL_MESSAGE_TYPES:
+        return _parse_run_input(payload)
+
+    thread_id = payload.get("threadId")
+    run_id = payload.get("runId")
+    if not isinstance(thread_id, str) or not isinstance(run_id, str):
+        return None
+
+    tool_call_id = payload.get("toolCallId")
+    if not isinstance(tool_call_id, str) or not tool_call_id.strip():
+        if msg_type in ("TOOL_CALL_APPROVED", "TOOL_CALL_DENIED"):
+            return None
+        tool_call_id = None
+
+    return ClientControlMessage(
+        type=msg_type,
+        thread_id=thread_id,
+        run_id=run_id,
+        tool_call_id=tool_call_id,
+        reason=_str_or_empty(payload.get("reason")),
+        payload_edits=_optional_dict(payload.get("payloadEdits")),
+        args_override=_optional_dict(payload.get("argsOverride")),
+        final_text=_str_or_empty(payload.get("finalText")),
+    )
+
 
+def _parse_run_input(payload: Any) -> ClientRunAgentInput:
     if not isinstance(payload, dict):
         raise ValueError("invalid payload")
 
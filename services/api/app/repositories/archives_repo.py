@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+import time
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.events import now_utc
+from app.models import EventArchiveRow
+
+# Archival runs rarely (monthly at most), so the list of archived ranges is
+# cached briefly instead of being queried on every projection load. The archive
+# command waits this long before detaching an archived partition.
+ARCHIVES_CACHE_TTL_SECONDS = 60.0
+_cache: Optional[Tuple[float, List[EventArchiveRow]]] = None
+
+
+class ArchivesRepository:
+    async def list(self, session: AsyncSession, *, use_cache: bool = True) -> List[EventArchiveRow]:
+        global _cache
+        if use_cache and _cache is not None and time.monotonic() - _cache[0] < ARCHIVES_CACHE_TTL_SECONDS:
+            return _cache[1]
+
+        stmt = select(EventArchiveRow).order_by(EventArchiveRow.range_start.asc())
+        result = await session.execute(stmt)
+        rows = list(result.scalars().all())
+        _cache = (time.monotonic(), rows)
+        return rows
+
+    async def record(
+        self,
+        session: AsyncSession,
+        *,
+        partition_name: str,
+        range_start: datetime,
+        range_end: datetime,
+        path: str,
+        row_count: int,
+    ) -> None:
+        global _cache
+        stmt = (
+            insert(EventArchiveRow)
+            .values(
+                partition_name=partition_name,
+                range_start=range_start,
+                range_end=range_end,
+                path=path,
+                row_count=row_count,
+                archived_at=now_utc(),
+            )
+            .on_conflict_do_update(
+                index_elements=[EventArchiveRow.partition_name],
+                set_={"path": path, "row_count": row_count, "archived_at": now_utc()},
+            )
+        )
+        await session.execute(stmt)
+        _cache = None
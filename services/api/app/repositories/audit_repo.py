@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+import json
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import AuditMessageRow
+
+# NOTIFY channel carrying pointers to new audit_messages rows.
+AUDIT_CHANNEL = "audit_messages"
+
+
+class AuditMessagesRepository:
+    async def insert(
+        self,
+        session: AsyncSession,
+        *,
+        user_id: uuid.UUID,
+        thread_id: str,
+        run_id: str,
+        kind: str,
+        body: Dict[str, Any],
+        tool_call_id: str = "",
+        upsert: bool = False,
+    ) -> Optional[int]:
+        """Insert a row and NOTIFY its id (delivered on commit).
+
+        For run registrations and decisions an existing row wins unless `upsert`;
+        returns None when nothing was written.
+        """
+
+        values = {
+            "user_id": user_id,
+            "thread_id": thread_id,
+            "run_id": run_id,
+            "kind": kind,
+            "tool_call_id": tool_call_id,
+            "body": body,
+        }
+        stmt = insert(AuditMessageRow).values(**values)
+        if kind != "frame":
+            conflict = {
+                "index_elements": [
+                    AuditMessageRow.user_id,
+                    AuditMessageRow.thread_id,
+                    AuditMessageRow.run_id,
+                    AuditMessageRow.kind,
+                    AuditMessageRow.tool_call_id,
+                ],
+                "index_where": AuditMessageRow.kind != "frame",
+            }
+            if upsert:
+                stmt = stmt.on_conflict_do_update(set_={"body": body, "created_at": func.now()}, **conflict)
+            else:
+                stmt = stmt.on_conflict_do_nothing(**conflict)
+        result = await session.execute(stmt.returning(AuditMessageRow.id))
+        row_id = result.scalar_one_or_none()
+        if row_id is None:
+            return None
+
+        pointer = {
+            "id": row_id,
+            "k": kind,
+            "u": str(user_id),
+            "t": thread_id,
+            "r": run_id,
+            "c": tool_call_id,
+        }
+        await session.execute(select(func.pg_notify(AUDIT_CHANNEL, json.dumps(pointer, separators=(",", ":")))))
+        return row_id
+
+    async def find(
+        self,
+        session: AsyncSession,
+        *,
+        user_id: uuid.UUID,
+        thread_id: str,
+        run_id: str,
+        kind: str,
+        tool_call_id: str = "",
+    ) -> Optional[AuditMessageRow]:
+        stmt = select(AuditMessageRow).where(
+            (AuditMessageRow.user_id == user_id)
+            & (AuditMessageRow.thread_id == thread_id)
+            & (AuditMessageRow.run_id == run_id)
+            & (AuditMessageRow.kind == kind)
+            & (AuditMessageRow.tool_call_id == tool_call_id)
+        )
+        result = await session.execute(stmt)
+        return result.scalars().first()
+
+    async def take_frames(
+        self,
+        session: AsyncSession,
+        *,
+        user_id: uuid.UUID,
+        thread_id: str,
+        run_id: str,
+    ) -> List[Dict[str, Any]]:
+        """Delete and return a run's relayed frames, oldest first."""
+
+        stmt = (
+            delete(AuditMessageRow)
+            .where(
+                (AuditMessageRow.user_id == user_id)
+                & (AuditMessageRow.thread_id == thread_id)
+                & (AuditMessageRow.run_id == run_id)
+                & (AuditMessageRow.kind == "frame")
+            )
+            .returning(AuditMessageRow.id, AuditMessageRow.body)
+        )
+        result = await session.execute(stmt)
+        return [body for _id, body in sorted(result.all(), key=lambda r: r[0])]
+
+    async def delete_run(self, session: AsyncSession, *, user_id: uuid.UUID, thread_id: str, run_id: str) -> int:
+        stmt = delete(AuditMessageRow).where(
+            (AuditMessageRow.user_id == user_id)
+            & (AuditMessageRow.thread_id == thread_id)
+            & (AuditMessageRow.run_id == run_id)
+        )
+        result = await session.execute(stmt)
+        return int(result.rowcount or 0)
+
+    async def delete_older_than(self, session: AsyncSession, *, cutoff: datetime) -> int:
+        result = await session.execute(delete(AuditMessageRow).where(AuditMessageRow.created_at < cutoff))
+        return int(result.rowcount or 0)
@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import uuid
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from sqlalchemy import delete, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.events import now_utc
+from app.models import ProjectionCheckpointRow
+
+
+def session_key(session_id: Optional[str]) -> str:
+    # "" is the user-wide projection (all sessions).
+    return session_id or ""
+
+
+class CheckpointsRepository:
+    async def get(
+        self,
+        session: AsyncSession,
+        *,
+        user_id: uuid.UUID,
+        session_id: Optional[str],
+        view: str = "",
+    ) -> Optional[ProjectionCheckpointRow]:
+        stmt = select(ProjectionCheckpointRow).where(
+            (ProjectionCheckpointRow.user_id == user_id)
+            & (ProjectionCheckpointRow.session_key == session_key(session_id))
+            & (ProjectionCheckpointRow.view == view)
+        )
+        result = await session.execute(stmt)
+        return result.scalars().first()
+
+    async def upsert(
+        self,
+        session: AsyncSession,
+        *,
+        user_id: uuid.UUID,
+        session_id: Optional[str],
+        view: str = "",
+        version: int,
+        last_event_id: uuid.UUID,
+        last_event_ts: datetime,
+        events_count: int,
+        state: Dict[str, Any],
+    ) -> None:
+        values = {
+            "version": version,
+            "last_event_id": last_event_id,
+            "last_event_ts": last_event_ts,
+            "events_count": events_count,
+            "state": state,
+            "updated_at": now_utc(),
+        }
+        stmt = (
+            insert(ProjectionCheckpointRow)
+            .values(user_id=user_id, session_key=session_key(session_id), view=view, **values)
+            .on_conflict_do_update(
+                index_elements=[
+                    ProjectionCheckpointRow.user_id,
+                    ProjectionCheckpointRow.session_key,
+                    ProjectionCheckpointRow.view,
+                ],
+                set_=values,
+                # Never move a checkpoint backwards (concurrent refreshers), unless the
+                # stored one was written by a different reducer version.
+                where=(ProjectionCheckpointRow.events_count <= events_count)
+                | (ProjectionCheckpointRow.version != version),
+            )
+        )
+        await session.execute(stmt)
+
+    async def delete_all(self, session: AsyncSession, *, user_id: Optional[uuid.UUID] = None) -> int:
+        stmt = delete(ProjectionCheckpointRow)
+        if user_id is not None:
+            stmt = stmt.where(ProjectionCheckpointRow.user_id == user_id)
+        result = await session.execute(stmt)
+        return int(result.rowcount or 0)
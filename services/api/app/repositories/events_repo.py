@@ -1,16 +1,100 @@
 from __future__ import annotations
 
+import os
 import uuid
-from typing import List, Optional
+from datetime import datetime
+from typing import Any, AsyncIterator, List, Optional, Sequence, Tuple
 
-from sqlalchemy import select
+from sqlalchemy import Select, func, insert, select, tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.event_archive import iter_archive
 from app.events import Event, now_utc
 from app.models import EventRow
+from app.repositories.archives_repo import ArchivesRepository
+
+# Rows fetched per round trip by the streaming readers (server-side cursor).
+STREAM_BATCH_SIZE = int(os.getenv("EVENTS_STREAM_BATCH_SIZE", "500") or 500)
+
+EventCursor = Tuple[datetime, uuid.UUID]
+# (event count, newest ts) of a stream; see `EventsRepository.version`.
+StreamVersion = Tuple[int, Optional[datetime]]
+
+
+def event_from_row(r: Any) -> Event:
+    # Works for both EventRow entities and plain column rows. JSONB values are
+    # decoded into a fresh dict per row, so no defensive copy is needed.
+    return Event(
+        id=str(r.id),
+        ts=r.ts,
+        type=r.type,
+        userId=str(r.user_id) if r.user_id else None,
+        sessionId=r.session_id,
+        payload=r.payload,
+    )
+
+
+def _event_columns() -> Select:
+    # Plain column rows: no ORM identity map / instance state per streamed row.
+    return select(
+        EventRow.id,
+        EventRow.ts,
+        EventRow.type,
+        EventRow.user_id,
+        EventRow.session_id,
+        EventRow.payload,
+    )
+
+
+def _filter_types(
+    stmt: Select,
+    include_types: Optional[Sequence[str]],
+    exclude_types: Optional[Sequence[str]],
+) -> Select:
+    # Served by events_user_session_type_ts_idx (user_id, session_id, type, ts).
+    if include_types is not None:
+        stmt = stmt.where(EventRow.type.in_(list(include_types)))
+    if exclude_types:
+        stmt = stmt.where(EventRow.type.not_in(list(exclude_types)))
+    return stmt
+
+
+def _ordered(stmt: Select) -> Select:
+    return stmt.order_by(EventRow.ts.asc(), EventRow.id.asc())
+
+
+def event_cursor(ev: Event) -> EventCursor:
+    """Keyset position of an event (pass back as `after=`)."""
+
+    return (ev.ts, uuid.UUID(ev.id))
+
+
+def _matches(
+    ev: Event,
+    *,
+    user_id: str,
+    session_id: Optional[str],
+    after: Optional[EventCursor],
+    include_types: Optional[Sequence[str]],
+    exclude_types: Optional[Sequence[str]],
+) -> bool:
+    if ev.userId != user_id:
+        return False
+    if session_id is not None and ev.sessionId != session_id:
+        return False
+    if include_types is not None and ev.type not in include_types:
+        return False
+    if exclude_types and ev.type in exclude_types:
+        return False
+    if after is not None and event_cursor(ev) <= after:
+        return False
+    return True
 
 
 class EventsRepository:
+    def __init__(self, archives: Optional[ArchivesRepository] = None):
+        self._archives = archives or ArchivesRepository()
+
     async def append(
         self,
         session: AsyncSession,
@@ -43,93 +127,139 @@ class EventsRepository:
             payload=payload,
         )
 
-    async def list_all(self, session: AsyncSession) -> List[Event]:
-        stmt = select(EventRow).order_by(EventRow.ts.asc(), EventRow.id.asc())
-        result = await session.execute(stmt)
-        rows = result.scalars().all()
-
-        events: List[Event] = []
-        for r in rows:
-            events.append(
-                Event(
-                    id=str(r.id),
-                    ts=r.ts,
-                    type=r.type,
-                    userId=str(r.user_id) if r.user_id else None,
-                    sessionId=r.session_id,
-                    payload=dict(r.payload),
-                )
-            )
-        return events
-
-    async def list_by_user(self, session: AsyncSession, *, user_id: uuid.UUID) -> List[Event]:
-        stmt = (
-            select(EventRow)
-            .where(EventRow.user_id == user_id)
-            .order_by(EventRow.ts.asc(), EventRow.id.asc())
+    async def append_many(self, session: AsyncSession, *, events: Sequence[Event]) -> None:
+        """Insert pre-built events (ids and ts already assigned) as one multi-row INSERT."""
+
+        if not events:
+            return
+        await session.execute(
+            insert(EventRow),
+            [
+                {
+                    "id": uuid.UUID(ev.id),
+                    "ts": ev.ts,
+                    "type": ev.type,
+                    "user_id": uuid.UUID(ev.userId) if ev.userId else None,
+                    "session_id": ev.sessionId,
+                    "payload": ev.payload,
+                }
+                for ev in events
+            ],
         )
-        result = await session.execute(stmt)
-        rows = result.scalars().all()
-
-        events: List[Event] = []
-        for r in rows:
-            events.append(
-                Event(
-                    id=str(r.id),
-                    ts=r.ts,
-                    type=r.type,
-                    userId=str(r.user_id) if r.user_id else None,
-                    sessionId=r.session_id,
-                    payload=dict(r.payload),
-                )
-            )
-        return events
-
-    async def list_by_user_session(
-        self, session: AsyncSession, *, user_id: uuid.UUID, session_id: str
-    ) -> List[Event]:
-        stmt = (
-            select(EventRow)
-            .where(EventRow.user_id == user_id)
-            .where(EventRow.session_id == session_id)
-            .order_by(EventRow.ts.asc(), EventRow.id.asc())
+
+    # --- Streaming reader ----------------------------------------------------
+    #
+    # Iterates a server-side cursor in STREAM_BATCH_SIZE chunks, so peak memory
+    # is bounded by the batch size rather than the user's log length. The
+    # cursor lives inside the session's transaction: do not commit the session
+    # until the iterator is exhausted or closed.
+
+    async def stream_history(
+        self,
+        session: AsyncSession,
+        *,
+        user_id: uuid.UUID,
+        session_id: Optional[str],
+        after: Optional[EventCursor] = None,
+        include_types: Optional[Sequence[str]] = None,
+        exclude_types: Optional[Sequence[str]] = None,
+    ) -> AsyncIterator[Event]:
+        """Events of a user (optionally one session) strictly after `(ts, id)`, oldest first.
+
+        Covers partitions archived to files as well as the `events` table.
+
+        Archived months strictly older than `after` are skipped without being
+        opened, so a caller resuming from a recent cursor pays one (cached)
+        lookup. Otherwise each relevant archive file is scanned in full; this is
+        the slow path for rare historical reads.
+
+        A partition stays attached for a while after its archive is recorded;
+        rows in archived ranges are read from the archive only.
+        """
+
+        uid = str(user_id)
+        archives = await self._archives.list(session)
+        for archive in archives:
+            if after is not None and archive.range_end <= after[0]:
+                continue
+            async for ev in iter_archive(archive.path):
+                if _matches(
+                    ev,
+                    user_id=uid,
+                    session_id=session_id,
+                    after=after,
+                    include_types=include_types,
+                    exclude_types=exclude_types,
+                ):
+                    yield ev
+
+        stmt = self._user_stmt(
+            user_id=user_id,
+            session_id=session_id,
+            after=after,
+            include_types=include_types,
+            exclude_types=exclude_types,
         )
-        result = await session.execute(stmt)
-        rows = result.scalars().all()
-
-        events: List[Event] = []
-        for r in rows:
-            events.append(
-                Event(
-                    id=str(r.id),
-                    ts=r.ts,
-                    type=r.type,
-                    userId=str(r.user_id) if r.user_id else None,
-                    sessionId=r.session_id,
-                    payload=dict(r.payload),
-                )
-            )
-        return events
-
-    async def list_by_session(self, session: AsyncSession, *, session_id: str) -> List[Event]:
+        if archives:
+            # Archival always takes the oldest months, so one lower bound covers them.
+            stmt = stmt.where(EventRow.ts >= max(a.range_end for a in archives))
+        async for ev in self._stream(session, stmt):
+            yield ev
+
+    async def version(
+        self,
+        session: AsyncSession,
+        *,
+        user_id: uuid.UUID,
+        session_id: Optional[str],
+        exclude_types: Optional[Sequence[str]] = None,
+    ) -> StreamVersion:
+        """(event count, newest ts) of the user (or user+session) stream, from the index alone.
+
+        Changes whenever an event commits, including one that commits late with
+        an earlier `ts` than events already visible, which the newest (ts, id)
+        alone would miss.
+        """
+
+        stmt = select(func.count(), func.max(EventRow.ts)).where(EventRow.user_id == user_id)
+        if session_id is not None:
+            stmt = stmt.where(EventRow.session_id == session_id)
+        stmt = _filter_types(stmt, None, exclude_types)
+        count, newest = (await session.execute(stmt)).one()
+        return int(count), newest
+
+    async def list_scopes(self, session: AsyncSession) -> List[Tuple[uuid.UUID, Optional[str]]]:
+        """Distinct (user_id, session_id) pairs that have events."""
+
         stmt = (
-            select(EventRow)
-            .where(EventRow.session_id == session_id)
-            .order_by(EventRow.ts.asc(), EventRow.id.asc())
+            select(EventRow.user_id, EventRow.session_id)
+            .where(EventRow.user_id.is_not(None))
+            .distinct()
         )
         result = await session.execute(stmt)
-        rows = result.scalars().all()
-
-        events: List[Event] = []
-        for r in rows:
-            events.append(
-                Event(
-                    id=str(r.id),
-                    ts=r.ts,
-                    type=r.type,
-                    userId=str(r.user_id) if r.user_id else None,
-                    sessionId=r.session_id,
-                    payload=dict(r.payload),
-                )
-            )
-        return events
+        return [(r[0], r[1]) for r in result.all()]
+
+    def _user_stmt(
+        self,
+        *,
+        user_id: uuid.UUID,
+        session_id: Optional[str],
+        after: Optional[EventCursor] = None,
+        include_types: Optional[Sequence[str]] = None,
+        exclude_types: Optional[Sequence[str]] = None,
+    ) -> Select:
+        stmt = _event_columns().where(EventRow.user_id == user_id)
+        if session_id is not None:
+            stmt = stmt.where(EventRow.session_id == session_id)
+        stmt = _filter_types(stmt, include_types, exclude_types)
+        if after is not None:
+            stmt = stmt.where(tuple_(EventRow.ts, EventRow.id) > tuple_(*after))
+        return _ordered(stmt)
+
+    async def _stream(self, session: AsyncSession, stmt: Select) -> AsyncIterator[Event]:
+        result = await session.stream(stmt.execution_options(yield_per=STREAM_BATCH_SIZE))
+        try:
+            async for r in result:
+                yield event_from_row(r)
+        finally:
+            await result.close()
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import uuid
+from datetime import datetime
 from typing import Optional
 
 from sqlalchemy import select
@@ -15,6 +16,11 @@ class ProfilesRepository:
         result = await session.execute(stmt)
         return result.scalars().first()
 
+    async def get_updated_at(self, session: AsyncSession, *, user_id: uuid.UUID) -> Optional[datetime]:
+        stmt = select(ProfileRow.updated_at).where(ProfileRow.user_id == user_id)
+        result = await session.execute(stmt)
+        return result.scalars().first()
+
     async def upsert_by_user(
         self,
         session: AsyncSession,
@@ -3,13 +3,15 @@ from __future__ import annotations
 import hashlib
 import json
 import time
-from typing import Any, Dict, List
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
 
-from fastapi import APIRouter, Header, HTTPException
+from fastapi import APIRouter, Header, HTTPException, Response
 
 from app.agent_auth import require_agent_auth
 from app.agentic.openai_tools import openai_tools
 from app.agentic.table_cards import generate_table_card_markdown
+from app.http_cache import etag_matches
 from app.resources.registry import RESOURCE_DEFS
 
 router = APIRouter(tags=["capabilities"])
@@ -40,14 +42,28 @@ def _table_cards() -> List[Dict[str, Any]]:
     return cards
 
 
-@router.get("/capabilities")
-def capabilities(authorization: str | None = Header(default=None)) -> Dict[str, Any]:
-    require_agent_auth(authorization)
+@dataclass(frozen=True)
+class _CapabilitiesDocument:
+    sha256: str
+    etag: str
+    # The serialized response body.
+    body: bytes
+
+
+_document: Optional[_CapabilitiesDocument] = None
+
+
+def _capabilities_document() -> _CapabilitiesDocument:
+    """Built once per process: tools and table cards only change with the code."""
+
+    global _document
+    if _document is not None:
+        return _document
 
     tools = openai_tools()
     table_cards = _table_cards()
 
-    # A stable-ish hash for change detection.
+    # Content hash for change detection (and the ETag); `generatedAt` is not part of it.
     payload = {
         "tools": tools,
         "tableCards": table_cards,
@@ -55,10 +71,29 @@ def capabilities(authorization: str | None = Header(default=None)) -> Dict[str,
     raw = json.dumps(payload, sort_keys=True, ensure_ascii=False).encode("utf-8")
     sha256 = hashlib.sha256(raw).hexdigest()
 
-    return {
-        "version": 1,
-        "generatedAt": int(time.time()),
-        "sha256": sha256,
-        "tools": tools,
-        "tableCards": table_cards,
-    }
+    body = json.dumps(
+        {
+            "version": 1,
+            "generatedAt": int(time.time()),
+            "sha256": sha256,
+            "tools": tools,
+            "tableCards": table_cards,
+        },
+        ensure_ascii=False,
+    ).encode("utf-8")
+    _document = _CapabilitiesDocument(sha256=sha256, etag=f'"{sha256}"', body=body)
+    return _document
+
+
+@router.get("/capabilities")
+def capabilities(
+    authorization: str | None = Header(default=None),
+    if_none_match: str | None = Header(default=None),
+) -> Response:
+    require_agent_auth(authorization)
+
+    document = _capabilities_document()
+    headers = {"ETag": document.etag, "Cache-Control": "no-cache"}
+    if etag_matches(if_none_match, document.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=document.body, media_type="application/json", headers=headers)
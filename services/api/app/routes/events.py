@@ -1,15 +1,22 @@
 from __future__ import annotations
 
-from typing import Any, Dict, Optional
+import hashlib
+import uuid
+from datetime import datetime
+from typing import Any, Dict, Optional, Union
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, Response
 from pydantic import BaseModel, Field
 
 from app.auth import AuthUser, get_current_user
-from app.events import project_state
-from app.repositories.events_repo import EventsRepository
+from app.events import PROJECTION_VERSION
+from app.http_cache import etag_matches
+from app.repositories.checkpoints_repo import CheckpointsRepository
+from app.repositories.events_repo import EventsRepository, StreamVersion
 from app.repositories.profiles_repo import ProfilesRepository
 from app.services.profiles_service import profile_row_to_dict
+from app.services.projections_service import ProjectionsService
+from app.services.state_cache import get_state_cache
 from app.uow import UnitOfWork
 from app.deps import get_uow
 
@@ -36,9 +43,14 @@ def get_profiles_repo() -> ProfilesRepository:
     return ProfilesRepository()
 
 
+def get_projections() -> ProjectionsService:
+    return ProjectionsService(events_repo=EventsRepository(), checkpoints_repo=CheckpointsRepository())
+
+
 @router.post("/events", response_model=EventAck)
 async def append_event(
     event: EventIn,
+    request: Request,
     uow: UnitOfWork = Depends(get_uow),
     repo: EventsRepository = Depends(get_events_repo),
     user: AuthUser = Depends(get_current_user),
@@ -51,32 +63,74 @@ async def append_event(
         session_id=event.sessionId,
     )
     await uow.commit()
+
+    state_cache = get_state_cache(request.app)
+    if state_cache is not None:
+        state_cache.invalidate_events(user_id=user.id, session_id=event.sessionId, type=event.type)
     return EventAck(id=created.id, ts=created.ts.isoformat(), type=created.type)
 
 
-@router.get("/state")
+def _state_etag(
+    *,
+    user_id: uuid.UUID,
+    session_id: Optional[str],
+    events_version: StreamVersion,
+    profile_updated_at: Optional[datetime],
+) -> str:
+    events_count, newest_ts = events_version
+    key = "|".join(
+        [
+            str(PROJECTION_VERSION),
+            str(user_id),
+            session_id or "",
+            str(events_count),
+            newest_ts.isoformat() if newest_ts else "",
+            profile_updated_at.isoformat() if profile_updated_at else "",
+        ]
+    )
+    return '"' + hashlib.sha256(key.encode("utf-8")).hexdigest()[:32] + '"'
+
+
+@router.get("/state", response_model=None)
 async def get_state(
+    response: Response,
     sessionId: Optional[str] = None,
+    if_none_match: Optional[str] = Header(default=None),
     uow: UnitOfWork = Depends(get_uow),
-    repo: EventsRepository = Depends(get_events_repo),
+    events_repo: EventsRepository = Depends(get_events_repo),
+    projections: ProjectionsService = Depends(get_projections),
     profiles_repo: ProfilesRepository = Depends(get_profiles_repo),
     user: AuthUser = Depends(get_current_user),
-) -> Dict[str, Any]:
-    if sessionId:
-        events = await repo.list_by_user_session(uow.session, user_id=user.id, session_id=sessionId)
-    else:
-        events = await repo.list_by_user(uow.session, user_id=user.id)
-    snapshot = project_state(events)
+) -> Union[Response, Dict[str, Any]]:
+    session_id = sessionId or None
+
+    # Cheap pre-check: two index lookups decide whether the client's copy is
+    # current before any events are read or projected. The ETag is built from
+    # these values (not from the projection) so a race with a concurrent append
+    # can only make the next request miss, never serve a stale 304. The event
+    # count moves with every commit, even one whose `ts` is older than the newest.
+    etag = _state_etag(
+        user_id=user.id,
+        session_id=session_id,
+        events_version=await events_repo.version(uow.session, user_id=user.id, session_id=session_id),
+        profile_updated_at=await profiles_repo.get_updated_at(uow.session, user_id=user.id),
+    )
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+
+    projection = await projections.load(uow.session, user_id=user.id, session_id=session_id)
+    snapshot = projection.state
 
     row = await profiles_repo.get_by_user(uow.session, user_id=user.id)
     if row is not None:
         snapshot["profile"] = profile_row_to_dict(row)
-    last = events[-1] if events else None
+    response.headers.update(headers)
     return {
         "meta": {
-            "eventsCount": len(events),
-            "lastEventId": last.id if last else None,
-            "lastEventTs": last.ts.isoformat() if last else None,
+            "eventsCount": projection.events_count,
+            "lastEventId": projection.last_event_id,
+            "lastEventTs": projection.last_event_ts.isoformat() if projection.last_event_ts else None,
         },
         "snapshot": snapshot,
     }
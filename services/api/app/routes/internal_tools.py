@@ -2,18 +2,14 @@ from __future__ import annotations
 
 import logging
 import uuid
-from typing import Any, Dict
+from typing import Any, Dict, List, Optional
 
-from fastapi import APIRouter, Header, HTTPException, Request
+from fastapi import APIRouter, Header, HTTPException, Request, Response
 from pydantic import BaseModel, Field
 
 from app.agent_auth import require_agent_auth
-from app.db import get_sessionmaker
-from app.repositories.events_repo import EventsRepository
-from app.repositories.profiles_repo import ProfilesRepository
-from app.services.events_service import EventsService
-from app.services.profiles_service import ProfilesService
-from app.services.tools_service import ToolExecutionError, ToolsService
+from app.services.tool_invoker import ToolInvoker, build_tools_service
+from app.services.tools_service import ToolExecutionError
 
 router = APIRouter(tags=["internal-tools"])
 logger = logging.getLogger("trainer2.api.internal_tools")
@@ -26,6 +22,19 @@ class ToolExecuteRequest(BaseModel):
     args: Dict[str, Any] = Field(default_factory=dict)
 
 
+class ToolInvokeRequest(ToolExecuteRequest):
+    # Set for audit runs: the call needs approval before it executes.
+    runId: Optional[str] = None
+    toolCallId: Optional[str] = None
+
+
+def _parse_user_id(value: str) -> uuid.UUID:
+    try:
+        return uuid.UUID(value)
+    except Exception:
+        raise HTTPException(status_code=400, detail="invalid userId")
+
+
 @router.post("/internal/tools/execute")
 async def execute_tool(
     payload: ToolExecuteRequest,
@@ -33,24 +42,49 @@ async def execute_tool(
     authorization: str | None = Header(default=None),
 ) -> Dict[str, Any]:
     require_agent_auth(authorization)
+    user_id = _parse_user_id(payload.userId)
+    args = payload.args if isinstance(payload.args, dict) else {}
 
+    tools = build_tools_service(request.app)
     try:
-        user_id = uuid.UUID(payload.userId)
-    except Exception:
-        raise HTTPException(status_code=400, detail="invalid userId")
+        return await tools.execute(user_id=user_id, session_id=payload.sessionId, name=payload.name, args=args)
+    except ToolExecutionError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
 
-    session_id = payload.sessionId
-    name = payload.name
-    args = payload.args if isinstance(payload.args, dict) else {}
 
-    repo = EventsRepository()
-    profiles_repo = ProfilesRepository()
-    sessionmaker = get_sessionmaker(request.app)
-    events = EventsService(sessionmaker=sessionmaker, repo=repo)
-    profiles = ProfilesService(sessionmaker=sessionmaker, repo=profiles_repo)
-    tools = ToolsService(events=events, profiles=profiles)
+@router.post("/internal/tools/invoke")
+async def invoke_tool(
+    payload: ToolInvokeRequest,
+    request: Request,
+    response: Response,
+    authorization: str | None = Header(default=None),
+) -> Dict[str, Any]:
+    """Audit preflight and execution in one request (see ToolInvoker).
+
+    The `Server-Timing` header splits the time into preflight and execute.
+    """
+
+    require_agent_auth(authorization)
+    user_id = _parse_user_id(payload.userId)
+    args = payload.args if isinstance(payload.args, dict) else {}
 
     try:
-        return await tools.execute(user_id=user_id, session_id=session_id, name=name, args=args)
+        invocation = await ToolInvoker.from_app(request.app).invoke(
+            user_id=user_id,
+            session_id=payload.sessionId,
+            name=payload.name,
+            args=args,
+            run_id=payload.runId,
+            tool_call_id=payload.toolCallId,
+        )
     except ToolExecutionError as exc:
-        raise HTTPException(status_code=400, detail=str(exc))
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+    timings: List[str] = []
+    if invocation.preflight_seconds is not None:
+        timings.append(f"preflight;dur={invocation.preflight_seconds * 1000:.1f}")
+    if invocation.execute_seconds is not None:
+        timings.append(f"execute;dur={invocation.execute_seconds * 1000:.1f}")
+    if timings:
+        response.headers["Server-Timing"] = ", ".join(timings)
+    return invocation.result
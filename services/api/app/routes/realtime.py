@@ -1,38 +1,53 @@
 from __future__ import annotations
 
 import asyncio
-import json
 import logging
 import os
 import time
-from typing import Any, Dict, Optional
+import uuid
+from typing import Any, Dict, Optional, Set
 
-import httpx
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
 
-from app.clients.agent_client import AgentClient
+from app.clients.agent_client import get_agent_client
 from app.auth import AuthUser, authenticate_token
 from app.audit.coordinator import (
     AssistantDecision,
     AuditPolicy,
     StageDecision,
     ToolDecision,
-    audit_coordinator,
+    get_audit_coordinator,
 )
 from app.db import get_sessionmaker
-from app.events import project_state
-from app.metrics import agent_call_duration_seconds, agent_calls_total, ws_messages_total
-from app.protocol import parse_client_envelope
+from app.metrics import (
+    agent_call_duration_seconds,
+    agent_calls_total,
+    chat_time_to_first_token_seconds,
+    ws_messages_total,
+)
+from app.protocol import ClientControlMessage, ClientHeartbeat, ClientRunAgentInput, parse_client_message
+from app.repositories.checkpoints_repo import CheckpointsRepository
 from app.repositories.events_repo import EventsRepository
 from app.repositories.profiles_repo import ProfilesRepository
 from app.services.chat_service import ChatService
+from app.services.event_batcher import get_event_batcher
 from app.services.events_service import EventsService
-from app.services.profiles_service import ProfilesService
+from app.services.projections_service import ProjectionsService
+from app.services.run_context_service import RunContextService
+from app.services.state_cache import get_state_cache
+from app.ws_admission import Overloaded, get_admission, heartbeat
+from app.ws_codec import Frame, decode_frame, negotiate_codec
+from app.ws_outbox import WebSocketOutbox
+from app.ws_resume import RunStream, get_run_streams, parse_resume_param
+from app.ws_runs import RunRejected, RunScheduler
 
 router = APIRouter(tags=["realtime"])
 
 logger = logging.getLogger("trainer2.api.realtime")
 
+# Event types never folded into the agent context snapshot.
+CONTEXT_EXCLUDED_EVENT_TYPES = ("ChatMessageSent",)
+
 
 @router.websocket("/realtime")
 async def realtime(ws: WebSocket) -> None:
@@ -48,154 +63,248 @@ async def realtime(ws: WebSocket) -> None:
         await ws.close(code=4401)
         return
 
-    agent_base_url = os.getenv("AGENT_BASE_URL", "http://agent:9000")
-
     mode = (ws.query_params.get("mode") or "").strip().lower() or "chat"
     is_audit_mode = mode == "audit"
 
-    timeout = httpx.Timeout(connect=10.0, read=None, write=10.0, pool=10.0)
-    async with httpx.AsyncClient(timeout=timeout) as http:
-        agent = AgentClient(base_url=agent_base_url, http=http)
-        repo = EventsRepository()
-        profiles_repo = ProfilesRepository()
-        sessionmaker = get_sessionmaker(ws.app)
-        events = EventsService(sessionmaker=sessionmaker, repo=repo)
-        profiles = ProfilesService(sessionmaker=sessionmaker, repo=profiles_repo)
-        chat = ChatService(events=events)
-
-        send_lock = asyncio.Lock()
-
-        async def safe_send(payload: Dict[str, Any]) -> None:
-            async with send_lock:
-                await ws.send_json(payload)
-
-        incoming: "asyncio.Queue[str]" = asyncio.Queue()
+    agent = get_agent_client(ws.app)
+    audit_coordinator = get_audit_coordinator(ws.app)
+    repo = EventsRepository()
+    profiles_repo = ProfilesRepository()
+    sessionmaker = get_sessionmaker(ws.app)
+    state_cache = get_state_cache(ws.app)
+    events = EventsService(
+        sessionmaker=sessionmaker,
+        repo=repo,
+        batcher=get_event_batcher(ws.app),
+        state_cache=state_cache,
+    )
+    chat = ChatService(events=events)
+    projections = ProjectionsService(events_repo=repo, checkpoints_repo=CheckpointsRepository())
+    run_context = RunContextService(
+        sessionmaker=sessionmaker,
+        chat=chat,
+        projections=projections,
+        events_repo=repo,
+        profiles_repo=profiles_repo,
+        state_cache=state_cache,
+    )
+
+    # All outbound frames go through one bounded queue and writer task, so a slow
+    # client never blocks the agent stream or audit callbacks.
+    codec = negotiate_codec(ws.query_params.get("encoding"))
+
+    admission = get_admission(ws.app)
+    try:
+        admission.admit_connection(user.id)
+    except Overloaded as exc:
+        frame = codec.encode(exc.frame())
+        if isinstance(frame, bytes):
+            await ws.send_bytes(frame)
+        else:
+            await ws.send_text(frame)
+        await ws.close(code=1013)
+        return
 
-        async def recv_loop() -> None:
+    outbox = WebSocketOutbox.from_env(ws, codec=codec)
+    outbox.start()
+    safe_send = outbox.send
+
+    # Run streams this connection is subscribed to; detached when it closes.
+    run_streams = get_run_streams(ws.app)
+    attached: Set[RunStream] = set()
+
+    resume = parse_resume_param(ws.query_params.get("resume"))
+    if resume is not None:
+        resume_run_id, resume_after_seq = resume
+        resumed = await run_streams.resume(
+            user_id=user.id,
+            run_id=resume_run_id,
+            after_seq=resume_after_seq,
+            send_json=safe_send,
+        )
+        if resumed is not None:
+            attached.add(resumed)
+
+    async def send_run_frame(payload: Dict[str, Any]) -> None:
+        # RUN_CANCELLED for a started run belongs to its numbered stream.
+        stream = run_streams.get(user_id=user.id, run_id=str(payload.get("runId") or ""))
+        if stream is not None:
+            await stream.publish(payload)
+        else:
+            await safe_send(payload)
+
+    # Raw text (JSON) or binary (MessagePack) frames; None marks the end of the connection.
+    incoming: "asyncio.Queue[Optional[Frame]]" = asyncio.Queue()
+    last_seen = time.monotonic()
+
+    async def recv_loop() -> None:
+        nonlocal last_seen
+        try:
             while True:
-                raw_text = await ws.receive_text()
-                await incoming.put(raw_text)
-
-        run_task: Optional[asyncio.Task[None]] = None
-        recv_task = asyncio.create_task(recv_loop())
-
-        async def process_run(raw: str) -> None:
-            try:
-                msg = parse_client_envelope(raw)
-            except ValueError as exc:
-                await safe_send({"type": "RUN_ERROR", "message": str(exc)})
-                return
-
-            ws_messages_total.labels(type="run").inc()
-            thread_id = msg.thread_id
-            run_id = msg.run_id
-
-            ui_context: Dict[str, Any] | None = None
-            if msg.forwarded_props and isinstance(msg.forwarded_props.get("uiContext"), dict):
-                ui_context = msg.forwarded_props.get("uiContext")
-
-            policy = AuditPolicy.from_forwarded_props(msg.forwarded_props)
-            audit_session = None
-
-            try:
-                started = time.perf_counter()
-
-                # Persist the user message immediately so the left chat thread shows it.
-                await chat.persist_user_message(user_id=user.id, session_id=thread_id, message=msg.message)
-
-                # Load state snapshot for this session/thread.
-                async with sessionmaker() as session:
-                    past_events = await repo.list_by_user_session(
-                        session, user_id=user.id, session_id=thread_id
-                    )
-                # Do not include chat message history in the model context.
-                non_chat_events = [e for e in past_events if e.type != "ChatMessageSent"]
-                snapshot = project_state(non_chat_events)
-
-                # Prefer SQL-backed profile over event-sourced payload.
-                profile = await profiles.get_profile_dict(user_id=user.id)
-                if profile is not None:
-                    snapshot["profile"] = profile
+                message = await ws.receive()
+                if message["type"] == "websocket.disconnect":
+                    break
+                last_seen = time.monotonic()
+                frame = message.get("text")
+                if frame is None:
+                    frame = message.get("bytes")
+                if frame is not None:
+                    await incoming.put(frame)
+        except Exception:
+            pass
+        incoming.put_nowait(None)
+
+    recv_task = asyncio.create_task(recv_loop())
+
+    async def close_idle() -> None:
+        try:
+            await ws.close(code=1001)
+        except Exception:
+            pass
+        incoming.put_nowait(None)
+
+    heartbeat_task = asyncio.create_task(
+        heartbeat(
+            send_json=safe_send,
+            last_seen=lambda: last_seen,
+            close=close_idle,
+            interval_seconds=float(os.getenv("WS_HEARTBEAT_INTERVAL_SECONDS", "20") or 20),
+            idle_timeout_seconds=float(os.getenv("WS_IDLE_TIMEOUT_SECONDS", "60") or 60),
+        )
+    )
+
+    async def process_run(msg: ClientRunAgentInput) -> None:
+        thread_id = msg.thread_id
+        run_id = msg.run_id
+
+        ui_context: Dict[str, Any] | None = None
+        if msg.forwarded_props and isinstance(msg.forwarded_props.get("uiContext"), dict):
+            ui_context = msg.forwarded_props.get("uiContext")
+
+        policy = AuditPolicy.from_forwarded_props(msg.forwarded_props)
+        audit_session = None
+
+        # Every frame of the run is numbered and buffered, so a client that
+        # reconnects with ?resume=<runId>:<seq> gets the rest of it.
+        stream = run_streams.open(user_id=user.id, thread_id=thread_id, run_id=run_id, send_json=safe_send)
+        attached.add(stream)
+        send = stream.publish
 
-                context_payload: Dict[str, Any] = {"ui": ui_context or {}, "state": snapshot}
+        try:
+            started = time.perf_counter()
+
+            # Persist the user message (so the left chat thread shows it) while the
+            # state snapshot for this thread loads. Chat message history is not part
+            # of the model context (filtered in SQL).
+            assembled = await run_context.assemble(
+                user_id=user.id,
+                thread_id=thread_id,
+                message=msg.message,
+                exclude_types=CONTEXT_EXCLUDED_EVENT_TYPES,
+            )
+            logger.debug(
+                "run context assembled",
+                extra={"threadId": thread_id, "runId": run_id, "timings": assembled.timings},
+            )
+
+            context_payload: Dict[str, Any] = {"ui": ui_context or {}, "state": assembled.snapshot}
+
+            if is_audit_mode:
+                audit_session = await audit_coordinator.start_run(
+                    user_id=user.id,
+                    thread_id=thread_id,
+                    run_id=run_id,
+                    send_json=send,
+                    policy=policy,
+                )
 
-                if is_audit_mode:
-                    audit_session = await audit_coordinator.start_run(
-                        user_id=user.id,
-                        thread_id=thread_id,
-                        run_id=run_id,
-                        send_json=safe_send,
-                        policy=policy,
-                    )
+                await send(
+                    {
+                        "type": "RUN_STAGED",
+                        "threadId": thread_id,
+                        "runId": run_id,
+                        "payload": {
+                            "message": msg.message,
+                            "context": context_payload,
+                            "forwardedProps": msg.forwarded_props or {},
+                        },
+                    }
+                )
 
-                    await safe_send(
+                decision = await audit_coordinator.await_stage_decision(audit_session)
+                if not decision.approved:
+                    await send(
                         {
-                            "type": "RUN_STAGED",
+                            "type": "RUN_STAGE_DENIED",
                             "threadId": thread_id,
                             "runId": run_id,
-                            "payload": {
-                                "message": msg.message,
-                                "context": context_payload,
-                                "forwardedProps": msg.forwarded_props or {},
-                            },
+                            "reason": decision.reason or "denied",
                         }
                     )
+                    await send({"type": "RUN_FINISHED", "threadId": thread_id, "runId": run_id})
+                    return
 
-                    decision = await audit_session.stage_future
-                    if not decision.approved:
-                        await safe_send(
-                            {
-                                "type": "RUN_STAGE_DENIED",
-                                "threadId": thread_id,
-                                "runId": run_id,
-                                "reason": decision.reason or "denied",
-                            }
-                        )
-                        await safe_send({"type": "RUN_FINISHED", "threadId": thread_id, "runId": run_id})
-                        return
-
-                    message_override = None
-                    context_override = None
-                    if decision.payload_edits and isinstance(decision.payload_edits, dict):
-                        if isinstance(decision.payload_edits.get("message"), str):
-                            message_override = decision.payload_edits.get("message")
-                        if isinstance(decision.payload_edits.get("context"), dict):
-                            context_override = decision.payload_edits.get("context")
-
-                    final_message = (message_override or msg.message).strip()
-                    final_context = context_override or context_payload
+                message_override = None
+                context_override = None
+                if decision.payload_edits and isinstance(decision.payload_edits, dict):
+                    if isinstance(decision.payload_edits.get("message"), str):
+                        message_override = decision.payload_edits.get("message")
+                    if isinstance(decision.payload_edits.get("context"), dict):
+                        context_override = decision.payload_edits.get("context")
 
-                    await safe_send(
-                        {
-                            "type": "RUN_STAGE_APPROVED",
-                            "threadId": thread_id,
-                            "runId": run_id,
-                            "payloadEdits": decision.payload_edits or None,
-                        }
-                    )
-                    await safe_send(
-                        {
-                            "type": "RUN_STARTED",
-                            "threadId": thread_id,
-                            "runId": run_id,
-                            "parentRunId": msg.parent_run_id,
-                        }
-                    )
-                else:
-                    await safe_send(
-                        {
-                            "type": "RUN_STARTED",
-                            "threadId": thread_id,
-                            "runId": run_id,
-                            "parentRunId": msg.parent_run_id,
-                        }
-                    )
-                    final_message = msg.message
-                    final_context = context_payload
+                final_message = (message_override or msg.message).strip()
+                final_context = context_override or context_payload
 
-                final_text_parts: list[str] = []
-                errored = False
+                await send(
+                    {
+                        "type": "RUN_STAGE_APPROVED",
+                        "threadId": thread_id,
+                        "runId": run_id,
+                        "payloadEdits": decision.payload_edits or None,
+                    }
+                )
+                await send(
+                    {
+                        "type": "RUN_STARTED",
+                        "threadId": thread_id,
+                        "runId": run_id,
+                        "parentRunId": msg.parent_run_id,
+                    }
+                )
+            else:
+                await send(
+                    {
+                        "type": "RUN_STARTED",
+                        "threadId": thread_id,
+                        "runId": run_id,
+                        "parentRunId": msg.parent_run_id,
+                    }
+                )
+                final_message = msg.message
+                final_context = context_payload
+
+            # Text deltas arrive token by token; chunks sharing a messageId are one message.
+            final_text_parts: list[str] = []
+            last_message_id: Optional[str] = None
+            first_token_seen = False
+            # Audit runs wait for a human to approve the stage; time those from the agent call.
+            ttft_started = time.perf_counter() if is_audit_mode else started
+            errored = False
+
+            # Agent runs share a process-wide pool of slots (fair queue across users).
+            try:
+                await admission.acquire_run(
+                    user.id,
+                    on_queued=lambda position: send(
+                        {"type": "RUN_QUEUED", "threadId": thread_id, "runId": run_id, "position": position}
+                    ),
+                )
+            except Overloaded as exc:
+                agent_calls_total.labels(status="rejected").inc()
+                await send(exc.frame(threadId=thread_id, runId=run_id))
+                return
 
+            try:
                 async for evt in agent.run_stream(
                     user_id=str(user.id),
                     session_id=thread_id,
@@ -208,7 +317,7 @@ async def realtime(ws: WebSocket) -> None:
 
                     if etype == "RUN_ERROR":
                         errored = True
-                        await safe_send(
+                        await send(
                             {
                                 "type": "RUN_ERROR",
                                 "threadId": thread_id,
@@ -222,183 +331,211 @@ async def realtime(ws: WebSocket) -> None:
                         out = dict(evt)
                         out["threadId"] = thread_id
                         out["runId"] = run_id
-                        await safe_send(out)
+                        await send(out)
                         continue
 
                     if etype == "TEXT_MESSAGE_CHUNK":
                         delta = evt.get("delta")
-                        if isinstance(delta, str) and delta.strip():
-                            final_text_parts.append(delta)
+                        if not isinstance(delta, str) or not delta:
+                            continue
+                        if not first_token_seen:
+                            first_token_seen = True
+                            chat_time_to_first_token_seconds.labels(mode="audit" if is_audit_mode else "chat").observe(
+                                time.perf_counter() - ttft_started
+                            )
+                        message_id = evt.get("messageId") if isinstance(evt.get("messageId"), str) else None
+                        if final_text_parts and (message_id is None or message_id != last_message_id):
+                            final_text_parts.append("\n\n")
+                        last_message_id = message_id
+                        final_text_parts.append(delta)
                         if not is_audit_mode:
-                            await safe_send(evt)
+                            out = dict(evt)
+                            out["threadId"] = thread_id
+                            out["runId"] = run_id
+                            await send(out)
                         continue
+            finally:
+                admission.release_run()
 
-                if errored:
-                    agent_calls_total.labels(status="error").inc()
-                    return
+            if errored:
+                agent_calls_total.labels(status="error").inc()
+                return
 
-                agent_calls_total.labels(status="success").inc()
-                agent_call_duration_seconds.observe(time.perf_counter() - started)
+            agent_calls_total.labels(status="success").inc()
+            agent_call_duration_seconds.observe(time.perf_counter() - started)
 
-                draft_text = "\n\n".join(final_text_parts).strip() or "OK."
+            draft_text = "".join(final_text_parts).strip() or "OK."
 
-                if is_audit_mode and audit_session is not None:
-                    await safe_send(
-                        {
-                            "type": "ASSISTANT_DRAFT_PROPOSED",
-                            "threadId": thread_id,
-                            "runId": run_id,
-                            "draftText": draft_text,
-                        }
-                    )
-                    a_decision = await audit_session.assistant_future
-                    if not a_decision.approved:
-                        await safe_send(
-                            {
-                                "type": "ASSISTANT_FINAL_DENIED",
-                                "threadId": thread_id,
-                                "runId": run_id,
-                                "reason": a_decision.reason or "denied",
-                            }
-                        )
-                        await safe_send({"type": "RUN_FINISHED", "threadId": thread_id, "runId": run_id})
-                        return
-
-                    final_text = (a_decision.final_text or draft_text).strip() or "OK."
-                    await chat.persist_assistant_message(user_id=user.id, session_id=thread_id, text=final_text)
-                    await safe_send({"type": "TEXT_MESSAGE_CHUNK", "delta": final_text})
-                    await safe_send(
+            if is_audit_mode and audit_session is not None:
+                await send(
+                    {
+                        "type": "ASSISTANT_DRAFT_PROPOSED",
+                        "threadId": thread_id,
+                        "runId": run_id,
+                        "draftText": draft_text,
+                    }
+                )
+                a_decision = await audit_coordinator.await_assistant_decision(audit_session)
+                if not a_decision.approved:
+                    await send(
                         {
-                            "type": "ASSISTANT_FINAL_APPROVED",
+                            "type": "ASSISTANT_FINAL_DENIED",
                             "threadId": thread_id,
                             "runId": run_id,
-                            "finalText": final_text,
+                            "reason": a_decision.reason or "denied",
                         }
                     )
-                    await safe_send({"type": "RUN_FINISHED", "threadId": thread_id, "runId": run_id})
+                    await send({"type": "RUN_FINISHED", "threadId": thread_id, "runId": run_id})
                     return
 
-                await chat.persist_assistant_message(user_id=user.id, session_id=thread_id, text=draft_text)
-                await safe_send({"type": "RUN_FINISHED", "threadId": thread_id, "runId": run_id})
-            except Exception as exc:
-                agent_calls_total.labels(status="error").inc()
-                await safe_send(
+                final_text = (a_decision.final_text or draft_text).strip() or "OK."
+                await chat.persist_assistant_message(user_id=user.id, session_id=thread_id, text=final_text)
+                # The approved text is one whole message of its own.
+                await send(
                     {
-                        "type": "RUN_ERROR",
-                        "threadId": (locals().get("thread_id") or ""),
-                        "runId": (locals().get("run_id") or ""),
-                        "message": f"chat backend failed: {exc}",
+                        "type": "TEXT_MESSAGE_CHUNK",
+                        "threadId": thread_id,
+                        "runId": run_id,
+                        "messageId": str(uuid.uuid4()),
+                        "role": "assistant",
+                        "delta": final_text,
                     }
                 )
-                logger.exception(
-                    "chat backend failed",
-                    extra={"threadId": locals().get("thread_id"), "runId": locals().get("run_id")},
+                await send(
+                    {
+                        "type": "ASSISTANT_FINAL_APPROVED",
+                        "threadId": thread_id,
+                        "runId": run_id,
+                        "finalText": final_text,
+                    }
                 )
-            finally:
-                if audit_session is not None:
-                    await audit_coordinator.end_run(user_id=user.id, thread_id=audit_session.thread_id, run_id=audit_session.run_id)
-
-        def _try_parse_json(raw: str) -> Optional[Dict[str, Any]]:
-            try:
-                data: Any = json.loads(raw)
-            except Exception:
-                return None
-            if isinstance(data, dict):
-                return data
-            return None
-
-        try:
-            while True:
-                raw = await incoming.get()
-
-                parsed = _try_parse_json(raw)
-                msg_type = parsed.get("type") if parsed else None
-                if isinstance(msg_type, str):
-                    ws_messages_total.labels(type="approval").inc()
-
-                    thread_id = parsed.get("threadId")
-                    run_id = parsed.get("runId")
-                    if not isinstance(thread_id, str) or not isinstance(run_id, str):
-                        continue
-
-                    if msg_type == "RUN_STAGE_APPROVED":
-                        payload_edits = parsed.get("payloadEdits")
-                        if payload_edits is not None and not isinstance(payload_edits, dict):
-                            payload_edits = None
-                        await audit_coordinator.resolve_stage(
-                            user_id=user.id,
-                            thread_id=thread_id,
-                            run_id=run_id,
-                            decision=StageDecision(approved=True, payload_edits=payload_edits),
-                        )
-                        continue
+                await send({"type": "RUN_FINISHED", "threadId": thread_id, "runId": run_id})
+                return
 
-                    if msg_type == "RUN_STAGE_DENIED":
-                        reason = parsed.get("reason") if isinstance(parsed.get("reason"), str) else ""
-                        await audit_coordinator.resolve_stage(
-                            user_id=user.id,
-                            thread_id=thread_id,
-                            run_id=run_id,
-                            decision=StageDecision(approved=False, reason=reason),
-                        )
-                        continue
+            await chat.persist_assistant_message(user_id=user.id, session_id=thread_id, text=draft_text)
+            await send({"type": "RUN_FINISHED", "threadId": thread_id, "runId": run_id})
+        except Exception as exc:
+            agent_calls_total.labels(status="error").inc()
+            await send(
+                {
+                    "type": "RUN_ERROR",
+                    "threadId": (locals().get("thread_id") or ""),
+                    "runId": (locals().get("run_id") or ""),
+                    "message": f"chat backend failed: {exc}",
+                }
+            )
+            logger.exception(
+                "chat backend failed",
+                extra={"threadId": locals().get("thread_id"), "runId": locals().get("run_id")},
+            )
+        finally:
+            stream.finish()
+            attached.discard(stream)
+            if audit_session is not None:
+                await audit_coordinator.end_run(user_id=user.id, thread_id=audit_session.thread_id, run_id=audit_session.run_id)
 
-                    if msg_type == "TOOL_CALL_APPROVED":
-                        tool_call_id = parsed.get("toolCallId")
-                        if not isinstance(tool_call_id, str) or not tool_call_id.strip():
-                            continue
-                        args_override = parsed.get("argsOverride")
-                        if args_override is not None and not isinstance(args_override, dict):
-                            args_override = None
-                        await audit_coordinator.resolve_tool(
-                            user_id=user.id,
-                            thread_id=thread_id,
-                            run_id=run_id,
-                            tool_call_id=tool_call_id,
-                            decision=ToolDecision(approved=True, args_override=args_override),
-                        )
-                        continue
+    runs = RunScheduler.from_env(handler=process_run, send_json=send_run_frame)
 
-                    if msg_type == "TOOL_CALL_DENIED":
-                        tool_call_id = parsed.get("toolCallId")
-                        if not isinstance(tool_call_id, str) or not tool_call_id.strip():
-                            continue
-                        reason = parsed.get("reason") if isinstance(parsed.get("reason"), str) else ""
-                        await audit_coordinator.resolve_tool(
-                            user_id=user.id,
-                            thread_id=thread_id,
-                            run_id=run_id,
-                            tool_call_id=tool_call_id,
-                            decision=ToolDecision(approved=False, reason=reason),
-                        )
-                        continue
+    try:
+        while True:
+            frame = await incoming.get()
+            if frame is None:
+                return
 
-                    if msg_type == "ASSISTANT_FINAL_APPROVED":
-                        final_text = parsed.get("finalText") if isinstance(parsed.get("finalText"), str) else ""
-                        await audit_coordinator.resolve_assistant(
-                            user_id=user.id,
-                            thread_id=thread_id,
-                            run_id=run_id,
-                            decision=AssistantDecision(approved=True, final_text=final_text),
-                        )
-                        continue
+            try:
+                client_msg = parse_client_message(decode_frame(frame))
+            except ValueError as exc:
+                await safe_send({"type": "RUN_ERROR", "message": str(exc)})
+                continue
+            if client_msg is None or isinstance(client_msg, ClientHeartbeat):
+                continue
+
+            if isinstance(client_msg, ClientControlMessage):
+                thread_id = client_msg.thread_id
+                run_id = client_msg.run_id
+                msg_type = client_msg.type
+
+                if msg_type == "RUN_CANCEL":
+                    ws_messages_total.labels(type="cancel").inc()
+                    if not await runs.cancel(thread_id=thread_id, run_id=run_id):
+                        # A run resumed from an earlier connection.
+                        resumed = run_streams.get(user_id=user.id, run_id=run_id)
+                        if resumed is not None and resumed.task is not None:
+                            resumed.task.cancel()
+                            await resumed.publish({"type": "RUN_CANCELLED", "threadId": thread_id, "runId": run_id})
+                    continue
 
-                    if msg_type == "ASSISTANT_FINAL_DENIED":
-                        reason = parsed.get("reason") if isinstance(parsed.get("reason"), str) else ""
-                        await audit_coordinator.resolve_assistant(
-                            user_id=user.id,
-                            thread_id=thread_id,
-                            run_id=run_id,
-                            decision=AssistantDecision(approved=False, reason=reason),
-                        )
-                        continue
+                ws_messages_total.labels(type="approval").inc()
 
-                if run_task is not None and not run_task.done():
-                    await safe_send({"type": "RUN_ERROR", "message": "run already in progress"})
-                    continue
+                if msg_type == "RUN_STAGE_APPROVED":
+                    await audit_coordinator.resolve_stage(
+                        user_id=user.id,
+                        thread_id=thread_id,
+                        run_id=run_id,
+                        decision=StageDecision(approved=True, payload_edits=client_msg.payload_edits),
+                    )
+                elif msg_type == "RUN_STAGE_DENIED":
+                    await audit_coordinator.resolve_stage(
+                        user_id=user.id,
+                        thread_id=thread_id,
+                        run_id=run_id,
+                        decision=StageDecision(approved=False, reason=client_msg.reason),
+                    )
+                elif msg_type == "TOOL_CALL_APPROVED":
+                    await audit_coordinator.resolve_tool(
+                        user_id=user.id,
+                        thread_id=thread_id,
+                        run_id=run_id,
+                        tool_call_id=client_msg.tool_call_id or "",
+                        decision=ToolDecision(approved=True, args_override=client_msg.args_override),
+                    )
+                elif msg_type == "TOOL_CALL_DENIED":
+                    await audit_coordinator.resolve_tool(
+                        user_id=user.id,
+                        thread_id=thread_id,
+                        run_id=run_id,
+                        tool_call_id=client_msg.tool_call_id or "",
+                        decision=ToolDecision(approved=False, reason=client_msg.reason),
+                    )
+                elif msg_type == "ASSISTANT_FINAL_APPROVED":
+                    await audit_coordinator.resolve_assistant(
+                        user_id=user.id,
+                        thread_id=thread_id,
+                        run_id=run_id,
+                        decision=AssistantDecision(approved=True, final_text=client_msg.final_text),
+                    )
+                elif msg_type == "ASSISTANT_FINAL_DENIED":
+                    await audit_coordinator.resolve_assistant(
+                        user_id=user.id,
+                        thread_id=thread_id,
+                        run_id=run_id,
+                        decision=AssistantDecision(approved=False, reason=client_msg.reason),
+                    )
+                continue
 
-                run_task = asyncio.create_task(process_run(raw))
-        except WebSocketDisconnect:
-            return
-        finally:
-            recv_task.cancel()
+            run_msg = client_msg
+            ws_messages_total.labels(type="run").inc()
+            try:
+                runs.submit(run_msg)
+            except RunRejected as exc:
+                await safe_send(
+                    {
+                        "type": "RUN_ERROR",
+                        "threadId": run_msg.thread_id,
+                        "runId": run_msg.run_id,
+                        "message": str(exc),
+                    }
+                )
+    except WebSocketDisconnect:
+        return
+    finally:
+        recv_task.cancel()
+        heartbeat_task.cancel()
+        admission.release_connection(user.id)
+        for stream in attached:
+            stream.detach(safe_send)
+        # Chat runs finish in the background (their frames stay resumable) and
+        # are persisted as usual; audit runs would wait forever for approvals,
+        # so those are cancelled.
+        await runs.aclose(cancel_active=is_audit_mode)
+        await outbox.aclose()
@@ -0,0 +1,203 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from fastapi import FastAPI
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.events import Event, now_utc
+from app.metrics import (
+    event_append_batch_size,
+    event_append_commit_duration_seconds,
+    event_append_wait_seconds,
+)
+from app.repositories.events_repo import EventsRepository
+from app.uow import UnitOfWork
+
+logger = logging.getLogger("trainer2.api.event_batcher")
+
+
+@dataclass
+class _PendingAppend:
+    event: Event
+    enqueued_at: float = field(default_factory=time.perf_counter)
+    future: "asyncio.Future[Event]" = field(default_factory=lambda: asyncio.get_running_loop().create_future())
+
+
+class EventAppendBatcher:
+    """Group-commit writer for the events table.
+
+    Concurrent `append` calls (from any websocket / request in this process) are
+    queued and written by a single flusher as one multi-row INSERT per
+    transaction. A batch is flushed when it reaches `max_batch` events or when
+    `max_delay` has passed since its first event; while one batch commits the
+    next one accumulates.
+
+    Durability matches a direct append: `append` returns only after the batch
+    containing the event has committed, and raises if that commit failed.
+    The event's `ts` is assigned at `append` time, so ordering follows call order.
+    """
+
+    def __init__(
+        self,
+        *,
+        sessionmaker: async_sessionmaker[AsyncSession],
+        repo: EventsRepository,
+        max_batch: int = 100,
+        max_delay: float = 0.005,
+    ):
+        self._sessionmaker = sessionmaker
+        self._repo = repo
+        self._max_batch = max(1, max_batch)
+        self._max_delay = max(0.0, max_delay)
+        self._queue: "asyncio.Queue[Optional[_PendingAppend]]" = asyncio.Queue()
+        self._task: Optional[asyncio.Task[None]] = None
+        self._closed = False
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="event-append-batcher")
+
+    async def close(self) -> None:
+        """Flush everything already queued, then stop the flusher."""
+
+        if self._closed:
+            return
+        self._closed = True
+        await self._queue.put(None)
+        if self._task is not None:
+            await self._task
+            self._task = None
+
+    async def append(
+        self,
+        *,
+        type: str,
+        payload: Dict[str, Any],
+        user_id: Optional[uuid.UUID],
+        session_id: Optional[str],
+    ) -> Event:
+        if self._closed or self._task is None:
+            raise RuntimeError("event batcher is not running")
+
+        pending = _PendingAppend(
+            event=Event(
+                id=str(uuid.uuid4()),
+                ts=now_utc(),
+                type=type,
+                payload=payload,
+                userId=str(user_id) if user_id else None,
+                sessionId=session_id,
+            )
+        )
+        await self._queue.put(pending)
+        # Shield: a cancelled caller must not poison the shared batch; the
+        # event is still written.
+        return await asyncio.shield(pending.future)
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            first = await self._queue.get()
+            if first is None:
+                break
+
+            batch: List[_PendingAppend] = [first]
+            deadline = loop.time() + self._max_delay
+            while len(batch) < self._max_batch:
+                try:
+                    item = self._queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        item = await asyncio.wait_for(self._queue.get(), timeout)
+                    except asyncio.TimeoutError:
+                        break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+
+            await self._flush(batch)
+
+    async def _flush(self, batch: List[_PendingAppend]) -> None:
+        started = time.perf_counter()
+        try:
+            await self._insert([p.event for p in batch])
+        except Exception as exc:
+            if len(batch) == 1:
+                self._fail(batch[0], exc)
+            else:
+                # Isolate the bad row(s) instead of failing every caller in the batch.
+                logger.warning("batched event insert failed; retrying rows individually", exc_info=True)
+                for p in batch:
+                    try:
+                        await self._insert([p.event])
+                    except Exception as row_exc:
+                        self._fail(p, row_exc)
+                    else:
+                        self._succeed(p)
+            return
+        finally:
+            event_append_commit_duration_seconds.observe(time.perf_counter() - started)
+            event_append_batch_size.observe(len(batch))
+
+        for p in batch:
+            self._succeed(p)
+
+    async def _insert(self, events: List[Event]) -> None:
+        async with self._sessionmaker() as session:
+            async with UnitOfWork(session) as uow:
+                await self._repo.append_many(uow.session, events=events)
+                await uow.commit()
+
+    @staticmethod
+    def _succeed(p: _PendingAppend) -> None:
+        event_append_wait_seconds.observe(time.perf_counter() - p.enqueued_at)
+        if not p.future.done():
+            p.future.set_result(p.event)
+
+    @staticmethod
+    def _fail(p: _PendingAppend, exc: BaseException) -> None:
+        if not p.future.done():
+            p.future.set_exception(exc)
+
+
+def batching_enabled() -> bool:
+    return os.getenv("EVENTS_APPEND_BATCHING", "0").strip().lower() in ("1", "true", "yes")
+
+
+async def init_event_batcher(app: FastAPI, sessionmaker: async_sessionmaker[AsyncSession]) -> None:
+    if not batching_enabled():
+        app.state.event_batcher = None
+        return
+
+    batcher = EventAppendBatcher(
+        sessionmaker=sessionmaker,
+        repo=EventsRepository(),
+        max_batch=int(os.getenv("EVENTS_APPEND_BATCH_MAX_SIZE", "100") or 100),
+        max_delay=float(os.getenv("EVENTS_APPEND_BATCH_MAX_DELAY_MS", "5") or 5) / 1000.0,
+    )
+    batcher.start()
+    app.state.event_batcher = batcher
+    logger.info("event append batching enabled")
+
+
+async def close_event_batcher(app: FastAPI) -> None:
+    batcher: Optional[EventAppendBatcher] = getattr(app.state, "event_batcher", None)
+    if batcher is not None:
+        await batcher.close()
+        app.state.event_batcher = None
+
+
+def get_event_batcher(app: FastAPI) -> Optional[EventAppendBatcher]:
+    return getattr(app.state, "event_batcher", None)
@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+from datetime import date, datetime, timezone
+from typing import List, Optional, Tuple
+
+from fastapi import FastAPI
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.events import now_utc
+
+logger = logging.getLogger("trainer2.api.event_partitions")
+
+PARTITION_PREFIX = "events_p"
+
+
+def months_ahead() -> int:
+    return int(os.getenv("EVENTS_PARTITIONS_AHEAD_MONTHS", "3") or 3)
+
+
+def partition_name(month: date) -> str:
+    return f"{PARTITION_PREFIX}{month.year:04d}{month.month:02d}"
+
+
+def partition_range(name: str) -> Optional[Tuple[datetime, datetime]]:
+    """UTC [start, end) of a monthly partition, or None if `name` isn't one."""
+
+    suffix = name[len(PARTITION_PREFIX):] if name.startswith(PARTITION_PREFIX) else ""
+    if len(suffix) != 6 or not suffix.isdigit():
+        return None
+    year, month = int(suffix[:4]), int(suffix[4:])
+    if not 1 <= month <= 12:
+        return None
+    start = datetime(year, month, 1, tzinfo=timezone.utc)
+    end = datetime(year + (month == 12), month % 12 + 1, 1, tzinfo=timezone.utc)
+    return start, end
+
+
+async def ensure_partitions(session: AsyncSession, *, ahead: Optional[int] = None) -> int:
+    """Create any missing monthly partitions from this month up to `ahead` months out."""
+
+    result = await session.execute(
+        text("SELECT events_ensure_partitions(CAST(:start AS date), :ahead)"),
+        {"start": now_utc().date().replace(day=1), "ahead": ahead if ahead is not None else months_ahead()},
+    )
+    created = int(result.scalar() or 0)
+    await session.commit()
+    return created
+
+
+async def list_partitions(session: AsyncSession) -> List[Tuple[str, bool]]:
+    """Monthly partition tables as (name, attached). Detached ones are mid-archival."""
+
+    result = await session.execute(
+        text(
+            """
+            SELECT c.relname, (i.inhrelid IS NOT NULL) AS attached
+            FROM pg_class c
+            JOIN pg_namespace n ON n.oid = c.relnamespace
+            LEFT JOIN pg_inherits i ON i.inhrelid = c.oid AND i.inhparent = 'events'::regclass
+            WHERE n.nspname = current_schema()
+              AND c.relkind = 'r'
+              AND c.relname LIKE :pattern
+            ORDER BY c.relname
+            """
+        ),
+        {"pattern": PARTITION_PREFIX + "%"},
+    )
+    return [(r[0], bool(r[1])) for r in result.all() if partition_range(r[0]) is not None]
+
+
+async def _maintenance_loop(sessionmaker: async_sessionmaker[AsyncSession], interval: float) -> None:
+    while True:
+        try:
+            async with sessionmaker() as session:
+                created = await ensure_partitions(session)
+            if created:
+                logger.info("created %s events partitions", created)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("events partition maintenance failed")
+        await asyncio.sleep(interval)
+
+
+async def init_partition_maintenance(app: FastAPI, sessionmaker: async_sessionmaker[AsyncSession]) -> None:
+    interval = float(os.getenv("EVENTS_PARTITION_MAINTENANCE_INTERVAL_SECONDS", "21600") or 21600)
+    app.state.partition_maintenance_task = asyncio.create_task(
+        _maintenance_loop(sessionmaker, interval), name="events-partition-maintenance"
+    )
+
+
+async def close_partition_maintenance(app: FastAPI) -> None:
+    task: Optional[asyncio.Task[None]] = getattr(app.state, "partition_maintenance_task", None)
+    if task is not None:
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+        app.state.partition_maintenance_task = None
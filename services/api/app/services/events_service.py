@@ -1,13 +1,17 @@
 from __future__ import annotations
 
 import uuid
-from typing import Any, Callable, Dict, Optional
+from typing import TYPE_CHECKING, Any, Callable, Dict, Optional
 
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
 from app.repositories.events_repo import EventsRepository
 from app.uow import UnitOfWork
 
+if TYPE_CHECKING:
+    from app.services.event_batcher import EventAppendBatcher
+    from app.services.state_cache import StateCache
+
 
 class EventsService:
     def __init__(
@@ -15,9 +19,13 @@ class EventsService:
         *,
         sessionmaker: async_sessionmaker[AsyncSession],
         repo: EventsRepository,
+        batcher: Optional["EventAppendBatcher"] = None,
+        state_cache: Optional["StateCache"] = None,
     ):
         self._sessionmaker = sessionmaker
         self._repo = repo
+        self._batcher = batcher
+        self._state_cache = state_cache
 
     async def append_event(
         self,
@@ -27,13 +35,20 @@ class EventsService:
         user_id: Optional[uuid.UUID],
         session_id: Optional[str],
     ) -> None:
-        async with self._sessionmaker() as session:
-            async with UnitOfWork(session) as uow:
-                await self._repo.append(
-                    uow.session,
-                    type=type,
-                    payload=payload,
-                    user_id=user_id,
-                    session_id=session_id,
-                )
-                await uow.commit()
+        if self._batcher is not None:
+            # Group commit: returns once the shared batch has committed.
+            await self._batcher.append(type=type, payload=payload, user_id=user_id, session_id=session_id)
+        else:
+            async with self._sessionmaker() as session:
+                async with UnitOfWork(session) as uow:
+                    await self._repo.append(
+                        uow.session,
+                        type=type,
+                        payload=payload,
+                        user_id=user_id,
+                        session_id=session_id,
+                    )
+                    await uow.commit()
+
+        if self._state_cache is not None:
+            self._state_cache.invalidate_events(user_id=user_id, session_id=session_id, type=type)
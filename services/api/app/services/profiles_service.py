@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 import uuid
-from typing import Any, Dict, Optional
+from typing import TYPE_CHECKING, Any, Dict, Optional
 
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
@@ -9,6 +9,9 @@ from app.events import now_utc
 from app.repositories.profiles_repo import ProfilesRepository
 from app.uow import UnitOfWork
 
+if TYPE_CHECKING:
+    from app.services.state_cache import StateCache
+
 
 PROFILE_FIELD_MAP: dict[str, str] = {
     "firstName": "first_name",
@@ -58,14 +61,27 @@ class ProfilesService:
         *,
         sessionmaker: async_sessionmaker[AsyncSession],
         repo: ProfilesRepository,
+        state_cache: Optional["StateCache"] = None,
     ):
         self._sessionmaker = sessionmaker
         self._repo = repo
+        self._state_cache = state_cache
 
     async def get_profile_dict(self, *, user_id: uuid.UUID) -> Optional[Dict[str, Any]]:
+        # Always read: checking a cached copy would cost the same single-row
+        # lookup. The result refreshes the state cache for the next run context.
+        cache = self._state_cache
+        token = cache.token(cache.profile_key(user_id)) if cache is not None else 0
+
         async with self._sessionmaker() as session:
             row = await self._repo.get_by_user(session, user_id=user_id)
-            return profile_row_to_dict(row) if row else None
+            profile = profile_row_to_dict(row) if row else None
+
+        if cache is not None:
+            cache.put_profile(
+                user_id, token=token, profile=profile, updated_at=row.updated_at if row is not None else None
+            )
+        return profile
 
     async def upsert_from_payload(self, *, user_id: uuid.UUID, payload: Dict[str, Any]) -> Dict[str, Any]:
         metrics = payload.get("metrics") if isinstance(payload.get("metrics"), dict) else {}
@@ -87,6 +103,8 @@ class ProfilesService:
                 )
                 await uow.commit()
 
+            if self._state_cache is not None:
+                self._state_cache.invalidate_profile(user_id)
             return profile_row_to_dict(row)
 
     async def delete(self, *, user_id: uuid.UUID) -> bool:
@@ -94,4 +112,7 @@ class ProfilesService:
             async with UnitOfWork(session) as uow:
                 deleted = await self._repo.delete_by_user(uow.session, user_id=user_id)
                 await uow.commit()
-                return deleted
+
+            if self._state_cache is not None:
+                self._state_cache.invalidate_profile(user_id)
+            return deleted
@@ -0,0 +1,236 @@
+from __future__ import annotations
+
+import copy
+import logging
+import os
+import uuid
+from contextlib import aclosing
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, AsyncIterator, Dict, Optional, Sequence, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.events import PROJECTION_VERSION, Event, empty_state, now_utc, project_state
+from app.repositories.checkpoints_repo import CheckpointsRepository
+from app.repositories.events_repo import EventsRepository
+
+logger = logging.getLogger("trainer2.api.projections")
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, "").strip() or default)
+    except ValueError:
+        return default
+
+
+def _view_name(exclude_types: Optional[Sequence[str]]) -> str:
+    if not exclude_types:
+        return ""
+    return "exclude:" + ",".join(sorted(set(exclude_types)))
+
+
+@dataclass
+class Projection:
+    state: Dict[str, Any]
+    events_count: int
+    last_event_id: Optional[str]
+    last_event_ts: Optional[datetime]
+
+
+class ProjectionsService:
+    """Checkpointed `project_state` over `EventsRepository.stream_history`.
+
+    Reads load the latest persisted snapshot for (user, session) and fold only the
+    events written after it. When that tail grows past `checkpoint_every` events,
+    the checkpoint is moved forward in the same session.
+
+    Events younger than `settle_seconds` are never folded into a checkpoint: a
+    concurrent writer may still commit an event with an earlier `ts`, which the
+    `(ts, id)` keyset would otherwise skip forever.
+    """
+
+    def __init__(
+        self,
+        *,
+        events_repo: EventsRepository,
+        checkpoints_repo: CheckpointsRepository,
+        checkpoint_every: Optional[int] = None,
+        settle_seconds: Optional[int] = None,
+    ):
+        self._events = events_repo
+        self._checkpoints = checkpoints_repo
+        self._checkpoint_every = (
+            checkpoint_every
+            if checkpoint_every is not None
+            else _env_int("PROJECTION_CHECKPOINT_EVERY", 100)
+        )
+        self._settle = timedelta(
+            seconds=settle_seconds
+            if settle_seconds is not None
+            else _env_int("PROJECTION_CHECKPOINT_SETTLE_SECONDS", 5)
+        )
+
+    async def load(
+        self,
+        session: AsyncSession,
+        *,
+        user_id: uuid.UUID,
+        session_id: Optional[str],
+        exclude_types: Optional[Sequence[str]] = None,
+    ) -> Projection:
+        """Project state for a user (or one of their sessions).
+
+        `exclude_types` is applied in SQL; the result is a separate "view" with
+        its own checkpoint, so it never mixes with the full projection.
+        """
+
+        view = _view_name(exclude_types)
+        checkpoint = await self._checkpoints.get(session, user_id=user_id, session_id=session_id, view=view)
+        if checkpoint is not None and checkpoint.version != PROJECTION_VERSION:
+            checkpoint = None
+
+        if checkpoint is not None:
+            # Deep copy: folding appends to nested lists, which must not alias the
+            # (identity-mapped) checkpoint row.
+            state: Dict[str, Any] = copy.deepcopy(checkpoint.state)
+            count = checkpoint.events_count
+            last_id: Optional[str] = str(checkpoint.last_event_id)
+            last_ts: Optional[datetime] = checkpoint.last_event_ts
+            after = (checkpoint.last_event_ts, checkpoint.last_event_id)
+        else:
+            state = empty_state()
+            count = 0
+            last_id = None
+            last_ts = None
+            after = None
+
+        # Stream the tail; the checkpoint write is deferred until the cursor is
+        # closed because committing would end the transaction it lives in.
+        cutoff = now_utc() - self._settle
+        tail_len = 0
+        pending: Optional[Tuple[Dict[str, Any], int, str, datetime]] = None
+
+        async def tail() -> AsyncIterator[Event]:
+            # `project_state` folds each event before pulling the next, so
+            # `state` holds everything yielded so far.
+            nonlocal tail_len, count, last_id, last_ts, pending
+            async for ev in self._events.stream_history(
+                session,
+                user_id=user_id,
+                session_id=session_id,
+                after=after,
+                exclude_types=exclude_types,
+            ):
+                if (
+                    pending is None
+                    and tail_len >= self._checkpoint_every
+                    and ev.ts > cutoff
+                    and last_id is not None
+                    and last_ts is not None
+                ):
+                    pending = (copy.deepcopy(state), count, last_id, last_ts)
+                tail_len += 1
+                count += 1
+                last_id = ev.id
+                last_ts = ev.ts
+                yield ev
+
+        state = await project_state(tail(), initial=state)
+
+        if (
+            pending is None
+            and tail_len >= self._checkpoint_every
+            and last_id is not None
+            and last_ts is not None
+            and last_ts <= cutoff
+        ):
+            pending = (state, count, last_id, last_ts)
+
+        if pending is not None:
+            await self._save(session, user_id, session_id, view, *pending)
+
+        return Projection(state=state, events_count=count, last_event_id=last_id, last_event_ts=last_ts)
+
+    async def rebuild(
+        self,
+        session: AsyncSession,
+        *,
+        user_id: Optional[uuid.UUID] = None,
+    ) -> int:
+        """Drop checkpoints (all users or one) and recompute them from the full log.
+
+        Only the full projection is rebuilt eagerly; filtered views are dropped and
+        re-created lazily by the next `load`.
+
+        Run after changing reducers in `app.events` (and bumping PROJECTION_VERSION).
+        Returns the number of checkpoints written.
+        """
+
+        await self._checkpoints.delete_all(session, user_id=user_id)
+        await session.commit()
+
+        scopes = await self._events.list_scopes(session)
+        users = {uid for uid, _ in scopes if user_id is None or uid == user_id}
+
+        written = 0
+        targets = [(uid, None) for uid in sorted(users, key=str)] + sorted(
+            ((uid, sid) for uid, sid in scopes if uid in users and sid is not None),
+            key=lambda x: (str(x[0]), x[1]),
+        )
+        for uid, sid in targets:
+            cutoff = now_utc() - self._settle
+            count = 0
+            last: Optional[Tuple[str, datetime]] = None
+
+            async def settled(stream: AsyncIterator[Event], cutoff: datetime = cutoff) -> AsyncIterator[Event]:
+                nonlocal count, last
+                async with aclosing(stream):
+                    async for ev in stream:
+                        if ev.ts > cutoff:
+                            break
+                        count += 1
+                        last = (ev.id, ev.ts)
+                        yield ev
+
+            state = await project_state(
+                settled(self._events.stream_history(session, user_id=uid, session_id=sid, after=None))
+            )
+            if last is None:
+                continue
+            await self._save(session, uid, sid, "", state, count, *last)
+            written += 1
+
+        return written
+
+    async def _save(
+        self,
+        session: AsyncSession,
+        user_id: uuid.UUID,
+        session_id: Optional[str],
+        view: str,
+        state: Dict[str, Any],
+        count: int,
+        last_id: str,
+        last_ts: Optional[datetime],
+    ) -> None:
+        if last_ts is None:
+            return
+        try:
+            await self._checkpoints.upsert(
+                session,
+                user_id=user_id,
+                session_id=session_id,
+                view=view,
+                version=PROJECTION_VERSION,
+                last_event_id=uuid.UUID(last_id),
+                last_event_ts=last_ts,
+                events_count=count,
+                state=state,
+            )
+            await session.commit()
+        except Exception:
+            # Checkpoints are an optimization; never fail a read because of them.
+            await session.rollback()
+            logger.exception("projection checkpoint write failed", extra={"userId": str(user_id)})
@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+import asyncio
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional, Sequence
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.metrics import run_context_stage_seconds
+from app.repositories.events_repo import EventsRepository
+from app.repositories.profiles_repo import ProfilesRepository
+from app.services.chat_service import ChatService
+from app.services.profiles_service import profile_row_to_dict
+from app.services.projections_service import ProjectionsService
+from app.services.state_cache import StateCache
+
+
+@dataclass
+class RunContext:
+    snapshot: Dict[str, Any]
+    # Seconds per stage: persist_message, validate (state cache versions),
+    # projection, profile, total. Stages served from the state cache are absent.
+    timings: Dict[str, float] = field(default_factory=dict)
+
+
+class RunContextService:
+    """Everything a run needs before the agent call, assembled concurrently.
+
+    The user message append and the state read do not depend on each other (the
+    context snapshot excludes chat messages), so they overlap. The projection
+    and the SQL profile are read on one pooled connection, and only when
+    `state_cache` does not hold a current copy (checked with two index lookups
+    on that connection).
+    """
+
+    def __init__(
+        self,
+        *,
+        sessionmaker: async_sessionmaker[AsyncSession],
+        chat: ChatService,
+        projections: ProjectionsService,
+        events_repo: EventsRepository,
+        profiles_repo: ProfilesRepository,
+        state_cache: Optional[StateCache] = None,
+    ):
+        self._sessionmaker = sessionmaker
+        self._chat = chat
+        self._projections = projections
+        self._events_repo = events_repo
+        self._profiles_repo = profiles_repo
+        self._state_cache = state_cache
+
+    async def assemble(
+        self,
+        *,
+        user_id: uuid.UUID,
+        thread_id: str,
+        message: str,
+        exclude_types: Sequence[str],
+    ) -> RunContext:
+        timings: Dict[str, float] = {}
+        started = time.perf_counter()
+
+        async def persist() -> None:
+            t0 = time.perf_counter()
+            await self._chat.persist_user_message(user_id=user_id, session_id=thread_id, message=message)
+            timings["persist_message"] = time.perf_counter() - t0
+
+        async def load_state() -> Dict[str, Any]:
+            cache = self._state_cache
+            key = StateCache.snapshot_key(user_id, thread_id, exclude_types)
+            state: Optional[Dict[str, Any]] = None
+            profile_hit, profile = False, None
+
+            async with self._sessionmaker() as session:
+                version = None
+                if cache is not None:
+                    t0 = time.perf_counter()
+                    version = await self._events_repo.version(
+                        session, user_id=user_id, session_id=thread_id, exclude_types=exclude_types
+                    )
+                    updated_at = await self._profiles_repo.get_updated_at(session, user_id=user_id)
+                    timings["validate"] = time.perf_counter() - t0
+                    state = cache.get_snapshot(key, version=version)
+                    profile_hit, profile = cache.get_profile(user_id, updated_at=updated_at)
+
+                if state is None:
+                    token = cache.token(key) if cache is not None else 0
+                    t0 = time.perf_counter()
+                    projection = await self._projections.load(
+                        session,
+                        user_id=user_id,
+                        session_id=thread_id,
+                        exclude_types=exclude_types,
+                    )
+                    timings["projection"] = time.perf_counter() - t0
+                    state = projection.state
+                    if cache is not None and version is not None:
+                        cache.put_snapshot(key, token=token, state=state, version=version)
+                if not profile_hit:
+                    token = cache.token(cache.profile_key(user_id)) if cache is not None else 0
+                    t0 = time.perf_counter()
+                    row = await self._profiles_repo.get_by_user(session, user_id=user_id)
+                    timings["profile"] = time.perf_counter() - t0
+                    profile = profile_row_to_dict(row) if row is not None else None
+                    if cache is not None:
+                        cache.put_profile(
+                            user_id,
+                            token=token,
+                            profile=profile,
+                            updated_at=row.updated_at if row is not None else None,
+                        )
+
+            # The cache hands out copies; `state` and `profile` are ours.
+            snapshot = state
+            # Prefer SQL-backed profile over event-sourced payload.
+            if profile is not None:
+                snapshot["profile"] = profile
+            return snapshot
+
+        stages = [asyncio.create_task(persist()), asyncio.create_task(load_state())]
+        try:
+            _, snapshot = await asyncio.gather(*stages)
+        except BaseException:
+            # Don't leave the other stage running (and holding its connection).
+            for task in stages:
+                task.cancel()
+            await asyncio.gather(*stages, return_exceptions=True)
+            raise
+        timings["total"] = time.perf_counter() - started
+
+        for stage, seconds in timings.items():
+            run_context_stage_seconds.labels(stage=stage).observe(seconds)
+        return RunContext(snapshot=snapshot, timings=timings)
@@ -0,0 +1,152 @@
+from __future__ import annotations
+
+import copy
+import os
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, FrozenSet, Optional, Sequence, Tuple
+
+from fastapi import FastAPI
+
+from app.metrics import state_cache_requests_total
+from app.repositories.events_repo import StreamVersion
+
+# (user_id, kind, thread_id, excluded event types). kind is "snapshot" or "profile".
+_Key = Tuple[uuid.UUID, str, str, FrozenSet[str]]
+
+_MISSING = object()
+
+
+@dataclass
+class _Entry:
+    generation: int = 0
+    value: Any = _MISSING
+    # What the database reported for the value when it was loaded: the events
+    # StreamVersion for snapshots, `updated_at` (or None) for profiles.
+    version: Any = None
+
+
+class StateCache:
+    """Process-wide LRU of projected thread snapshots and SQL profile dicts.
+
+    Every entry keeps the database version it was loaded at, and a lookup only
+    hits when the caller's fresh version matches. For a snapshot that is the
+    stream's (event count, newest ts); for a profile it is `updated_at`. Both
+    are index lookups, so writes from another process or worker are seen on
+    the next read. In-process writers (`EventsService.append_event`,
+    `ProfilesService`, `POST /events`) also call `invalidate_events` /
+    `invalidate_profile` after committing.
+
+    Loads follow `token()` -> read from DB -> `put_*(token=...)`: an invalidation
+    that lands while the read is in flight bumps the entry's generation and the
+    stale result is not stored.
+
+    Values are deep-copied in and out: callers (including an embedded agent run)
+    may mutate what they get without touching the cache.
+    """
+
+    def __init__(self, *, max_entries: int = 1024):
+        self._max_entries = max(1, max_entries)
+        self._entries: "OrderedDict[_Key, _Entry]" = OrderedDict()
+
+    @staticmethod
+    def snapshot_key(user_id: uuid.UUID, thread_id: str, exclude_types: Sequence[str] = ()) -> _Key:
+        return (user_id, "snapshot", thread_id, frozenset(exclude_types))
+
+    @staticmethod
+    def profile_key(user_id: uuid.UUID) -> _Key:
+        return (user_id, "profile", "", frozenset())
+
+    def get_snapshot(self, key: _Key, *, version: StreamVersion) -> Optional[Dict[str, Any]]:
+        entry = self._lookup(key, version)
+        if entry is None:
+            return None
+        return copy.deepcopy(entry.value)
+
+    def get_profile(
+        self, user_id: uuid.UUID, *, updated_at: Optional[datetime]
+    ) -> Tuple[bool, Optional[Dict[str, Any]]]:
+        """(hit, profile). A hit may carry None: the user has no profile."""
+
+        entry = self._lookup(self.profile_key(user_id), updated_at)
+        if entry is None:
+            return False, None
+        return True, copy.deepcopy(entry.value)
+
+    def token(self, key: _Key) -> int:
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = _Entry()
+            self._entries[key] = entry
+            self._evict()
+        else:
+            self._entries.move_to_end(key)
+        return entry.generation
+
+    def put_snapshot(self, key: _Key, *, token: int, state: Dict[str, Any], version: StreamVersion) -> None:
+        """Store a snapshot loaded after `version` was read (a newer state only causes a miss later)."""
+
+        entry = self._entries.get(key)
+        if entry is not None and entry.generation == token:
+            entry.value = copy.deepcopy(state)
+            entry.version = version
+
+    def put_profile(
+        self,
+        user_id: uuid.UUID,
+        *,
+        token: int,
+        profile: Optional[Dict[str, Any]],
+        updated_at: Optional[datetime],
+    ) -> None:
+        entry = self._entries.get(self.profile_key(user_id))
+        if entry is not None and entry.generation == token:
+            entry.value = copy.deepcopy(profile)
+            entry.version = updated_at
+
+    def invalidate_events(self, *, user_id: Optional[uuid.UUID], session_id: Optional[str], type: str) -> None:
+        """Drop snapshots an appended event can change: same thread, type not excluded."""
+
+        if user_id is None or session_id is None:
+            return
+        for (uid, kind, thread_id, excluded), entry in self._entries.items():
+            if uid != user_id or kind != "snapshot" or thread_id != session_id or type in excluded:
+                continue
+            entry.generation += 1
+            entry.value = _MISSING
+
+    def invalidate_profile(self, user_id: uuid.UUID) -> None:
+        entry = self._entries.get(self.profile_key(user_id))
+        if entry is not None:
+            entry.generation += 1
+            entry.value = _MISSING
+
+    def _lookup(self, key: _Key, version: Any) -> Optional[_Entry]:
+        kind = key[1]
+        entry = self._entries.get(key)
+        if entry is None or entry.value is _MISSING:
+            state_cache_requests_total.labels(kind=kind, result="miss").inc()
+            return None
+        if entry.version != version:
+            # Written elsewhere (another worker or process) since it was cached.
+            entry.value = _MISSING
+            state_cache_requests_total.labels(kind=kind, result="stale").inc()
+            return None
+        self._entries.move_to_end(key)
+        state_cache_requests_total.labels(kind=kind, result="hit").inc()
+        return entry
+
+    def _evict(self) -> None:
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+
+
+def init_state_cache(app: FastAPI) -> None:
+    max_entries = int(os.getenv("STATE_CACHE_MAX_ENTRIES", "1024") or 0)
+    app.state.state_cache = StateCache(max_entries=max_entries) if max_entries > 0 else None
+
+
+def get_state_cache(app: FastAPI) -> Optional[StateCache]:
+    return getattr(app.state, "state_cache", None)
@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+from fastapi import FastAPI
+
+from app.audit.coordinator import AuditCoordinator, get_audit_coordinator
+from app.audit.tool_approval import preflight_tool_call
+from app.db import get_sessionmaker
+from app.repositories.events_repo import EventsRepository
+from app.repositories.profiles_repo import ProfilesRepository
+from app.services.event_batcher import get_event_batcher
+from app.services.events_service import EventsService
+from app.services.profiles_service import ProfilesService
+from app.services.state_cache import get_state_cache
+from app.services.tools_service import ToolsService
+
+
+def build_tools_service(app: FastAPI) -> ToolsService:
+    sessionmaker = get_sessionmaker(app)
+    state_cache = get_state_cache(app)
+    events = EventsService(
+        sessionmaker=sessionmaker,
+        repo=EventsRepository(),
+        batcher=get_event_batcher(app),
+        state_cache=state_cache,
+    )
+    profiles = ProfilesService(sessionmaker=sessionmaker, repo=ProfilesRepository(), state_cache=state_cache)
+    return ToolsService(events=events, profiles=profiles)
+
+
+@dataclass(frozen=True)
+class ToolInvocation:
+    result: Dict[str, Any]
+    preflight_seconds: Optional[float] = None
+    execute_seconds: Optional[float] = None
+
+
+class ToolInvoker:
+    """Audit approval plus tool execution: `/internal/tools/invoke` and the embedded agent.
+
+    Without a run id (or for runs that are not audited / auto-approve tool
+    calls) the tool executes right away; otherwise this waits until the run's
+    client decides. A denial returns {"ok": False, "error": reason}. Raises
+    ToolExecutionError for invalid tool calls.
+    """
+
+    def __init__(self, *, tools: ToolsService, audit: AuditCoordinator):
+        self._tools = tools
+        self._audit = audit
+
+    @classmethod
+    def from_app(cls, app: FastAPI) -> "ToolInvoker":
+        return cls(tools=build_tools_service(app), audit=get_audit_coordinator(app))
+
+    async def invoke(
+        self,
+        *,
+        user_id: uuid.UUID,
+        session_id: str,
+        name: str,
+        args: Dict[str, Any],
+        run_id: Optional[str] = None,
+        tool_call_id: Optional[str] = None,
+    ) -> ToolInvocation:
+        preflight_seconds: Optional[float] = None
+        run_id = (run_id or "").strip()
+        if run_id:
+            started = time.perf_counter()
+            preflight = await preflight_tool_call(
+                self._audit,
+                user_id=user_id,
+                thread_id=session_id,
+                run_id=run_id,
+                tool_name=name,
+                args=args,
+                tool_call_id=tool_call_id,
+            )
+            preflight_seconds = time.perf_counter() - started
+            if not preflight.get("approved"):
+                return ToolInvocation(
+                    result={"ok": False, "error": preflight.get("reason") or "tool denied"},
+                    preflight_seconds=preflight_seconds,
+                )
+            if isinstance(preflight.get("args"), dict):
+                args = preflight["args"]
+
+        started = time.perf_counter()
+        result = await self._tools.execute(user_id=user_id, session_id=session_id, name=name, args=args)
+        return ToolInvocation(
+            result=result,
+            preflight_seconds=preflight_seconds,
+            execute_seconds=time.perf_counter() - started,
+        )
@@ -0,0 +1,233 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import time
+import uuid
+from collections import OrderedDict, deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional
+
+from fastapi import FastAPI
+
+from app.metrics import (
+    admission_rejections_total,
+    agent_run_queue_depth,
+    agent_run_queue_wait_seconds,
+    agent_runs_inflight,
+    ws_connections_active,
+    ws_idle_disconnects_total,
+)
+
+logger = logging.getLogger("trainer2.api.ws_admission")
+
+OnQueued = Callable[[int], Awaitable[None]]
+SendJson = Callable[[Dict[str, Any]], Awaitable[None]]
+
+
+class Overloaded(Exception):
+    """Admission refused. `scope` names the limit: "connections", "user_connections" or "runs"."""
+
+    def __init__(self, scope: str, message: str):
+        super().__init__(message)
+        self.scope = scope
+
+    def frame(self, **ids: Optional[str]) -> Dict[str, object]:
+        payload: Dict[str, object] = {"type": "OVERLOADED", "scope": self.scope, "message": str(self)}
+        payload.update({k: v for k, v in ids.items() if v is not None})
+        return payload
+
+
+def worker_count() -> int:
+    """API worker processes serving this app: `WEB_CONCURRENCY`, which uvicorn and
+    gunicorn use as their default worker count.
+    """
+
+    try:
+        return max(1, int(os.getenv("WEB_CONCURRENCY", "1") or 1))
+    except ValueError:
+        return 1
+
+
+def _per_worker(total: int, workers: int) -> int:
+    return max(1, total // workers)
+
+
+class AdmissionController:
+    """Per-worker limits on websocket connections and in-flight agent runs.
+
+    Counts live in this process only. `from_env` splits the server-wide totals
+    evenly across `worker_count()` workers; the per-user connection cap applies
+    per worker.
+
+    Connections are capped per user and overall. Agent runs share
+    `max_inflight_runs` slots; when all are taken, runs wait in a queue that is
+    fair across users (round-robin over per-user FIFOs), so one user with many
+    tabs cannot starve the others. A run waits at most `queue_timeout_seconds`
+    and at most `max_queued_runs` runs wait at once; beyond that it is refused.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_connections: int = 1000,
+        max_connections_per_user: int = 5,
+        max_inflight_runs: int = 64,
+        max_queued_runs: int = 256,
+        queue_timeout_seconds: float = 60.0,
+    ):
+        self._max_connections = max(1, max_connections)
+        self._max_connections_per_user = max(1, max_connections_per_user)
+        self._max_inflight_runs = max(1, max_inflight_runs)
+        self._max_queued_runs = max(0, max_queued_runs)
+        self._queue_timeout_seconds = queue_timeout_seconds
+        self._connections: Dict[uuid.UUID, int] = {}
+        self._connections_total = 0
+        self._inflight = 0
+        self._queued = 0
+        # user -> waiting runs; the user at the front is served next, then moves to the back.
+        self._waiters: "OrderedDict[uuid.UUID, Deque[asyncio.Future[None]]]" = OrderedDict()
+
+    @classmethod
+    def from_env(cls) -> "AdmissionController":
+        workers = worker_count()
+        return cls(
+            max_connections=_per_worker(int(os.getenv("WS_MAX_CONNECTIONS", "1000") or 1000), workers),
+            max_connections_per_user=int(os.getenv("WS_MAX_CONNECTIONS_PER_USER", "5") or 5),
+            max_inflight_runs=_per_worker(int(os.getenv("AGENT_MAX_INFLIGHT_RUNS", "64") or 64), workers),
+            max_queued_runs=_per_worker(int(os.getenv("AGENT_MAX_QUEUED_RUNS", "256") or 256), workers),
+            queue_timeout_seconds=float(os.getenv("AGENT_RUN_QUEUE_TIMEOUT_SECONDS", "60") or 60),
+        )
+
+    def admit_connection(self, user_id: uuid.UUID) -> None:
+        """Count a new connection. Raises Overloaded if a cap is reached."""
+
+        if self._connections_total >= self._max_connections:
+            admission_rejections_total.labels(scope="connections").inc()
+            raise Overloaded("connections", "server is at its connection limit")
+        if self._connections.get(user_id, 0) >= self._max_connections_per_user:
+            admission_rejections_total.labels(scope="user_connections").inc()
+            raise Overloaded("user_connections", "too many open connections for this user")
+        self._connections[user_id] = self._connections.get(user_id, 0) + 1
+        self._connections_total += 1
+        ws_connections_active.inc()
+
+    def release_connection(self, user_id: uuid.UUID) -> None:
+        count = self._connections.get(user_id, 0)
+        if count <= 0:
+            return
+        if count == 1:
+            del self._connections[user_id]
+        else:
+            self._connections[user_id] = count - 1
+        self._connections_total -= 1
+        ws_connections_active.dec()
+
+    async def acquire_run(self, user_id: uuid.UUID, *, on_queued: Optional[OnQueued] = None) -> None:
+        """Take an agent run slot, waiting in the fair queue if needed.
+
+        `on_queued(position)` is awaited once if the run has to wait. Raises
+        Overloaded when the queue is full or the wait times out. Every
+        successful acquire must be paired with `release_run`.
+        """
+
+        if self._inflight < self._max_inflight_runs and self._queued == 0:
+            self._inflight += 1
+            agent_runs_inflight.set(self._inflight)
+            agent_run_queue_wait_seconds.observe(0.0)
+            return
+
+        if self._queued >= self._max_queued_runs:
+            admission_rejections_total.labels(scope="runs").inc()
+            raise Overloaded("runs", "too many agent runs in progress; try again shortly")
+
+        fut: "asyncio.Future[None]" = asyncio.get_running_loop().create_future()
+        self._waiters.setdefault(user_id, deque()).append(fut)
+        self._queued += 1
+        agent_run_queue_depth.set(self._queued)
+        started = time.monotonic()
+        try:
+            if on_queued is not None:
+                await on_queued(self._queued)
+            timeout = self._queue_timeout_seconds
+            if timeout > 0:
+                await asyncio.wait_for(asyncio.shield(fut), timeout=timeout)
+            else:
+                await fut
+        except BaseException as exc:
+            if fut.done() and not fut.cancelled():
+                # The slot was handed over just as we gave up: pass it on.
+                self.release_run()
+            else:
+                fut.cancel()
+                self._drop_waiter(user_id, fut)
+            if isinstance(exc, asyncio.TimeoutError):
+                admission_rejections_total.labels(scope="runs").inc()
+                raise Overloaded("runs", "timed out waiting for a free agent slot") from None
+            raise
+        finally:
+            agent_run_queue_wait_seconds.observe(time.monotonic() - started)
+
+    def release_run(self) -> None:
+        while self._waiters:
+            user_id, waiting = next(iter(self._waiters.items()))
+            fut = waiting.popleft()
+            if waiting:
+                self._waiters.move_to_end(user_id)
+            else:
+                del self._waiters[user_id]
+            self._queued -= 1
+            agent_run_queue_depth.set(self._queued)
+            if not fut.done():
+                # The slot moves to the waiter; in-flight count is unchanged.
+                fut.set_result(None)
+                return
+        self._inflight = max(0, self._inflight - 1)
+        agent_runs_inflight.set(self._inflight)
+
+    def _drop_waiter(self, user_id: uuid.UUID, fut: "asyncio.Future[None]") -> None:
+        waiting = self._waiters.get(user_id)
+        if waiting is None or fut not in waiting:
+            return
+        waiting.remove(fut)
+        if not waiting:
+            del self._waiters[user_id]
+        self._queued -= 1
+        agent_run_queue_depth.set(self._queued)
+
+
+async def heartbeat(
+    *,
+    send_json: SendJson,
+    last_seen: Callable[[], float],
+    close: Callable[[], Awaitable[None]],
+    interval_seconds: float,
+    idle_timeout_seconds: float,
+) -> None:
+    """PING the client every `interval_seconds`; `close` it once nothing (PONG or
+    any other frame) has arrived for `idle_timeout_seconds`.
+    """
+
+    while True:
+        await asyncio.sleep(interval_seconds)
+        idle = time.monotonic() - last_seen()
+        if idle > idle_timeout_seconds:
+            ws_idle_disconnects_total.inc()
+            logger.info("closing idle websocket", extra={"idleSeconds": round(idle, 1)})
+            await close()
+            return
+        await send_json({"type": "PING", "ts": int(time.time() * 1000)})
+
+
+def init_admission(app: FastAPI) -> None:
+    app.state.admission = AdmissionController.from_env()
+    workers = worker_count()
+    if workers > 1:
+        logger.info("admission limits split across workers", extra={"workers": workers})
+
+
+def get_admission(app: FastAPI) -> AdmissionController:
+    admission = getattr(app.state, "admission", None)
+    if admission is None:
+        raise RuntimeError("admission controller not initialized")
+    return admission
@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+import json
+import logging
+from typing import Any, Dict, Optional, Union
+
+logger = logging.getLogger("trainer2.api.ws_codec")
+
+try:
+    import msgpack
+except ImportError:  # optional: `?encoding=msgpack` falls back to JSON
+    msgpack = None
+
+Frame = Union[str, bytes]
+
+
+class FrameCodec:
+    """Outbound frame encoding for one websocket (JSON text or MessagePack binary)."""
+
+    name = "json"
+
+    def encode(self, payload: Dict[str, Any]) -> Frame:
+        return json.dumps(payload, ensure_ascii=False, separators=(",", ":"))
+
+
+class MsgpackCodec(FrameCodec):
+    name = "msgpack"
+
+    def encode(self, payload: Dict[str, Any]) -> Frame:
+        return msgpack.packb(payload, use_bin_type=True)
+
+
+JSON_CODEC = FrameCodec()
+
+
+def negotiate_codec(encoding: Optional[str]) -> FrameCodec:
+    """Codec for the `?encoding=` query param; JSON unless msgpack is requested and available."""
+
+    requested = (encoding or "").strip().lower()
+    if requested == "msgpack":
+        if msgpack is not None:
+            return MsgpackCodec()
+        logger.warning("msgpack requested but not installed; using json")
+    return JSON_CODEC
+
+
+def decode_frame(frame: Frame) -> Any:
+    """Decode one inbound frame: text frames are JSON, binary frames are MessagePack.
+
+    Raises ValueError with a user-friendly error message.
+    """
+
+    if isinstance(frame, str):
+        try:
+            return json.loads(frame)
+        except json.JSONDecodeError:
+            raise ValueError("invalid json") from None
+
+    if msgpack is None:
+        raise ValueError("binary frames are not supported")
+    try:
+        return msgpack.unpackb(frame, raw=False)
+    except Exception:
+        raise ValueError("invalid msgpack") from None
@@ -0,0 +1,203 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+
+from fastapi import WebSocket
+
+from app.metrics import (
+    ws_outbound_bytes_total,
+    ws_outbound_frames_total,
+    ws_outbound_queue_depth,
+    ws_send_duration_seconds,
+    ws_slow_consumer_disconnects_total,
+)
+from app.ws_codec import JSON_CODEC, FrameCodec
+
+logger = logging.getLogger("trainer2.api.ws_outbox")
+
+SLOW_CONSUMER_POLICIES = ("coalesce", "drop", "disconnect")
+
+# Progress frames a lagging client can do without under the "drop" policy.
+# Text chunks (the reply itself), run lifecycle and audit frames are never dropped.
+_DROPPABLE_TYPES = frozenset({"TOOL_CALL_STARTED", "TOOL_CALL_RESULT"})
+
+# 1013 "Try Again Later": the server shed a client that could not keep up.
+_SLOW_CONSUMER_CLOSE_CODE = 1013
+
+
+def _mergeable(tail: Dict[str, Any], payload: Dict[str, Any]) -> bool:
+    return (
+        tail.get("type") == "TEXT_MESSAGE_CHUNK"
+        and payload.get("type") == "TEXT_MESSAGE_CHUNK"
+        and isinstance(tail.get("delta"), str)
+        and isinstance(payload.get("delta"), str)
+        and all(tail.get(k) == payload.get(k) for k in ("messageId", "threadId", "runId", "role"))
+    )
+
+
+class WebSocketOutbox:
+    """Bounded per-connection send queue drained by a single writer task.
+
+    `send` never writes to the socket itself: while there is room it enqueues
+    and returns, so a slow client does not stall the agent stream reader or
+    audit callbacks. While the writer is behind, a TEXT_MESSAGE_CHUNK is merged
+    into its run's newest queued frame when that is a chunk of the same
+    message; frames of other runs queued in between do not prevent it (`seq`
+    is numbered per run). Every queued frame counts toward `max_frames`. When
+    the queue is full, `policy` decides:
+
+    - "coalesce": `send` waits for room.
+    - "drop": discard tool progress frames (`_DROPPABLE_TYPES`); wait for room
+      for the others (text chunks are never dropped).
+    - "disconnect": close the socket with 1013.
+
+    Frames are written in `send` order, encoded by `codec` at write time (after
+    coalescing) as text (JSON) or binary (MessagePack) websocket frames.
+    """
+
+    def __init__(
+        self,
+        ws: WebSocket,
+        *,
+        max_frames: int = 256,
+        policy: str = "coalesce",
+        codec: FrameCodec = JSON_CODEC,
+    ):
+        if policy not in SLOW_CONSUMER_POLICIES:
+            raise ValueError(f"unknown slow consumer policy: {policy}")
+        self._ws = ws
+        self._max_frames = max(1, max_frames)
+        self._policy = policy
+        self._codec = codec
+        self._frames: Deque[Dict[str, Any]] = deque()
+        self._ready = asyncio.Event()
+        self._room = asyncio.Event()
+        self._room.set()
+        self._closed = False
+        self._task: Optional[asyncio.Task[None]] = None
+
+    @classmethod
+    def from_env(cls, ws: WebSocket, *, codec: FrameCodec = JSON_CODEC) -> "WebSocketOutbox":
+        policy = os.getenv("WS_SLOW_CONSUMER_POLICY", "coalesce").strip().lower() or "coalesce"
+        if policy not in SLOW_CONSUMER_POLICIES:
+            logger.warning("unknown WS_SLOW_CONSUMER_POLICY %r; using coalesce", policy)
+            policy = "coalesce"
+        return cls(
+            ws,
+            max_frames=int(os.getenv("WS_OUTBOX_MAX_FRAMES", "256") or 256),
+            policy=policy,
+            codec=codec,
+        )
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._writer(), name="ws-outbox-writer")
+
+    async def send(self, payload: Dict[str, Any]) -> None:
+        if self._closed:
+            return
+
+        while True:
+            # Re-checked after every wait: the writer may have sent the target.
+            target = self._run_tail(payload)
+            if target is not None and _mergeable(target, payload):
+                target["delta"] += payload["delta"]
+                if "seq" in payload:
+                    # The merged frame stands for everything up to the newest chunk.
+                    target["seq"] = payload["seq"]
+                ws_outbound_frames_total.labels(outcome="coalesced").inc()
+                return
+
+            if len(self._frames) < self._max_frames:
+                break
+            if self._policy == "disconnect":
+                await self._disconnect_slow_consumer()
+                return
+            if self._policy == "drop" and payload.get("type") in _DROPPABLE_TYPES:
+                ws_outbound_frames_total.labels(outcome="dropped").inc()
+                return
+            self._room.clear()
+            await self._room.wait()
+            if self._closed:
+                return
+
+        # Copy chunks: they may be extended in place by later coalescing.
+        self._frames.append(dict(payload) if payload.get("type") == "TEXT_MESSAGE_CHUNK" else payload)
+        ws_outbound_queue_depth.inc()
+        self._ready.set()
+
+    def _run_tail(self, payload: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Newest queued frame of `payload`'s run, or None."""
+
+        if payload.get("type") != "TEXT_MESSAGE_CHUNK":
+            return None
+        run_id = payload.get("runId")
+        for frame in reversed(self._frames):
+            if frame.get("runId") == run_id:
+                return frame
+        return None
+
+    async def aclose(self) -> None:
+        self._shutdown()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _writer(self) -> None:
+        try:
+            while True:
+                if not self._frames:
+                    self._ready.clear()
+                    await self._ready.wait()
+                    continue
+                frame = self._frames.popleft()
+                ws_outbound_queue_depth.dec()
+                self._room.set()
+
+                data = self._codec.encode(frame)
+                started = time.perf_counter()
+                if isinstance(data, bytes):
+                    await self._ws.send_bytes(data)
+                else:
+                    await self._ws.send_text(data)
+                ws_send_duration_seconds.observe(time.perf_counter() - started)
+                ws_outbound_bytes_total.labels(encoding=self._codec.name).inc(
+                    len(data) if isinstance(data, bytes) else len(data.encode("utf-8"))
+                )
+                ws_outbound_frames_total.labels(outcome="sent").inc()
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            # The client went away; later sends become no-ops.
+            logger.debug("websocket writer stopped", exc_info=True)
+            self._shutdown()
+
+    async def _disconnect_slow_consumer(self) -> None:
+        ws_slow_consumer_disconnects_total.inc()
+        logger.warning("closing slow websocket consumer", extra={"queued": len(self._frames)})
+        self._shutdown()
+        try:
+            await self._ws.close(code=_SLOW_CONSUMER_CLOSE_CODE)
+        except Exception:
+            pass
+
+    def _shutdown(self) -> None:
+        if self._frames:
+            ws_outbound_queue_depth.dec(len(self._frames))
+            self._frames.clear()
+        self._closed = True
+        self._room.set()
+        self._ready.set()
@@ -0,0 +1,226 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import time
+import uuid
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, Tuple
+
+from fastapi import FastAPI
+
+from app.metrics import ws_run_resumes_total, ws_run_streams
+from app.ws_admission import worker_count
+
+logger = logging.getLogger("trainer2.api.ws_resume")
+
+SendJson = Callable[[Dict[str, Any]], Awaitable[None]]
+
+_Key = Tuple[uuid.UUID, str]
+
+
+def parse_resume_param(value: Optional[str]) -> Optional[Tuple[str, int]]:
+    """`<runId>:<seq>` -> (run_id, seq). None when absent or malformed."""
+
+    if not value or ":" not in value:
+        return None
+    run_id, _, seq = value.rpartition(":")
+    if not run_id.strip():
+        return None
+    try:
+        return run_id, max(0, int(seq))
+    except ValueError:
+        return None
+
+
+class RunStream:
+    """Outbound frames of one run, numbered and buffered for reconnects.
+
+    Every frame published for the run gets the next `seq` (1, 2, ...) and is
+    kept in a ring buffer of the last `max_frames`. At most one connection is
+    subscribed at a time; while none is, frames are only buffered and the run
+    keeps going.
+    """
+
+    def __init__(
+        self,
+        *,
+        user_id: uuid.UUID,
+        thread_id: str,
+        run_id: str,
+        max_frames: int,
+        send_json: Optional[SendJson] = None,
+    ):
+        self.user_id = user_id
+        self.thread_id = thread_id
+        self.run_id = run_id
+        self.task: Optional["asyncio.Task[Any]"] = asyncio.current_task()
+        self.finished_at: Optional[float] = None
+        self.last_publish_at = time.monotonic()
+        self._seq = 0
+        self._frames: Deque[Dict[str, Any]] = deque(maxlen=max(1, max_frames))
+        self._subscriber: Optional[SendJson] = send_json
+        # Held while publishing and while replaying, so live frames never overtake a replay.
+        self._lock = asyncio.Lock()
+
+    @property
+    def last_seq(self) -> int:
+        return self._seq
+
+    @property
+    def finished(self) -> bool:
+        return self.finished_at is not None
+
+    async def publish(self, payload: Dict[str, Any]) -> None:
+        async with self._lock:
+            self._seq += 1
+            self.last_publish_at = time.monotonic()
+            frame = dict(payload)
+            frame["seq"] = self._seq
+            self._frames.append(frame)
+            if self._subscriber is not None:
+                await self._subscriber(frame)
+
+    async def attach(self, send_json: SendJson, *, after_seq: int = 0) -> Tuple[int, bool]:
+        """Subscribe `send_json`: RUN_RESUMED (no seq of its own), then the
+        buffered frames with seq > after_seq, then live frames.
+
+        Returns (frames replayed, gap). `gap` means frames after `after_seq` were
+        already evicted from the buffer and cannot be replayed.
+        """
+
+        async with self._lock:
+            oldest = self._frames[0]["seq"] if self._frames else self._seq + 1
+            gap = after_seq + 1 < oldest
+            replay = [frame for frame in self._frames if frame["seq"] > after_seq]
+            self._subscriber = send_json
+            await send_json(
+                {
+                    "type": "RUN_RESUMED",
+                    "threadId": self.thread_id,
+                    "runId": self.run_id,
+                    "fromSeq": after_seq,
+                    "lastSeq": self._seq,
+                    "gap": gap,
+                }
+            )
+            for frame in replay:
+                await send_json(frame)
+            return len(replay), gap
+
+    def detach(self, send_json: SendJson) -> None:
+        if self._subscriber is send_json:
+            self._subscriber = None
+
+    def finish(self) -> None:
+        if self.finished_at is None:
+            self.finished_at = time.monotonic()
+        self.task = None
+
+
+class RunStreamRegistry:
+    """Run streams of this worker, kept `grace_seconds` after the run (or its
+    last connection) ends so a client that reconnects with
+    `?resume=<runId>:<seq>` can pick up where it left off.
+
+    Streams are not shared between workers: a reconnect routed to another
+    worker gets RUN_ERROR ("run is not resumable"), as for an expired run.
+
+    A stream that has published nothing for `idle_seconds` is dropped too, even
+    if its run never finished, so a stuck run does not keep its buffer forever.
+    """
+
+    def __init__(self, *, max_frames: int = 1024, grace_seconds: float = 60.0, idle_seconds: float = 600.0):
+        self._max_frames = max(1, max_frames)
+        self._grace_seconds = max(0.0, grace_seconds)
+        self._idle_seconds = max(self._grace_seconds, idle_seconds)
+        self._streams: Dict[_Key, RunStream] = {}
+
+    @classmethod
+    def from_env(cls) -> "RunStreamRegistry":
+        return cls(
+            max_frames=int(os.getenv("WS_RESUME_BUFFER_FRAMES", "1024") or 1024),
+            grace_seconds=float(os.getenv("WS_RESUME_GRACE_SECONDS", "60") or 60),
+            idle_seconds=float(os.getenv("WS_RESUME_IDLE_SECONDS", "600") or 600),
+        )
+
+    def open(self, *, user_id: uuid.UUID, thread_id: str, run_id: str, send_json: SendJson) -> RunStream:
+        """New stream for a run starting in the current task, subscribed by `send_json`.
+
+        Replaces an older stream with the same run id.
+        """
+
+        self._purge()
+        stream = RunStream(
+            user_id=user_id,
+            thread_id=thread_id,
+            run_id=run_id,
+            max_frames=self._max_frames,
+            send_json=send_json,
+        )
+        self._streams[(user_id, run_id)] = stream
+        ws_run_streams.set(len(self._streams))
+        return stream
+
+    def get(self, *, user_id: uuid.UUID, run_id: str) -> Optional[RunStream]:
+        self._purge()
+        return self._streams.get((user_id, run_id))
+
+    async def resume(
+        self,
+        *,
+        user_id: uuid.UUID,
+        run_id: str,
+        after_seq: int,
+        send_json: SendJson,
+    ) -> Optional[RunStream]:
+        """Attach a reconnected client to a run, replaying what it missed.
+
+        Returns None and sends RUN_ERROR when the run is unknown or its grace
+        period is over.
+        """
+
+        stream = self.get(user_id=user_id, run_id=run_id)
+        if stream is None:
+            ws_run_resumes_total.labels(result="expired").inc()
+            await send_json({"type": "RUN_ERROR", "runId": run_id, "message": "run is not resumable"})
+            return None
+
+        replayed, gap = await stream.attach(send_json, after_seq=after_seq)
+        ws_run_resumes_total.labels(result="gap" if gap else "ok").inc()
+        logger.info(
+            "run resumed",
+            extra={"runId": run_id, "afterSeq": after_seq, "replayed": replayed, "gap": gap},
+        )
+        return stream
+
+    def _purge(self) -> None:
+        now = time.monotonic()
+        expired = [
+            key
+            for key, stream in self._streams.items()
+            if (stream.finished_at is not None and now - stream.finished_at > self._grace_seconds)
+            or now - stream.last_publish_at > self._idle_seconds
+        ]
+        for key in expired:
+            del self._streams[key]
+        if expired:
+            ws_run_streams.set(len(self._streams))
+
+
+def init_run_streams(app: FastAPI) -> None:
+    app.state.run_streams = RunStreamRegistry.from_env()
+    workers = worker_count()
+    if workers > 1:
+        logger.warning(
+            "run streams are per worker; ?resume= needs reconnects routed to the same worker (sticky sessions)",
+            extra={"workers": workers},
+        )
+
+
+def get_run_streams(app: FastAPI) -> RunStreamRegistry:
+    registry = getattr(app.state, "run_streams", None)
+    if registry is None:
+        raise RuntimeError("run stream registry not initialized")
+    return registry
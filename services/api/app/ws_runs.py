@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Deque, Dict, Set
+
+from app.protocol import ClientRunAgentInput
+
+logger = logging.getLogger("trainer2.api.ws_runs")
+
+RunHandler = Callable[[ClientRunAgentInput], Awaitable[None]]
+SendJson = Callable[[Dict[str, Any]], Awaitable[None]]
+
+# Runs left to finish after their connection closed; referenced here so they
+# are not garbage collected mid-run.
+_detached_runs: Set["asyncio.Task[None]"] = set()
+
+
+class RunRejected(Exception):
+    pass
+
+
+@dataclass
+class _ThreadRuns:
+    active: ClientRunAgentInput
+    task: "asyncio.Task[None]"
+    pending: Deque[ClientRunAgentInput] = field(default_factory=deque)
+
+
+class RunScheduler:
+    """Runs of one websocket connection, multiplexed by threadId.
+
+    Different threads run concurrently, up to `max_active_threads`. Runs on the
+    same thread execute one at a time in submission order (at most
+    `max_queued_per_thread` waiting). `cancel` stops an active or queued run by
+    id and reports it with RUN_CANCELLED.
+    """
+
+    def __init__(
+        self,
+        *,
+        handler: RunHandler,
+        send_json: SendJson,
+        max_active_threads: int = 4,
+        max_queued_per_thread: int = 8,
+    ):
+        self._handler = handler
+        self._send_json = send_json
+        self._max_active_threads = max(1, max_active_threads)
+        self._max_queued_per_thread = max(0, max_queued_per_thread)
+        self._threads: Dict[str, _ThreadRuns] = {}
+        self._closed = False
+
+    @classmethod
+    def from_env(cls, *, handler: RunHandler, send_json: SendJson) -> "RunScheduler":
+        return cls(
+            handler=handler,
+            send_json=send_json,
+            max_active_threads=int(os.getenv("WS_MAX_CONCURRENT_RUNS", "4") or 4),
+            max_queued_per_thread=int(os.getenv("WS_MAX_QUEUED_RUNS_PER_THREAD", "8") or 8),
+        )
+
+    @property
+    def active_threads(self) -> int:
+        return len(self._threads)
+
+    def submit(self, msg: ClientRunAgentInput) -> None:
+        """Start or queue a run. Raises RunRejected if a limit is hit."""
+
+        if self._closed:
+            raise RunRejected("connection closing")
+
+        state = self._threads.get(msg.thread_id)
+        if state is not None:
+            if len(state.pending) >= self._max_queued_per_thread:
+                raise RunRejected("too many queued runs for this thread")
+            state.pending.append(msg)
+            return
+
+        if len(self._threads) >= self._max_active_threads:
+            raise RunRejected("too many concurrent runs")
+        self._start(msg)
+
+    async def cancel(self, *, thread_id: str, run_id: str) -> bool:
+        state = self._threads.get(thread_id)
+        if state is None:
+            return False
+
+        if state.active.run_id == run_id:
+            # RUN_CANCELLED is sent by the run task itself, after its last frame.
+            state.task.cancel()
+            return True
+
+        for queued in state.pending:
+            if queued.run_id == run_id:
+                state.pending.remove(queued)
+                await self._send_cancelled(queued)
+                return True
+        return False
+
+    async def aclose(self, *, cancel_active: bool) -> None:
+        """Drop queued runs. Cancel the active ones and wait for them to unwind,
+        or detach them: they finish in the background and the caller returns
+        right away.
+        """
+
+        self._closed = True
+        tasks = []
+        for state in self._threads.values():
+            state.pending.clear()
+            tasks.append(state.task)
+        if not cancel_active:
+            for task in tasks:
+                _detached_runs.add(task)
+                task.add_done_callback(_detached_runs.discard)
+            return
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    def _start(self, msg: ClientRunAgentInput) -> None:
+        task = asyncio.create_task(self._run(msg), name=f"ws-run-{msg.run_id}")
+        self._threads[msg.thread_id] = _ThreadRuns(active=msg, task=task)
+        task.add_done_callback(lambda _t: self._on_done(msg.thread_id))
+
+    async def _run(self, msg: ClientRunAgentInput) -> None:
+        try:
+            await self._handler(msg)
+        except asyncio.CancelledError:
+            if not self._closed:
+                await self._send_cancelled(msg)
+            raise
+
+    def _on_done(self, thread_id: str) -> None:
+        state = self._threads.pop(thread_id, None)
+        if state is None or self._closed or not state.pending:
+            return
+        nxt = state.pending.popleft()
+        self._start(nxt)
+        self._threads[thread_id].pending = state.pending
+
+    async def _send_cancelled(self, msg: ClientRunAgentInput) -> None:
+        try:
+            await self._send_json({"type": "RUN_CANCELLED", "threadId": msg.thread_id, "runId": msg.run_id})
+        except Exception:
+            logger.debug("failed to report cancelled run", exc_info=True)